@@ -0,0 +1,246 @@
+"""Пакетный прогон симуляции без отрисовки по сетке или случайной выборке параметров.
+
+Прогоны выполняются параллельно в пуле процессов, а итог каждого прогона
+сразу дописывается в файл результатов одной строкой JSON.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from simulation import (WIDTH, HEIGHT, FIXED_DT, DAY_LENGTH, NIGHT_LENGTH, FOOD_SPAWN_PROBABILITY,
+                        INITIAL_HERBIVORE_COUNT, INITIAL_PREDATOR_COUNT, INITIAL_FOOD_COUNT,
+                        SPECIES, Ecosystem, configure_species, is_profile_parameter, load_species,
+                        species_config)
+
+DEFAULTS = {
+    "herbivores": INITIAL_HERBIVORE_COUNT,
+    "predators": INITIAL_PREDATOR_COUNT,
+    "food": INITIAL_FOOD_COUNT,
+    "food_spawn_probability": FOOD_SPAWN_PROBABILITY,
+    "day_length": DAY_LENGTH,
+    "night_length": NIGHT_LENGTH,
+}
+DEFAULT_TICKS = 20000
+DEFAULT_SAMPLE_INTERVAL = 60
+
+def parse_value(text):
+    """Разбирает значение параметра: int, float или строку."""
+    for kind in (int, float):
+        try:
+            return kind(text)
+        except ValueError:
+            pass
+    return text
+
+def check_param(name):
+    """Проверяет имя параметра: общий параметр или Вид.атрибут профиля вида (см. register_species)."""
+    if name in DEFAULTS:
+        return name
+    species, _, attribute = name.partition(".")
+    if species in SPECIES and is_profile_parameter(SPECIES[species], attribute):
+        return name
+    raise ValueError(f"Неизвестный параметр: {name}")
+
+def grid_configs(grid):
+    """Все сочетания значений из словаря {параметр: [значения]}."""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+def random_configs(ranges, samples, rng):
+    """samples наборов, равномерно выбранных из словаря {параметр: (мин, макс)}.
+
+    Если обе границы целые, значение тоже выбирается целым.
+    """
+    configs = []
+    for _ in range(samples):
+        config = {}
+        for name, (low, high) in ranges.items():
+            if isinstance(low, int) and isinstance(high, int):
+                config[name] = rng.randint(low, high)
+            else:
+                config[name] = rng.uniform(low, high)
+        configs.append(config)
+    return configs
+
+def build_runs(grid, ranges, samples, seeds, sample_seed=0):
+    """Список прогонов (номер, параметры, зерно): сетка x выборка x зерна."""
+    configs = grid_configs(grid)
+    if ranges:
+        sampled = random_configs(ranges, samples, random.Random(sample_seed))
+        configs = [{**config, **sample} for config in configs for sample in sampled]
+    runs = []
+    for params in configs:
+        for seed in seeds:
+            runs.append((len(runs), params, seed))
+    return runs
+
+def make_ecosystem(params, seed, width=WIDTH, height=HEIGHT, backend=None, species_counts=None):
+    """Создает и заселяет экосистему с заданными параметрами.
+
+    species_counts - начальная численность видов, загруженных из файла видов.
+    """
+    settings = {**DEFAULTS, **{name: value for name, value in params.items() if name in DEFAULTS}}
+    species_params = {}
+    for name, value in params.items():
+        if name not in DEFAULTS:
+            species, _, attribute = name.partition(".")
+            species_params.setdefault(SPECIES[species], {})[attribute] = value
+    ecosystem = Ecosystem(width, height, backend=backend, seed=seed,
+                          day_length=settings["day_length"], night_length=settings["night_length"],
+                          species_params=species_params)
+    ecosystem.food_spawn_probability = settings["food_spawn_probability"]
+    ecosystem.populate(settings["herbivores"], settings["predators"], settings["food"], species_counts)
+    return ecosystem
+
+def run_simulation(run_id, params, seed, ticks=DEFAULT_TICKS, sample_interval=DEFAULT_SAMPLE_INTERVAL,
+                   width=WIDTH, height=HEIGHT, backend=None, species=None, species_counts=None):
+    """Выполняет один прогон и возвращает его итог.
+
+    Численность каждого вида реестра (под его именем) и количество еды записываются
+    каждые sample_interval тиков; прогон заканчивается раньше, если вымерли все виды.
+    species - описания видов (species_config()), которые регистрируются в процессе прогона.
+    """
+    started = time.perf_counter()
+    if species:
+        configure_species(species)
+    ecosystem = make_ecosystem(params, seed, width, height, backend, species_counts)
+    series = {"tick": [], **{name: [] for name in SPECIES}, "food": []}
+    extinction = {name: None for name in SPECIES}
+
+    def sample():
+        series["tick"].append(ecosystem.tick)
+        for name, cls in SPECIES.items():
+            series[name].append(ecosystem.count(cls))
+        series["food"].append(ecosystem.food_amount())
+
+    sample()
+    while ecosystem.tick < ticks:
+        ecosystem.step(FIXED_DT)
+        for name, cls in SPECIES.items():
+            if extinction[name] is None and ecosystem.count(cls) == 0:
+                extinction[name] = ecosystem.tick
+        if ecosystem.tick % sample_interval == 0:
+            sample()
+        if not ecosystem.entities:
+            break
+    if series["tick"][-1] != ecosystem.tick:
+        sample()
+
+    return {
+        "run_id": run_id,
+        "params": params,
+        "seed": seed,
+        "ticks": ecosystem.tick,
+        "extinction_tick": extinction,
+        "final": {
+            **{name: ecosystem.count(cls) for name, cls in SPECIES.items()},
+            "food": ecosystem.food_amount(),
+        },
+        "series": series,
+        "elapsed": time.perf_counter() - started,
+    }
+
+def collect(futures, write):
+    """Записывает итоги завершившихся прогонов и возвращает прогоны, потерянные вместе со сломанным пулом."""
+    broken = []
+    failed = 0
+    for future in as_completed(futures):
+        run_id, params, seed = futures[future]
+        try:
+            record = future.result()
+        except BrokenProcessPool:
+            broken.append(futures[future])
+            continue
+        except Exception as error:
+            record = {"run_id": run_id, "params": params, "seed": seed, "error": repr(error)}
+        if "error" in record:
+            failed += 1
+            print(f"Прогон {run_id} завершился ошибкой: {record['error']}")
+        else:
+            print(f"Прогон {run_id} готов: {record['ticks']} тиков за {record['elapsed']:.1f} с")
+        write(record)
+    return sorted(broken), failed
+
+def run_batch(runs, output, workers=None, **options):
+    """Выполняет прогоны в пуле процессов, дописывая итог каждого в файл output.
+
+    Исключение в прогоне записывается в его строку и не останавливает остальные.
+    Если рабочий процесс аварийно завершился и сломал пул, незавершенные прогоны
+    перезапускаются каждый в своем процессе, чтобы ошибка досталась только виновнику.
+    Возвращает число прогонов, завершившихся ошибкой.
+    """
+    workers = workers or os.cpu_count()
+    with open(output, "a", encoding="utf-8") as results:
+        def write(record):
+            results.write(json.dumps(record, ensure_ascii=False) + "\n")
+            results.flush()
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(run_simulation, *run, **options): run for run in runs}
+            broken, failed = collect(futures, write)
+
+        for start in range(0, len(broken), workers):
+            chunk = broken[start:start + workers]
+            pools = [ProcessPoolExecutor(max_workers=1) for _ in chunk]
+            futures = {pool.submit(run_simulation, *run, **options): run for pool, run in zip(pools, chunk)}
+            crashed, chunk_failed = collect(futures, write)
+            for pool in pools:
+                pool.shutdown()
+            failed += chunk_failed + len(crashed)
+            for run_id, params, seed in crashed:
+                error = "рабочий процесс аварийно завершился"
+                print(f"Прогон {run_id} завершился ошибкой: {error}")
+                write({"run_id": run_id, "params": params, "seed": seed, "error": error})
+    return failed
+
+def parse_grid(items):
+    grid = {}
+    for item in items:
+        name, _, values = item.partition("=")
+        grid[check_param(name)] = [parse_value(value) for value in values.split(",")]
+    return grid
+
+def parse_ranges(items):
+    ranges = {}
+    for item in items:
+        name, _, bounds = item.partition("=")
+        low, _, high = bounds.partition(":")
+        ranges[check_param(name)] = (parse_value(low), parse_value(high))
+    return ranges
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Пакетный прогон симуляции по сетке параметров.")
+    parser.add_argument("--grid", action="append", default=[], metavar="ПАРАМЕТР=A,B,C",
+                        help="значения параметра для перебора по сетке (можно повторять)")
+    parser.add_argument("--range", action="append", default=[], metavar="ПАРАМЕТР=МИН:МАКС",
+                        help="диапазон параметра для случайной выборки (можно повторять)")
+    parser.add_argument("--samples", type=int, default=10, help="число случайных наборов для --range")
+    parser.add_argument("--sample-seed", type=int, default=0, help="зерно случайной выборки параметров")
+    parser.add_argument("--seeds", type=int, default=1, help="число зерен симуляции на каждый набор параметров")
+    parser.add_argument("--base-seed", type=int, default=0, help="первое зерно симуляции")
+    parser.add_argument("--ticks", type=int, default=DEFAULT_TICKS, help="максимальное число тиков прогона")
+    parser.add_argument("--sample-interval", type=int, default=DEFAULT_SAMPLE_INTERVAL,
+                        help="шаг записи временных рядов в тиках")
+    parser.add_argument("--width", type=int, default=WIDTH, help="ширина карты")
+    parser.add_argument("--height", type=int, default=HEIGHT, help="высота карты")
+    parser.add_argument("--backend", choices=["numpy"], default=None,
+                        help="векторизованный бэкенд для больших миров (с тем же зерном дает другой прогон)")
+    parser.add_argument("--species", default=None, metavar="ФАЙЛ", help="JSON-файл с дополнительными видами")
+    parser.add_argument("--workers", type=int, default=None, help="число процессов (по умолчанию все ядра)")
+    parser.add_argument("--output", default="results.jsonl", help="файл результатов (JSON Lines, дописывается)")
+    args = parser.parse_args()
+
+    species_counts = load_species(args.species) if args.species is not None else None
+    seeds = range(args.base_seed, args.base_seed + args.seeds)
+    runs = build_runs(parse_grid(args.grid), parse_ranges(args.range), args.samples, seeds, args.sample_seed)
+    print(f"Прогонов: {len(runs)}, процессов: {args.workers or os.cpu_count()}")
+    started = time.perf_counter()
+    failed = run_batch(runs, args.output, args.workers, ticks=args.ticks, sample_interval=args.sample_interval,
+                       width=args.width, height=args.height, backend=args.backend,
+                       species=species_config(), species_counts=species_counts)
+    print(f"Готово за {time.perf_counter() - started:.1f} с, ошибок: {failed}, результаты в {args.output}")
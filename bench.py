@@ -0,0 +1,472 @@
+"""Замеры производительности симуляции и отрисовки."""
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import pickle
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+from profiler import percentile
+from simulation import (WIDTH, HEIGHT, FIXED_DT, INITIAL_HERBIVORE_COUNT, INITIAL_PREDATOR_COUNT,
+                        INITIAL_FOOD_COUNT, LOD_ERROR_BUDGET, SPECIES, Ecosystem, Herbivore, LevelOfDetail,
+                        Predator, Vector2, Water)
+
+SCALING_AGENTS = 50000
+
+# Сценарии набора замеров: размер карты, травоядные, хищники, еда, дополнительные
+# источники воды и число замеряемых тиков. Кроме стандартного мира, еды и воды
+# больше обычного, чтобы нагрузить поиск целей и обход воды.
+SUITE_SCENARIOS = {
+    "default": dict(width=WIDTH, height=HEIGHT, herbivores=INITIAL_HERBIVORE_COUNT,
+                    predators=INITIAL_PREDATOR_COUNT, food=INITIAL_FOOD_COUNT, water=0, ticks=2000),
+    "1k": dict(width=WIDTH * 4, height=HEIGHT * 4, herbivores=800, predators=200, food=2000, water=20,
+               ticks=300),
+    "10k": dict(width=WIDTH * 12, height=HEIGHT * 12, herbivores=8000, predators=2000, food=20000, water=60,
+                ticks=20),
+    "50k": dict(width=WIDTH * 28, height=HEIGHT * 28, herbivores=40000, predators=10000, food=100000, water=120,
+                ticks=5),
+}
+SUITE_SEED = 0
+SUITE_WARMUP = 2
+SUITE_FRAMES = 60
+SUITE_MEMORY_TICKS = 1
+# Показатели набора: направление улучшения (1 - чем больше, тем лучше, -1 - чем меньше)
+# и наименьшая разница, которая не считается шумом замера.
+SUITE_METRICS = {
+    "ticks_per_second": (1, 0.0),
+    "tick_p95_ms": (-1, 0.5),
+    "render_ms": (-1, 0.5),
+    "peak_memory_mb": (-1, 0.5),
+    "startup_seconds": (-1, 0.05),
+}
+REGRESSION_THRESHOLD = 0.1
+
+LOD_METRICS = ("herbivores_mean", "predators_mean", "food_mean", "herbivores_final", "predators_final",
+               "ticks_per_second", "update_share")
+
+def bytes_per_agent(species, count=10000, backend=None):
+    """Средний объем памяти (в байтах), который занимает одна особь вида вместе с записями в индексах."""
+    ecosystem = Ecosystem(WIDTH * 4, HEIGHT * 4, backend=backend, seed=0)
+    cls = SPECIES[species]
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for _ in range(count):
+        x = ecosystem.rng.uniform(0, ecosystem.map.width)
+        y = ecosystem.rng.uniform(0, ecosystem.map.height)
+        ecosystem.add_entity(ecosystem.create(cls, x, y))
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / count
+
+def lod_run(seed, lod=None, ticks=20000, width=WIDTH * 4, height=HEIGHT * 4, backend=None,
+            herbivores=INITIAL_HERBIVORE_COUNT, predators=INITIAL_PREDATOR_COUNT, food=INITIAL_FOOD_COUNT,
+            sample_interval=60):
+    """Один прогон с планировщиком lod (или с полной детализацией) и его сводка.
+
+    Фокусом служит область размером с окно в центре карты, как если бы на нее смотрела камера.
+    """
+    ecosystem = Ecosystem(width, height, backend=backend, seed=seed, lod=lod)
+    if lod is not None:
+        left, top = (width - WIDTH) / 2, (height - HEIGHT) / 2
+        lod.focus = [(left, top, left + WIDTH, top + HEIGHT)]
+    ecosystem.populate(herbivores, predators, food)
+    samples = {"herbivores": [], "predators": [], "food": []}
+    started = time.perf_counter()
+    for tick in range(1, ticks + 1):
+        ecosystem.step(FIXED_DT)
+        if tick % sample_interval == 0:
+            samples["herbivores"].append(ecosystem.count(Herbivore))
+            samples["predators"].append(ecosystem.count(Predator))
+            samples["food"].append(ecosystem.food_amount())
+    elapsed = time.perf_counter() - started
+    result = {f"{name}_mean": statistics.fmean(values) for name, values in samples.items()}
+    result["herbivores_final"] = ecosystem.count(Herbivore)
+    result["predators_final"] = ecosystem.count(Predator)
+    result["ticks_per_second"] = ticks / elapsed
+    result["update_share"] = lod.updates / max(1, lod.updates + lod.skips) if lod is not None else 1.0
+    return result
+
+def compare_lod(seeds, error_budget=LOD_ERROR_BUDGET, **options):
+    """Сравнивает средние по зернам показатели прогонов с полной детализацией и с LOD.
+
+    Возвращает {показатель: (полная детализация, LOD)}.
+    """
+    full = [lod_run(seed, None, **options) for seed in seeds]
+    coarse = [lod_run(seed, LevelOfDetail(error_budget), **options) for seed in seeds]
+    return {name: (statistics.fmean(run[name] for run in full), statistics.fmean(run[name] for run in coarse))
+            for name in LOD_METRICS}
+
+def steering_run(ticks=600, scenario="1k", seed=SUITE_SEED, warmup=SUITE_WARMUP):
+    """Выделения памяти за тик и скорость тика в мире сценария набора.
+
+    Скорость замеряется без трассировки. Затем те же ticks тиков идут под tracemalloc:
+    пик выделенного за тик сверх памяти в его начале (временные кортежи, списки и
+    векторы, которые тик создает и освобождает) и прирост числа блоков памяти
+    (sys.getallocatedblocks) за весь замер. Отдельно считаются созданные Vector2
+    (подменой Vector2.__init__ на время замера).
+    """
+    ecosystem = suite_world(SUITE_SCENARIOS[scenario], seed)
+    ecosystem.run(warmup)
+    started = time.perf_counter()
+    ecosystem.run(ticks)
+    elapsed = time.perf_counter() - started
+
+    created = [0]
+    original = Vector2.__init__
+
+    def counted(self, *args, **kwargs):
+        created[0] += 1
+        original(self, *args, **kwargs)
+
+    peaks = []
+    gc.collect()
+    blocks = sys.getallocatedblocks()
+    Vector2.__init__ = counted
+    tracemalloc.start()
+    try:
+        for _ in range(ticks):
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            ecosystem.step(FIXED_DT)
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+        Vector2.__init__ = original
+    gc.collect()
+    blocks = sys.getallocatedblocks() - blocks
+    agents = max(1, len(ecosystem.entities))
+    return {"vectors_per_tick": created[0] / ticks, "peak_bytes_per_tick": statistics.fmean(peaks),
+            "peak_bytes_per_agent": statistics.fmean(peaks) / agents, "blocks_per_tick": blocks / ticks,
+            "ticks_per_second": ticks / elapsed}
+
+def backend_run(scenario="10k", backend=None, lod=False, ticks=60, seed=SUITE_SEED, warmup=30):
+    """Тиков в секунду в мире сценария набора с бэкендом backend, с LOD или с полной детализацией."""
+    ecosystem = suite_world(SUITE_SCENARIOS[scenario], seed, backend, LevelOfDetail() if lod else None)
+    ecosystem.run(warmup)
+    started = time.perf_counter()
+    ecosystem.run(ticks)
+    return ticks / (time.perf_counter() - started)
+
+def compare_backends(scenario="10k", ticks=60, seed=SUITE_SEED):
+    """Скорость тика обычного и векторизованного бэкенда, с LOD и без: {(бэкенд, lod): тиков/с}."""
+    return {(backend, lod): backend_run(scenario, backend, lod, ticks, seed)
+            for backend in (None, "numpy") for lod in (False, True)}
+
+def scaling_run(workers, tiles, agents=SCALING_AGENTS, ticks=20, width=WIDTH * 50, height=HEIGHT * 50,
+                seed=0, warmup=2):
+    """Тиков в секунду многоядерного тика на workers процессах (None - обычный тик в одном процессе).
+
+    Особи делятся на травоядных и хищников 4:1, еды столько же, сколько хищников.
+    """
+    from parallel import TiledEcosystem
+
+    ecosystem = Ecosystem(width, height, seed=seed)
+    ecosystem.populate(agents * 4 // 5, agents // 5, agents // 5)
+    if workers is None:
+        ecosystem.run(warmup)
+        started = time.perf_counter()
+        ecosystem.run(ticks)
+        return ticks / (time.perf_counter() - started)
+    with TiledEcosystem(ecosystem, tiles, workers) as tiled:
+        tiled.run(warmup)
+        started = time.perf_counter()
+        tiled.run(ticks)
+        return ticks / (time.perf_counter() - started)
+
+def scaling_estimate(max_workers, tiles, agents=SCALING_AGENTS, ticks=20, width=WIDTH * 50, height=HEIGHT * 50,
+                     seed=0, warmup=2):
+    """Оценка скорости многоядерного тика на 1..max_workers ядрах по замерам в одном процессе.
+
+    Тайлы шагают по очереди в процессе координатора, и время шага каждого тайла
+    замеряется отдельно, как и обмен у координатора вместе с сериализацией входящих
+    и исходящих данных тайлов (их передача по каналу). Тик на w ядрах оценивается
+    как обмен с сериализацией плюс самый долгий работник - сумма его тайлов при том
+    же распределении тайлов, что у TiledEcosystem. Возвращает {процессы: тиков в секунду}.
+    """
+    from parallel import TiledEcosystem, handle
+
+    ecosystem = Ecosystem(width, height, seed=seed)
+    ecosystem.populate(agents * 4 // 5, agents // 5, agents // 5)
+    tile_seconds = [0.0] * tiles
+    serial = 0.0
+    with TiledEcosystem(ecosystem, tiles, workers=0) as tiled:
+        tiled.run(warmup)
+        states = tiled.workers[0].tiles
+        for _ in range(ticks):
+            started = time.perf_counter()
+            inboxes = pickle.loads(pickle.dumps(tiled.inboxes))
+            serial += time.perf_counter() - started
+            outboxes = {}
+            for index in sorted(inboxes):
+                started = time.perf_counter()
+                outboxes.update(handle(states, 'step', (FIXED_DT, {index: inboxes[index]})))
+                tile_seconds[index] += time.perf_counter() - started
+            started = time.perf_counter()
+            tiled.inboxes = tiled.route(pickle.loads(pickle.dumps(outboxes)))
+            serial += time.perf_counter() - started
+    results = {}
+    for workers in range(1, min(max_workers, tiles) + 1):
+        busiest = max(sum(tile_seconds[index::workers]) for index in range(workers))
+        results[workers] = ticks / (serial + busiest)
+    return results
+
+def compare_scaling(max_workers, tiles, **options):
+    """Скорость тика без тайлов и на 1..max_workers процессах: {процессы: тиков в секунду}."""
+    results = {None: scaling_run(None, tiles, **options)}
+    for workers in range(1, max_workers + 1):
+        results[workers] = scaling_run(workers, tiles, **options)
+    return results
+
+def suite_world(scenario, seed=SUITE_SEED, backend=None, lod=None):
+    """Мир сценария набора: заселенная экосистема с дополнительными источниками воды.
+
+    С планировщиком lod фокусом служит область размером с окно в центре карты.
+    """
+    ecosystem = Ecosystem(scenario["width"], scenario["height"], backend=backend, seed=seed, lod=lod)
+    if lod is not None:
+        left, top = (scenario["width"] - WIDTH) / 2, (scenario["height"] - HEIGHT) / 2
+        lod.focus = [(left, top, left + WIDTH, top + HEIGHT)]
+    ecosystem.populate(scenario["herbivores"], scenario["predators"], scenario["food"])
+    rng = ecosystem.rng
+    for _ in range(scenario["water"]):
+        x = rng.randint(50, scenario["width"] - 50)
+        y = rng.randint(50, scenario["height"] - 50)
+        ecosystem.add_water_source(Water(x, y, rng.randint(20, 40)))
+    return ecosystem
+
+def suite_memory(scenario, seed=SUITE_SEED, ticks=SUITE_MEMORY_TICKS):
+    """Пик памяти Python (в МБ) при создании мира сценария и первых тиках."""
+    gc.collect()
+    tracemalloc.start()
+    ecosystem = suite_world(scenario, seed)
+    ecosystem.run(ticks)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del ecosystem
+    gc.collect()
+    return peak / 2 ** 20
+
+def suite_render(ecosystem, frames=SUITE_FRAMES):
+    """Среднее время полной отрисовки кадра (в мс) на поверхности размером с окно вне экрана.
+
+    Камера смотрит в центр карты. Экосистема между кадрами не шагает: стоимость
+    кадра зависит от видимого содержимого, а не от движения. Без pygame возвращает None.
+    """
+    try:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        import pygame
+        from render import Camera, Renderer
+    except ImportError:
+        return None
+    pygame.init()
+    # Фон кадра приводится к формату дисплея, поэтому нужен хотя бы скрытый дисплей.
+    pygame.display.set_mode((1, 1))
+    camera = Camera(WIDTH, HEIGHT)
+    camera.x = (ecosystem.map.width - WIDTH) / 2
+    camera.y = (ecosystem.map.height - HEIGHT) / 2
+    renderer = Renderer(pygame.Surface((WIDTH, HEIGHT)), dirty_rects=False, camera=camera)
+    elapsed = 0.0
+    for _ in range(frames):
+        started = time.perf_counter()
+        renderer.draw_world(ecosystem)
+        elapsed += time.perf_counter() - started
+    pygame.quit()
+    return elapsed / frames * 1000
+
+def suite_run(scenario, seed=SUITE_SEED, render=True, warmup=SUITE_WARMUP):
+    """Замеры одного сценария: скорость тика, отрисовка, пик памяти и время создания мира."""
+    result = {"peak_memory_mb": suite_memory(scenario, seed)}
+    started = time.perf_counter()
+    ecosystem = suite_world(scenario, seed)
+    result["startup_seconds"] = time.perf_counter() - started
+    ecosystem.run(warmup)
+    durations = []
+    for _ in range(scenario["ticks"]):
+        started = time.perf_counter()
+        ecosystem.step(FIXED_DT)
+        durations.append(time.perf_counter() - started)
+    durations.sort()
+    # Медиана устойчивее к паузам сборщика мусора и соседним процессам, чем среднее.
+    result["ticks_per_second"] = 1 / statistics.median(durations)
+    result["tick_p95_ms"] = percentile(durations, 95) * 1000
+    result["render_ms"] = suite_render(ecosystem) if render else None
+    result["agents"] = len(ecosystem.entities)
+    return result
+
+def run_suite(names=tuple(SUITE_SCENARIOS), seed=SUITE_SEED, render=True):
+    """Прогоняет сценарии набора; результат вместе с описанием машины годится для save_suite."""
+    return {
+        "meta": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpus": multiprocessing.cpu_count(),
+            "seed": seed,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "scenarios": {name: {**SUITE_SCENARIOS[name], **suite_run(SUITE_SCENARIOS[name], seed, render)}
+                      for name in names},
+    }
+
+def save_suite(results, path):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(results, file, ensure_ascii=False, indent=2)
+
+def load_suite(path):
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+def compare_suites(baseline, current, threshold=REGRESSION_THRESHOLD):
+    """Сравнивает два результата набора по общим сценариям и показателям.
+
+    Возвращает список (сценарий, показатель, было, стало, изменение, регрессия), где
+    изменение - относительное, со знаком «+» для улучшения, а регрессия - ухудшение
+    больше threshold и больше шума замера показателя.
+    """
+    rows = []
+    for name, old in baseline["scenarios"].items():
+        new = current["scenarios"].get(name)
+        if new is None:
+            continue
+        for metric, (direction, noise) in SUITE_METRICS.items():
+            before, after = old.get(metric), new.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before * direction
+            rows.append((name, metric, before, after, change, change < -threshold and abs(after - before) > noise))
+    return rows
+
+def positive_int(text):
+    """Тип аргумента командной строки: целое число не меньше 1."""
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"нужно целое число не меньше 1: {text}")
+    return value
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Замеры производительности симуляции.")
+    commands = parser.add_subparsers(dest="command")
+
+    memory = commands.add_parser("memory", help="память на одну особь каждого вида")
+    memory.add_argument("--count", type=int, default=10000, help="число особей в замере памяти")
+    memory.add_argument("--backend", choices=["numpy"], default=None,
+                        help="векторизованный бэкенд для больших миров (с тем же зерном дает другой прогон)")
+
+    lod = commands.add_parser("lod", help="сравнение статистики прогонов с LOD и с полной детализацией")
+    lod.add_argument("--budget", type=float, default=LOD_ERROR_BUDGET,
+                     help="наибольший шаг поведения далекой особи, с")
+    lod.add_argument("--seeds", type=int, default=5, help="число зерен")
+    lod.add_argument("--ticks", type=int, default=20000, help="число тиков каждого прогона")
+    lod.add_argument("--width", type=int, default=WIDTH * 4, help="ширина карты")
+    lod.add_argument("--height", type=int, default=HEIGHT * 4, help="высота карты")
+    lod.add_argument("--backend", choices=["numpy"], default=None,
+                     help="векторизованный бэкенд для больших миров (с тем же зерном дает другой прогон)")
+    lod.add_argument("--herbivores", type=int, default=INITIAL_HERBIVORE_COUNT, help="начальное число травоядных")
+    lod.add_argument("--predators", type=int, default=INITIAL_PREDATOR_COUNT, help="начальное число хищников")
+    lod.add_argument("--food", type=int, default=INITIAL_FOOD_COUNT, help="начальное количество еды")
+    steering = commands.add_parser("steering", help="выделения памяти за тик в движении и избегании")
+    steering.add_argument("--scenario", choices=list(SUITE_SCENARIOS), default="1k", help="сценарий набора")
+    steering.add_argument("--ticks", type=int, default=600, help="число замеряемых тиков")
+    steering.add_argument("--seed", type=int, default=SUITE_SEED, help="зерно генератора случайных чисел")
+    backends = commands.add_parser("backends", help="скорость тика обычного и векторизованного бэкенда")
+    backends.add_argument("--scenario", choices=list(SUITE_SCENARIOS), default="10k", help="сценарий набора")
+    backends.add_argument("--ticks", type=int, default=60, help="число замеряемых тиков")
+    backends.add_argument("--seed", type=int, default=SUITE_SEED, help="зерно генератора случайных чисел")
+    suite = commands.add_parser("suite", help="набор замеров по сценариям с сохранением в JSON")
+    suite.add_argument("--scenarios", nargs="+", choices=list(SUITE_SCENARIOS), default=list(SUITE_SCENARIOS),
+                       help="сценарии набора")
+    suite.add_argument("--seed", type=int, default=SUITE_SEED, help="зерно генератора случайных чисел")
+    suite.add_argument("--no-render", action="store_true", help="не замерять отрисовку")
+    suite.add_argument("--output", default="bench.json", help="файл результатов (JSON)")
+
+    compare = commands.add_parser("compare", help="сравнение двух результатов набора и поиск регрессий")
+    compare.add_argument("baseline", help="файл результатов до изменения")
+    compare.add_argument("current", help="файл результатов после изменения")
+    compare.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                         help="допустимое относительное ухудшение показателя")
+
+    scaling = commands.add_parser("scaling", help="масштабирование многоядерного тика по числу процессов")
+    scaling.add_argument("--agents", type=int, default=SCALING_AGENTS, help="число особей")
+    scaling.add_argument("--max-workers", type=positive_int, default=multiprocessing.cpu_count(),
+                         help="наибольшее число процессов (не меньше 1)")
+    scaling.add_argument("--tiles", type=int, default=None,
+                         help="число полос карты (по умолчанию не меньше --max-workers)")
+    scaling.add_argument("--ticks", type=int, default=20, help="число замеряемых тиков")
+    scaling.add_argument("--estimate", type=positive_int, default=None, metavar="ЯДРА",
+                         help="оценить скорость на 1..ЯДРА ядрах по замерам тайлов в одном процессе")
+    scaling.add_argument("--width", type=int, default=WIDTH * 50, help="ширина карты")
+    scaling.add_argument("--height", type=int, default=HEIGHT * 50, help="высота карты")
+    args = parser.parse_args()
+
+    if args.command == "steering":
+        result = steering_run(args.ticks, args.scenario, args.seed)
+        print(f"Векторов за тик: {result['vectors_per_tick']:.1f}, пик выделений за тик: "
+              f"{result['peak_bytes_per_tick'] / 1024:.1f} КиБ ({result['peak_bytes_per_agent']:.0f} Б на особь), "
+              f"прирост блоков за тик: {result['blocks_per_tick']:.1f}, {result['ticks_per_second']:.1f} тиков/с")
+    elif args.command == "backends":
+        results = compare_backends(args.scenario, args.ticks, args.seed)
+        print(f"{'бэкенд':<12}{'LOD':>6}{'тиков/с':>10}")
+        for (backend, lod), rate in results.items():
+            print(f"{backend or 'обычный':<12}{'да' if lod else 'нет':>6}{rate:>10.1f}")
+    elif args.command == "suite":
+        results = run_suite(args.scenarios, args.seed, not args.no_render)
+        save_suite(results, args.output)
+        print(f"{'сценарий':<10}{'особей':>8}{'тиков/с':>10}{'p95 тика, мс':>14}{'кадр, мс':>10}"
+              f"{'пик, МБ':>10}{'запуск, с':>11}")
+        for name, result in results["scenarios"].items():
+            render = f"{result['render_ms']:>10.2f}" if result["render_ms"] is not None else f"{'-':>10}"
+            print(f"{name:<10}{result['agents']:>8}{result['ticks_per_second']:>10.2f}{result['tick_p95_ms']:>14.2f}"
+                  f"{render}{result['peak_memory_mb']:>10.1f}{result['startup_seconds']:>11.2f}")
+        print(f"Результаты записаны в {args.output}")
+    elif args.command == "compare":
+        rows = compare_suites(load_suite(args.baseline), load_suite(args.current), args.threshold)
+        print(f"{'сценарий':<10}{'показатель':<18}{'было':>12}{'стало':>12}{'изменение':>11}")
+        for name, metric, before, after, change, regression in rows:
+            mark = "  РЕГРЕССИЯ" if regression else ""
+            print(f"{name:<10}{metric:<18}{before:>12.3f}{after:>12.3f}{change:>+10.1%}{mark}")
+        regressions = sum(row[-1] for row in rows)
+        print(f"Регрессий: {regressions}")
+        sys.exit(1 if regressions else 0)
+    elif args.command == "scaling":
+        from parallel import PARALLEL_TILES
+
+        tiles = args.tiles or max(PARALLEL_TILES, args.max_workers)
+        results = compare_scaling(args.max_workers, tiles, agents=args.agents, ticks=args.ticks,
+                                  width=args.width, height=args.height)
+        single = results[1]
+        print(f"Ядер: {multiprocessing.cpu_count()}")
+        print(f"{'процессы':<12}{'тиков/с':>10}{'ускорение':>12}{'эффективность':>15}")
+        for workers, rate in results.items():
+            if workers is None:
+                print(f"{'без тайлов':<12}{rate:>10.2f}")
+            else:
+                print(f"{workers:<12}{rate:>10.2f}{rate / single:>11.2f}x{rate / single / workers:>14.0%}")
+        if args.estimate:
+            serial = results[None]
+            estimate = scaling_estimate(args.estimate, tiles, agents=args.agents, ticks=args.ticks,
+                                        width=args.width, height=args.height)
+            print("Оценка по замерам тайлов в одном процессе (ускорение - относительно тика без тайлов):")
+            print(f"{'ядра':<12}{'тиков/с':>10}{'ускорение':>12}")
+            for workers, rate in estimate.items():
+                print(f"{workers:<12}{rate:>10.2f}{rate / serial:>11.2f}x")
+    elif args.command == "lod":
+        results = compare_lod(range(args.seeds), args.budget, ticks=args.ticks, width=args.width,
+                              height=args.height, backend=args.backend, herbivores=args.herbivores,
+                              predators=args.predators, food=args.food)
+        print(f"{'показатель':<20}{'полная':>12}{'LOD':>12}{'разница':>10}")
+        for name, (exact, coarse) in results.items():
+            change = (coarse - exact) / exact * 100 if exact else 0.0
+            print(f"{name:<20}{exact:>12.2f}{coarse:>12.2f}{change:>9.1f}%")
+    else:
+        count = getattr(args, "count", 10000)
+        backend = getattr(args, "backend", None)
+        for species in SPECIES:
+            print(f"{species}: {bytes_per_agent(species, count, backend):.0f} байт на особь")
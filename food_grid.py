@@ -0,0 +1,121 @@
+"""Еда в виде сетки биомассы NumPy вместо отдельных объектов Food.
+
+Карта покрывается клетками, в каждой хранится количество травы в порциях (одна
+порция насыщает как одна еда). Трава отрастает пакетно для всей сетки, от уже
+растущей травы и от соседних клеток, травоядные ищут ближайшую клетку с травой
+просмотром окна вокруг себя и съедают траву клетки, в которую пришли. Поэтому
+поиск и отрисовка еды не зависят от ее количества.
+"""
+import math
+
+import numpy as np
+
+from simulation import (FOOD_GRID_CELL_SIZE, FOOD_GRID_CAPACITY, FOOD_GRID_REGROWTH_RATE, FOOD_GRID_SPREAD,
+                        FOOD_GRID_REGROW_INTERVAL)
+
+class FoodGrid:
+    """Биомасса травы по клеткам карты (тор, как и сама карта)."""
+    def __init__(self, map_obj, cell_size=FOOD_GRID_CELL_SIZE, capacity=FOOD_GRID_CAPACITY,
+                 regrowth_rate=FOOD_GRID_REGROWTH_RATE, spread=FOOD_GRID_SPREAD,
+                 regrow_interval=FOOD_GRID_REGROW_INTERVAL):
+        self.cols = max(1, int(map_obj.width // cell_size))
+        self.rows = max(1, int(map_obj.height // cell_size))
+        # Клетки растягиваются, чтобы сетка ровно покрывала карту.
+        self.cell_width = map_obj.width / self.cols
+        self.cell_height = map_obj.height / self.rows
+        self.capacity = capacity
+        self.regrowth_rate = regrowth_rate
+        self.spread = spread
+        self.regrow_interval = regrow_interval
+        self.biomass = np.zeros((self.rows, self.cols), dtype=np.float64)
+        self.elapsed = 0.0
+        # Меняется, когда сетку нужно перерисовать (после отрастания и добавления травы).
+        self.version = 0
+        self.windows = {}
+
+    def cell_of(self, x, y):
+        return int(x // self.cell_width) % self.cols, int(y // self.cell_height) % self.rows
+
+    def center(self, col, row):
+        return (col + 0.5) * self.cell_width, (row + 0.5) * self.cell_height
+
+    def total(self):
+        """Вся трава сетки в порциях."""
+        return float(self.biomass.sum())
+
+    def add(self, x, y, amount=1.0):
+        """Добавляет траву в клетку точки (x, y), не больше вместимости клетки."""
+        col, row = self.cell_of(x, y)
+        self.biomass[row, col] = min(self.capacity, self.biomass[row, col] + amount)
+        self.version += 1
+
+    def graze(self, x, y, amount):
+        """Съедает до amount травы в клетке точки (x, y) и возвращает съеденное.
+
+        Сетка перерисовывается при следующем отрастании, а не после каждого укуса.
+        """
+        col, row = self.cell_of(x, y)
+        eaten = min(amount, self.biomass[row, col])
+        self.biomass[row, col] -= eaten
+        return float(eaten)
+
+    def regrow(self, dt):
+        """Копит время и раз в regrow_interval секунд отращивает траву всей сетки.
+
+        Рост логистический: клетка растет от своей травы и доли spread травы
+        четырех соседей и замедляется у вместимости.
+        """
+        self.elapsed += dt
+        if self.elapsed < self.regrow_interval:
+            return
+        elapsed, self.elapsed = self.elapsed, 0.0
+        biomass = self.biomass
+        neighbours = (np.roll(biomass, 1, 0) + np.roll(biomass, -1, 0)
+                      + np.roll(biomass, 1, 1) + np.roll(biomass, -1, 1))
+        growth = biomass + neighbours * (self.spread / 4)
+        growth *= 1 - biomass / self.capacity
+        biomass += growth * (self.regrowth_rate * elapsed)
+        np.minimum(biomass, self.capacity, out=biomass)
+        self.version += 1
+
+    def state(self):
+        """Состояние сетки для снимка: параметры, накопленное время и биомасса в байтах."""
+        return {
+            'shape': (self.rows, self.cols),
+            'params': (self.capacity, self.regrowth_rate, self.spread, self.regrow_interval),
+            'elapsed': self.elapsed,
+            'biomass': self.biomass.tobytes(),
+        }
+
+    def restore(self, state):
+        """Восстанавливает сетку из state(); размер карты должен совпадать."""
+        if tuple(state['shape']) != (self.rows, self.cols):
+            raise ValueError(f"Размер сетки еды {state['shape']} не подходит к карте")
+        self.capacity, self.regrowth_rate, self.spread, self.regrow_interval = state['params']
+        self.elapsed = state['elapsed']
+        self.biomass[...] = np.frombuffer(state['biomass'], dtype=np.float64).reshape(self.rows, self.cols)
+        self.version += 1
+
+    def window(self, radius):
+        """Смещения клеток (по строкам и столбцам) в радиусе radius, от ближних к дальним."""
+        window = self.windows.get(radius)
+        if window is None:
+            reach_cols = min(self.cols // 2, int(math.ceil(radius / self.cell_width)))
+            reach_rows = min(self.rows // 2, int(math.ceil(radius / self.cell_height)))
+            rows, cols = np.mgrid[-reach_rows:reach_rows + 1, -reach_cols:reach_cols + 1]
+            distances = np.hypot(rows * self.cell_height, cols * self.cell_width).ravel()
+            inside = distances <= radius
+            order = np.argsort(distances[inside], kind='stable')
+            window = self.windows[radius] = (rows.ravel()[inside][order], cols.ravel()[inside][order])
+        return window
+
+    def nearest(self, x, y, radius, minimum):
+        """Центр ближайшей к (x, y) клетки в радиусе radius, где травы не меньше minimum, или None."""
+        col, row = self.cell_of(x, y)
+        rows, cols = self.window(radius)
+        values = self.biomass[(rows + row) % self.rows, (cols + col) % self.cols]
+        found = np.flatnonzero(values >= minimum)
+        if not len(found):
+            return None
+        first = found[0]
+        return self.center(int(col + cols[first]) % self.cols, int(row + rows[first]) % self.rows)
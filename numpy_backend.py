@@ -0,0 +1,452 @@
+"""Векторизованный бэкенд: состояние сущностей хранится в массивах NumPy по видам.
+
+Метаболизм, старение, сон, смерть и движение считаются пакетно для всего вида,
+а поведение (поиск целей, охота, размножение) по-прежнему работает с объектами
+сущностей через тонкие представления, читающие и пишущие те же массивы. Перед
+поведением бэкенд пакетно отмечает особей у воды и у краев карты, остальные
+пропускают эти проверки.
+
+Жизненные показатели всех особей считаются в начале тика, а движение - в его
+конце, тогда как обычный тик делает и то и другое в update каждой особи. Поэтому
+прогон с бэкендом воспроизводим по зерну, но идет иначе, чем обычный с тем же зерном.
+"""
+import numpy as np
+
+from simulation import Vector2
+
+# Изменяемое состояние особи; постоянные параметры вида берутся из атрибутов его класса.
+FIELDS = {
+    'x': np.float64,
+    'y': np.float64,
+    'vx': np.float64,
+    'vy': np.float64,
+    'speed': np.float64,
+    'hunger': np.float64,
+    'thirst': np.float64,
+    'health': np.float64,
+    'age': np.float64,
+    'sleep': np.float64,
+    'is_asleep': np.bool_,
+    'wake_up_delay': np.float64,
+    'is_escaping': np.bool_,
+    'reproduction_cooldown': np.float64,
+}
+
+class SpeciesStore:
+    """Непрерывные массивы состояния для всех особей одного вида."""
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self.size = 0
+        self.free = []
+        self.owners = [None] * capacity
+        self.alive = np.zeros(capacity, dtype=np.bool_)
+        self.skip = np.zeros(capacity, dtype=np.bool_)
+        self.moves = np.zeros(capacity, dtype=np.float64)
+        # Особи, у которых в этом тике может сработать избегание воды или краев карты (см. NumpyBackend.flag).
+        self.near_water = np.ones(capacity, dtype=np.bool_)
+        self.near_edge = np.ones(capacity, dtype=np.bool_)
+        self.columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in FIELDS.items()}
+
+    def allocate(self, owner):
+        """Выделяет слот под новую особь и возвращает его номер."""
+        if self.free:
+            slot = self.free.pop()
+        else:
+            if self.size == self.capacity:
+                self._grow()
+            slot = self.size
+            self.size += 1
+        self.occupy(slot, owner)
+        return slot
+
+    def occupy(self, slot, owner):
+        """Отдает слот slot особи owner."""
+        self.owners[slot] = owner
+        self.alive[slot] = True
+        self.skip[slot] = False
+        self.moves[slot] = 0
+        self.near_water[slot] = True
+        self.near_edge[slot] = True
+
+    def layout(self):
+        """Размещение особей по слотам: (число строк, свободные слоты, владелец каждой строки)."""
+        return self.size, list(self.free), self.owners[:self.size]
+
+    def reserve(self, size, free):
+        """Задает число строк и список свободных слотов, сохраненные layout()."""
+        while self.capacity < size:
+            self._grow()
+        self.size = size
+        self.free = list(free)
+
+    def release(self, slot):
+        """Освобождает слот и возвращает снимок его значений."""
+        row = {name: column[slot:slot + 1].copy() for name, column in self.columns.items()}
+        self.owners[slot] = None
+        self.alive[slot] = False
+        self.free.append(slot)
+        return row
+
+    def _grow(self):
+        capacity = self.capacity * 2
+        for name, column in self.columns.items():
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self.capacity] = column
+            self.columns[name] = grown
+        for name in ('alive', 'skip', 'moves', 'near_water', 'near_edge'):
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self.capacity] = column
+            setattr(self, name, grown)
+        self.owners.extend([None] * (capacity - self.capacity))
+        self.capacity = capacity
+
+class DetachedStore:
+    """Хранилище одной строки для удаленной особи, на которую еще ссылаются другие."""
+    def __init__(self, columns):
+        self.columns = columns
+
+class ArrayField:
+    """Дескриптор поля сущности, хранящегося в массиве вида."""
+    def __init__(self, name, kind):
+        self.name = name
+        self.kind = kind
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        return self.kind(obj._store.columns[self.name][obj._slot])
+
+    def __set__(self, obj, value):
+        obj._store.columns[self.name][obj._slot] = value
+
+class ArrayVector(Vector2):
+    """Вектор, компоненты которого лежат в массивах вида."""
+    __slots__ = ('owner', 'x_name', 'y_name')
+
+    def __init__(self, owner, x_name, y_name):
+        self.owner = owner
+        self.x_name = x_name
+        self.y_name = y_name
+
+    @property
+    def x(self):
+        return float(self.owner._store.columns[self.x_name][self.owner._slot])
+
+    @x.setter
+    def x(self, value):
+        self.owner._store.columns[self.x_name][self.owner._slot] = value
+
+    @property
+    def y(self):
+        return float(self.owner._store.columns[self.y_name][self.owner._slot])
+
+    @y.setter
+    def y(self, value):
+        self.owner._store.columns[self.y_name][self.owner._slot] = value
+
+class ArrayEntity:
+    """Примесь, переносящая состояние сущности в SpeciesStore своего вида."""
+    species_store = None
+    array_fields = ()
+
+    def __init__(self, *args, **kwargs):
+        self.attach()
+        super().__init__(*args, **kwargs)
+
+    def attach(self, store=None, slot=None):
+        """Привязывает особь к слоту массивов вида (или к отдельному хранилищу store).
+
+        slot - занять заданный слот массивов вида вместо выделения свободного.
+        """
+        if store is None:
+            self._store = self.species_store
+            if slot is None:
+                self._slot = self.species_store.allocate(self)
+            else:
+                self._slot = slot
+                self.species_store.occupy(slot, self)
+        else:
+            self._store = store
+            self._slot = 0
+        self._position = ArrayVector(self, 'x', 'y')
+        self._move_direction = ArrayVector(self, 'vx', 'vy')
+
+    @property
+    def position(self):
+        return self._position
+
+    @position.setter
+    def position(self, value):
+        self._position.x, self._position.y = value[0], value[1]
+
+    @property
+    def move_direction(self):
+        return self._move_direction
+
+    @move_direction.setter
+    def move_direction(self, value):
+        self._move_direction.x, self._move_direction.y = value[0], value[1]
+
+    @property
+    def x(self):
+        return float(self._store.columns['x'][self._slot])
+
+    @x.setter
+    def x(self, value):
+        self._store.columns['x'][self._slot] = value
+
+    @property
+    def y(self):
+        return float(self._store.columns['y'][self._slot])
+
+    @y.setter
+    def y(self, value):
+        self._store.columns['y'][self._slot] = value
+
+    def update_vitals(self, dt, ecosystem, is_day):
+        # Жизненные показатели уже обновлены пакетно в NumpyBackend.update_vitals.
+        if self._store is not self.species_store:
+            return False
+        return not self._store.skip[self._slot]
+
+    def update_cooldowns(self, dt):
+        pass
+
+    def move(self, dt):
+        if self._store is self.species_store:
+            self._store.moves[self._slot] += dt
+
+    def push(self, dx, dy, dt, factor=1):
+        # После сдвига отметки NumpyBackend.flag для особи больше не верны.
+        if self._store is self.species_store:
+            self._store.near_water[self._slot] = True
+            self._store.near_edge[self._slot] = True
+        super().push(dx, dy, dt, factor)
+
+    def avoid_water(self, dt, ecosystem):
+        if self._store is self.species_store and not self._store.near_water[self._slot]:
+            return
+        super().avoid_water(dt, ecosystem)
+
+    def avoid_edges(self, map_obj):
+        if self._store is self.species_store and not self._store.near_edge[self._slot]:
+            return None
+        return super().avoid_edges(map_obj)
+
+    def wrap(self, map_obj):
+        pass
+
+    def detach(self):
+        """Отвязывает удаленную особь от массивов, сохраняя ее последние значения."""
+        if self._store is self.species_store:
+            self._store = DetachedStore(self.species_store.release(self._slot))
+            self._slot = 0
+
+def _make_fields():
+    fields = {}
+    for name, dtype in FIELDS.items():
+        if name in ('x', 'y', 'vx', 'vy'):
+            continue
+        fields[name] = ArrayField(name, bool if dtype is np.bool_ else float)
+    return fields
+
+class NumpyBackend:
+    """Структура массивов для всех видов экосистемы и пакетный шаг симуляции."""
+    def __init__(self):
+        self.stores = {}
+        self.classes = {}
+        self.water_key = None
+        self.water_cells = None
+
+    def species_class(self, cls):
+        """Возвращает подкласс cls, хранящий состояние в массивах этого бэкенда."""
+        if issubclass(cls, ArrayEntity):
+            return cls
+        array_cls = self.classes.get(cls)
+        if array_cls is None:
+            store = SpeciesStore()
+            namespace = dict(_make_fields())
+            namespace['array_fields'] = tuple(namespace)
+            namespace['species_store'] = store
+            namespace['__module__'] = __name__
+            array_cls = type(f"Array{cls.__name__}", (ArrayEntity, cls), namespace)
+            self.classes[cls] = array_cls
+            self.stores[array_cls] = store
+        return array_cls
+
+    def release(self, entity):
+        if isinstance(entity, ArrayEntity):
+            entity.detach()
+
+    def layout(self, cls):
+        """Размещение особей вида cls в массивах (SpeciesStore.layout)."""
+        return cls.species_store.layout()
+
+    def reserve(self, cls, size, free):
+        """Восстанавливает число строк и свободные слоты массивов вида cls (SpeciesStore.reserve)."""
+        cls.species_store.reserve(size, free)
+
+    def restore(self, entities, columns, attached, slots=None):
+        """Привязывает особей, восстановленных из снимка, к массивам и заполняет их поля.
+
+        columns: {поле: список значений} для всех полей FIELDS; особи с attached=False
+        (мертвые, на которых еще ссылаются) получают отдельное хранилище.
+        slots - сохраненный слот каждой особи: с ними особи занимают прежние строки
+        массивов, и пакетный шаг обходит их в прежнем порядке.
+        """
+        taken = []
+        rows = []
+        for row, (entity, live) in enumerate(zip(entities, attached)):
+            if live:
+                entity.attach(slot=None if slots is None else slots[row])
+                taken.append(entity._slot)
+                rows.append(row)
+            else:
+                entity.attach(DetachedStore({name: np.array([columns[name][row]], dtype=dtype)
+                                             for name, dtype in FIELDS.items()}))
+        if taken:
+            store = entities[rows[0]].species_store
+            for name, values in columns.items():
+                store.columns[name][taken] = np.asarray(values, dtype=FIELDS[name])[rows]
+
+    def update_vitals(self, dt, is_day):
+        """Пакетно обновляет сон, возраст, метаболизм, здоровье и скорость.
+
+        Возвращает список особей, умерших в этом тике.
+        """
+        dead_entities = []
+        for cls, store in self.stores.items():
+            n = store.size
+            if n == 0:
+                continue
+            c = {name: column[:n] for name, column in store.columns.items()}
+            alive = store.alive[:n]
+            active = cls.schedule[is_day][0]
+
+            asleep = c['is_asleep']
+            sleep = c['sleep']
+            if not active:
+                asleep[alive] = True
+                sleep[alive] = 0
+                live = alive
+            else:
+                # Как в Entity.update_vitals: ждущие пробуждения не стареют, проснувшиеся сразу действуют.
+                delay = c['wake_up_delay']
+                waiting = alive & asleep & (delay > 0)
+                delay[waiting] -= dt
+                waking = alive & asleep & ~waiting
+                asleep[waking] = False
+                sleep[waking] = 0
+                live = alive & ~waiting
+
+            c['age'][live] += dt
+
+            sleeping = live & asleep
+            sleep[sleeping] += dt * 2
+            asleep[sleeping & (sleep >= cls.max_sleep)] = False
+
+            awake = live & ~sleeping
+            rate = dt if active else dt / 4
+            c['hunger'][awake] += cls.energy_loss_rate * rate
+            c['thirst'][awake] += cls.thirst_loss_rate * rate
+
+            starving = awake & ((c['hunger'] >= cls.max_hunger) | (c['thirst'] >= cls.max_thirst))
+            c['health'][starving] -= dt
+
+            # Виды без предельного возраста (max_age = None) от старости не умирают.
+            too_old = False if cls.max_age is None else c['age'] >= cls.max_age
+            dead = awake & (too_old | (c['health'] <= 0) | (c['thirst'] >= cls.max_thirst * 1.5))
+
+            hunger_factor = np.minimum(1, c['hunger'] / cls.max_hunger / 2)
+            speed = np.where(c['is_escaping'],
+                             cls.max_speed * cls.fleeing_speed_multiplier,
+                             cls.max_speed * (1 - hunger_factor))
+            c['speed'][awake] = speed[awake]
+
+            cooling = awake & (c['reproduction_cooldown'] > 0)
+            c['reproduction_cooldown'][cooling] -= dt
+
+            store.skip[:n] = ~awake | dead
+            dead_entities.extend(store.owners[slot] for slot in np.flatnonzero(dead))
+        return dead_entities
+
+    def flag(self, ecosystem):
+        """Отмечает особей, рядом с которыми есть вода или край карты, до их поведения в тике.
+
+        Отметки - надмножество особей, которых сдвинут avoid_water и avoid_edges: у
+        остальных ArrayEntity пропускает эти проверки. Положения особей до конца тика
+        меняет только push, и он снимает с особи оба отсева.
+        """
+        index = ecosystem.water_index
+        cells = self._water_cells(ecosystem)
+        # Край карты отталкивает особь ближе 1.5 * size + 20 (size - с тем же запасом, что у воды).
+        edge = 3 * ecosystem.max_entity_size + 20
+        width, height = ecosystem.map.width, ecosystem.map.height
+        for store in self.stores.values():
+            n = store.size
+            if n == 0:
+                continue
+            x, y = store.columns['x'][:n], store.columns['y'][:n]
+            store.near_water[:n] = cells[self._cells(index, x, y)]
+            store.near_edge[:n] = (x < edge) | (x > width - edge) | (y < edge) | (y > height - edge)
+
+    def _water_cells(self, ecosystem):
+        """Ячейки индекса воды, в которых особь может оказаться в зоне отталкивания водоема.
+
+        Зона берется квадратом с удвоенным наибольшим размером особи (детеныши немного
+        перерастают max_size) и пересчитывается, только когда меняются водоемы или этот размер.
+        """
+        key = (tuple(water.id for water in ecosystem.water_sources), ecosystem.max_entity_size)
+        if key != self.water_key:
+            index = ecosystem.water_index
+            cells = np.zeros((index.cols, index.rows), dtype=np.bool_)
+            for water in ecosystem.water_sources:
+                reach = water.size + 2 * ecosystem.max_entity_size + 10
+                cols = self._span(water.x, reach, index.cell_width, index.cols)
+                rows = self._span(water.y, reach, index.cell_height, index.rows)
+                cells[np.ix_(cols, rows)] = True
+            self.water_key = key
+            self.water_cells = cells.ravel()
+        return self.water_cells
+
+    @staticmethod
+    def _span(center, reach, cell, count):
+        """Номера ячеек оси длиной count, покрывающих отрезок [center - reach, center + reach] на торе."""
+        first = int((center - reach) // cell)
+        last = int((center + reach) // cell)
+        if last - first + 1 >= count:
+            return np.arange(count)
+        return np.arange(first, last + 1) % count
+
+    def integrate(self, dt, index_for):
+        """Пакетно сдвигает особей, вызвавших move(), и переносит всех через границы карты.
+
+        Возвращает особей, сменивших ячейку пространственного индекса своего вида index_for(cls).
+        """
+        moved = []
+        for cls, store in self.stores.items():
+            n = store.size
+            if n == 0:
+                continue
+            index = index_for(cls)
+            c = store.columns
+            alive = store.alive[:n]
+            x, y = c['x'][:n], c['y'][:n]
+            old_cells = self._cells(index, x, y)
+            # moves - время движения за тик; при редком обновлении (LOD) оно кратно dt.
+            step = c['speed'][:n] * dt * np.rint(store.moves[:n] / dt)
+            x += c['vx'][:n] * step
+            y += c['vy'][:n] * step
+            x[alive] %= index.map.width
+            y[alive] %= index.map.height
+            store.moves[:n] = 0
+            changed = alive & (self._cells(index, x, y) != old_cells)
+            moved.extend(store.owners[slot] for slot in np.flatnonzero(changed))
+        return moved
+
+    @staticmethod
+    def _cells(index, x, y):
+        cx = (x // index.cell_width).astype(np.int64) % index.cols
+        cy = (y // index.cell_height).astype(np.int64) % index.rows
+        return cx * index.rows + cy
@@ -0,0 +1,734 @@
+"""Многоядерный тик: карта делится на вертикальные полосы (тайлы), которые ведут процессы-работники.
+
+Каждый тайл - отдельная экосистема (TileEcosystem) со своими особями и едой и
+с копиями-призраками особей и еды соседних тайлов в полосе шириной halo у
+своих границ, поэтому поиск целей, охота и размножение видят соседей через
+границу. Призраки не обновляются; все, что особь делает с призраком
+(убийство, поедание еды, изменение полей партнера при размножении),
+записывается намерением и применяется хозяином объекта в фазе слияния.
+Съевшая призрака особь насыщается, только если хозяин жертвы принял ее
+намерение: он отвечает намерением feed, которое доходит до тайла съевшего
+со следующим обменом.
+
+Тик состоит из шага всех тайлов параллельно и обмена: ушедшие за границу
+особи переезжают к соседу вместе со всем состоянием, намерения адресуются
+текущему хозяину объекта, а полосы призраков обновляются. Слияние применяет
+переезды, изменения полей, затем убийства и поедание в порядке (вид намерения,
+id объекта, тайл-источник): из нескольких убийств одной жертвы за тик
+срабатывает первое, остальные игнорируются (их особи не насыщаются). Итог зависит от зерна и числа
+тайлов, но не от числа процессов, на которые они распределены.
+"""
+import multiprocessing
+import traceback
+from collections import deque
+from operator import attrgetter
+
+from simulation import (FIXED_DT, SPECIES, EatingCross, Ecosystem, Food, Vector2, Water,
+                        append_indexed, configure_species, slot_names, species_config, species_key, swap_remove)
+
+PARALLEL_TILES = 8
+# Ширина полосы призраков у границ тайла: не меньше дальности, на которой особи замечают друг друга.
+PARALLEL_HALO = 200
+
+VECTOR_FIELDS = ('position', 'move_direction')
+CROSS_FIELDS = ('eating_cross', 'eating_crosses')
+# Поля призрака, изменения которых не отправляются хозяину: ссылки у призраков не восстанавливаются.
+UNTOUCHED_FIELDS = ('id', 'target') + CROSS_FIELDS
+INTENT_ORDER = {'touch': 0, 'kill': 1, 'eat': 1, 'feed': 2}
+
+# Виды полей строки: обычное значение, вектор, цель, крестик и очередь крестиков хищника.
+VALUE, VECTOR, TARGET, CROSS, CROSSES = range(5)
+
+_layouts = {}
+
+def layout(cls):
+    """Поля особи вида cls, передаваемые между тайлами (id, публичные слоты и цель), их виды и геттер."""
+    key = species_key(cls)
+    result = _layouts.get(key)
+    if result is None:
+        names = [name for name in slot_names(key) if not name.startswith('_') and name != 'id']
+        fields = ('id',) + tuple(names) + ('target',)
+        kinds = tuple(VECTOR if name in VECTOR_FIELDS else TARGET if name == 'target'
+                      else CROSS if name == 'eating_cross' else CROSSES if name == 'eating_crosses' else VALUE
+                      for name in fields)
+        special = tuple((i, kind) for i, kind in enumerate(kinds) if kind != VALUE)
+        result = _layouts[key] = (fields, kinds, attrgetter(*fields), special)
+    return result
+
+def pack_entity(entity):
+    """Строка состояния особи: значения полей layout, ссылки заменены на id или номера крестиков."""
+    _, _, getter, special = layout(type(entity))
+    row = list(getter(entity))
+    crosses = getattr(entity, 'eating_crosses', None)
+    for i, kind in special:
+        value = row[i]
+        if value is None:
+            continue
+        if kind == VECTOR:
+            row[i] = (value.x, value.y)
+        elif kind == TARGET:
+            if type(value) is not tuple:
+                obj_id = getattr(value, 'id', None)
+                if obj_id is None:
+                    # Крестик хищника записывается отрицательным номером в его очереди крестиков.
+                    obj_id = -1 - crosses.index(value) if crosses and value in crosses else None
+                row[i] = obj_id
+        elif kind == CROSS:
+            row[i] = crosses.index(value) if crosses and value in crosses else None
+        else:
+            row[i] = [(cross.x, cross.y, cross.hunger, cross.timer) for cross in value]
+    return tuple(row)
+
+def unpack_entity(entity, row):
+    """Заполняет особь значениями строки pack_entity; возвращает неразрешенные (цель, номер крестика)."""
+    fields, kinds, _, _ = layout(type(entity))
+    target = cross = None
+    for name, kind, value in zip(fields, kinds, row):
+        if kind == VALUE:
+            pass
+        elif kind == VECTOR:
+            value = Vector2(*value)
+        elif kind == TARGET:
+            target = value
+            continue
+        elif kind == CROSS:
+            cross, value = value, None
+        elif value is not None:
+            crosses = deque(maxlen=entity.EATING_CROSS_MEMORY)
+            for x, y, hunger, timer in value:
+                eating_cross = EatingCross(x, y)
+                eating_cross.hunger = hunger
+                eating_cross.timer = timer
+                crosses.append(eating_cross)
+            value = crosses
+        setattr(entity, name, value)
+    return target, cross
+
+def link_entity(ecosystem, entity, target, cross):
+    """Разрешает ссылки строки в объекты экосистемы; цель, которой здесь нет, сбрасывается."""
+    crosses = getattr(entity, 'eating_crosses', None)
+    if cross is not None:
+        entity.eating_cross = crosses[cross] if crosses and cross < len(crosses) else None
+    if target is not None and type(target) is not tuple:
+        if target < 0:
+            target = crosses[-1 - target] if crosses and -1 - target < len(crosses) else None
+        else:
+            target = ecosystem.by_id.get(target)
+            if target is not None and not target.alive:
+                target = None
+        if target is None:
+            entity.decision_tick = None
+    entity.target = target
+
+def new_entity(ecosystem, name):
+    """Пустая особь вида name этой экосистемы (без вызова __init__)."""
+    cls = ecosystem.species_class(SPECIES[name])
+    entity = cls.__new__(cls)
+    for field in slot_names(cls):
+        if field.startswith('_'):
+            setattr(entity, field, None)
+    return entity
+
+def adopt_entity(ecosystem, entity, listed=True):
+    """Добавляет особь с уже выданным id в индексы экосистемы (и в список entities, если listed)."""
+    ecosystem.by_id[entity.id] = entity
+    key = species_key(type(entity))
+    ecosystem.species_index(key).insert(entity)
+    ecosystem.species_members.setdefault(key, {})[entity] = None
+    ecosystem.max_entity_size = max(ecosystem.max_entity_size, entity.size, entity.max_size)
+    if listed:
+        append_indexed(ecosystem.entities, entity)
+
+def adopt_resource(ecosystem, obj_id, x, y, listed=True):
+    """Добавляет еду с заданным id (в список resources, если listed)."""
+    food = Food(x, y)
+    food.id = obj_id
+    food.alive = True
+    ecosystem.by_id[obj_id] = food
+    ecosystem.resource_index.insert(food)
+    if listed:
+        append_indexed(ecosystem.resources, food)
+    ecosystem.static_version += 1
+    return food
+
+def adopt_water(ecosystem, obj_id, x, y, size):
+    water = Water(x, y, size)
+    water.id = obj_id
+    water.alive = True
+    ecosystem.by_id[obj_id] = water
+    ecosystem.max_water_size = max(ecosystem.max_water_size, size)
+    append_indexed(ecosystem.water_sources, water)
+    ecosystem.water_index.insert(water)
+
+def world_setup(ecosystem):
+    """Общие для всех тайлов параметры экосистемы: карта, часы, смена дня и ночи, виды, вода."""
+    cycle = ecosystem.day_night_cycle
+    return {
+        'map': (ecosystem.map.width, ecosystem.map.height),
+        'clock': (ecosystem.time, ecosystem.tick),
+        'day_night': (cycle.day_length, cycle.night_length, cycle.transition_duration,
+                      cycle.timer, cycle.time_scale),
+        'species': species_config(),
+        'species_params': {key.__name__: params for key, params in ecosystem.species_params.items()},
+        'food_spawn_probability': ecosystem.food_spawn_probability,
+        'water': [(water.id, water.x, water.y, water.size) for water in ecosystem.water_sources],
+    }
+
+def build_ecosystem(setup, cls=Ecosystem, **options):
+    """Экосистема класса cls с параметрами world_setup (без особей и еды)."""
+    width, height = setup['map']
+    day_length, night_length, transition_duration, timer, time_scale = setup['day_night']
+    # Процесс-работник, запущенный не через fork, не видит видов, загруженных в главном процессе.
+    configure_species(setup['species'])
+    ecosystem = cls(width, height, day_length=day_length, night_length=night_length,
+                    species_params={SPECIES[name]: params for name, params in setup['species_params'].items()},
+                    **options)
+    cycle = ecosystem.day_night_cycle
+    cycle.transition_duration = transition_duration
+    cycle.cycle_duration = day_length + night_length + 2 * transition_duration
+    cycle.timer = timer
+    cycle.time_scale = time_scale
+    ecosystem.time, ecosystem.tick = setup['clock']
+    ecosystem.food_spawn_probability = setup['food_spawn_probability']
+    for obj_id, x, y, size in setup['water']:
+        adopt_water(ecosystem, obj_id, x, y, size)
+    return ecosystem
+
+class TileEcosystem(Ecosystem):
+    """Экосистема одной полосы карты [left, right): свои особи и еда плюс призраки соседей."""
+    def __init__(self, map_width, map_height, index=0, tiles=1, halo=PARALLEL_HALO, **options):
+        super().__init__(map_width, map_height, **options)
+        self.index = index
+        self.tiles = tiles
+        self.halo = halo
+        self.tile_width = map_width / tiles
+        self.left = index * self.tile_width
+        self.right = (index + 1) * self.tile_width
+        self.ghosts = {}
+        self.ghost_rows = {}
+        self.ghost_counts = {}
+        self.ghost_food = {}
+        # Тайл-хозяин каждого призрака: ему отправляются намерения.
+        self.homes = {}
+        self.intents = []
+        # Объекты, убитые или съеденные здесь как призраки: до ближайшего слияния они не возвращаются.
+        self.removed = set()
+        # Насыщение (id съевшего, meal, x, y) для намерения, которое создает текущий consume.
+        self.meal = None
+        self.totals = {}
+        self.start_counts = {}
+
+    @classmethod
+    def from_setup(cls, setup):
+        """Тайл из словаря, собранного TiledEcosystem: параметры мира, свои особи и еда."""
+        tile = build_ecosystem(setup['world'], cls, index=setup['index'], tiles=setup['tiles'],
+                               halo=setup['halo'], seed=setup['seed'])
+        tile.food_spawn_probability = setup['world']['food_spawn_probability'] / setup['tiles']
+        # Идентификаторы тайлов не пересекаются: каждый выдает числа со своим остатком по модулю числа тайлов.
+        tile.next_id = setup['next_id'] + setup['index']
+        tile.totals = dict(setup['totals'])
+        arrivals = []
+        for name, row in setup['entities']:
+            entity = new_entity(tile, name)
+            arrivals.append((entity, unpack_entity(entity, row)))
+            adopt_entity(tile, entity)
+        for obj_id, x, y in setup['food']:
+            adopt_resource(tile, obj_id, x, y)
+        for entity, refs in arrivals:
+            link_entity(tile, entity, *refs)
+        tile.start_counts = tile.owned_counts()
+        return tile
+
+    def register(self, obj):
+        obj.id = self.next_id
+        self.next_id += self.tiles
+        obj.alive = True
+        self.by_id[obj.id] = obj
+
+    def tile_of(self, x):
+        return min(self.tiles - 1, int(x % self.map.width // self.tile_width))
+
+    def owned_counts(self):
+        return {key.__name__: len(members) - self.ghost_counts.get(key, 0)
+                for key, members in self.species_members.items()}
+
+    def count(self, cls):
+        """Численность вида во всем мире: итог прошлого обмена плюс изменения этого тайла с тех пор."""
+        key = species_key(cls)
+        owned = len(self.species_members.get(key, ())) - self.ghost_counts.get(key, 0)
+        return self.totals.get(key.__name__, 0) + owned - self.start_counts.get(key.__name__, 0)
+
+    def spawn_food(self):
+        """Добавляет еду в случайную точку своей полосы."""
+        x = self.rng.uniform(self.left, self.right)
+        y = self.rng.randint(0, self.map.height)
+        food = Food(x, y)
+        self.add_resource(food)
+        return food
+
+    def consume(self, eater, victim, meal):
+        """Жертва-призрак убирается здесь сразу, а насыщение ждет решения ее хозяина (намерение feed)."""
+        if victim.id not in self.ghosts and victim.id not in self.ghost_food:
+            super().consume(eater, victim, meal)
+            return
+        self.meal = (eater.id, meal, victim.x, victim.y)
+        if isinstance(victim, Food):
+            self.remove_resource(victim)
+        else:
+            victim.die(self)
+        self.meal = None
+
+    def remove_entity(self, entity, cause=None):
+        if entity.alive and entity.id in self.ghosts:
+            self.intents.append(('kill', entity.id, self.homes[entity.id], self.meal))
+            self.removed.add(entity.id)
+            self.forget_ghost(entity)
+        super().remove_entity(entity, cause)
+
+    def remove_resource(self, resource):
+        if resource.alive and resource.id in self.ghost_food:
+            self.intents.append(('eat', resource.id, self.homes[resource.id], self.meal))
+            self.removed.add(resource.id)
+            self.drop_food(resource)
+            return
+        super().remove_resource(resource)
+
+    def add_ghost(self, entity, home):
+        self.ghosts[entity.id] = entity
+        self.homes[entity.id] = home
+        key = species_key(type(entity))
+        self.ghost_counts[key] = self.ghost_counts.get(key, 0) + 1
+
+    def forget_ghost(self, entity):
+        """Перестает считать особь призраком (она остается в индексах)."""
+        del self.ghosts[entity.id]
+        del self.homes[entity.id]
+        self.ghost_rows.pop(entity.id, None)
+        self.ghost_counts[species_key(type(entity))] -= 1
+
+    def drop_ghost(self, entity):
+        """Убирает призрак, ушедший из полосы соседа; особи, шедшие к нему, теряют цель."""
+        self.forget_ghost(entity)
+        Ecosystem.remove_entity(self, entity)
+
+    def drop_food(self, food):
+        food.alive = False
+        self.notify_removed(food)
+        del self.ghost_food[food.id]
+        del self.homes[food.id]
+        del self.by_id[food.id]
+        self.resource_index.remove(food)
+        self.static_version += 1
+
+    def release(self, entity, home):
+        """Превращает ушедшую к соседу особь в призрак: ее состояние уже упаковано для переезда."""
+        swap_remove(self.entities, entity)
+        entity._index = None
+        entity.target = None
+        if getattr(entity, 'eating_crosses', None) is not None:
+            entity.eating_cross = None
+            entity.eating_crosses = None
+        self.add_ghost(entity, home)
+        self.ghost_rows[entity.id] = pack_entity(entity)
+
+    def touches(self):
+        """Намерения изменить поля призраков, которые особи этого тайла поменяли за тик."""
+        intents = []
+        for obj_id, ghost in self.ghosts.items():
+            baseline = self.ghost_rows[obj_id]
+            row = pack_entity(ghost)
+            changes = {}
+            if row != baseline:
+                changes = {name: value for name, value, old in zip(layout(type(ghost))[0], row, baseline)
+                           if value != old and name not in UNTOUCHED_FIELDS}
+            if ghost.target is not None and type(ghost.target) is tuple:
+                changes['target'] = ghost.target
+                ghost.target = None
+            if changes:
+                intents.append(('touch', obj_id, self.homes[obj_id], changes))
+                self.ghost_rows[obj_id] = row
+        return intents
+
+    def exchange(self):
+        """Собирает исходящие данные тайла после шага: переезды, намерения, полосы призраков, численность."""
+        intents = self.touches() + self.intents
+        self.intents = []
+        migrations = []
+        halo = {}
+        if self.tiles > 1:
+            before = (self.index - 1) % self.tiles
+            after = (self.index + 1) % self.tiles
+            for entity in list(self.entities):
+                x = entity.x % self.map.width
+                home = self.tile_of(x)
+                name = species_key(type(entity)).__name__
+                if home != self.index:
+                    migrations.append((home, name, pack_entity(entity)))
+                    self.release(entity, home)
+                    continue
+                row = None
+                if x - self.left < self.halo:
+                    row = pack_entity(entity)
+                    halo.setdefault(before, {'entities': [], 'food': []})['entities'].append((name, row))
+                if self.right - x <= self.halo:
+                    row = row or pack_entity(entity)
+                    halo.setdefault(after, {'entities': [], 'food': []})['entities'].append((name, row))
+            height = self.map.height
+            for neighbour, rect in ((before, (self.left, 0, self.left + self.halo, height)),
+                                    (after, (self.right - self.halo, 0, self.right, height))):
+                rows = [(food.id, food.x, food.y) for food in self.resource_index.query_rect(*rect)
+                        if food.id not in self.ghost_food]
+                halo.setdefault(neighbour, {'entities': [], 'food': []})['food'].extend(rows)
+        return {
+            'migrations': migrations,
+            'intents': intents,
+            'halo': halo,
+            'counts': self.owned_counts(),
+            'food': len(self.resources),
+        }
+
+    def merge(self, inbox):
+        """Применяет входящие данные обмена: переезды, намерения, полосы призраков и общую численность."""
+        arrivals = []
+        for name, row in sorted(inbox['migrations'], key=lambda migration: migration[1][0]):
+            entity = self.ghosts.get(row[0])
+            if entity is not None:
+                self.forget_ghost(entity)
+                refs = unpack_entity(entity, row)
+                self.relocate_entity(entity)
+                append_indexed(self.entities, entity)
+            else:
+                entity = new_entity(self, name)
+                refs = unpack_entity(entity, row)
+                adopt_entity(self, entity)
+            arrivals.append((entity, refs))
+        for entity, refs in arrivals:
+            link_entity(self, entity, *refs)
+
+        intents = sorted(inbox['intents'], key=lambda intent: (INTENT_ORDER[intent[0]], intent[1], intent[2]))
+        for kind, obj_id, source, value in intents:
+            obj = self.by_id.get(obj_id)
+            if kind == 'feed' and obj_id in self.ghosts:
+                # Съевший успел переехать: насыщение уходит его новому хозяину.
+                self.intents.append((kind, obj_id, self.homes[obj_id], value))
+                continue
+            if obj is None or not obj.alive or obj_id in self.ghosts or obj_id in self.ghost_food:
+                continue
+            if kind == 'touch':
+                for name, field_value in value.items():
+                    setattr(obj, name, Vector2(*field_value) if name in VECTOR_FIELDS else field_value)
+            elif kind == 'feed':
+                obj.feed(*value)
+            else:
+                if kind == 'kill':
+                    self.remove_entity(obj, 'predation')
+                else:
+                    self.remove_resource(obj)
+                if value is not None:
+                    eater_id, meal, x, y = value
+                    self.intents.append(('feed', eater_id, source, (meal, x, y)))
+
+        self.refresh_ghosts(inbox['halo'])
+        self.removed.clear()
+        self.totals = inbox['totals']
+        self.start_counts = self.owned_counts()
+
+    def refresh_ghosts(self, halos):
+        """Обновляет призраков по полосам соседей; пропавшие из полос убираются."""
+        seen = set()
+        seen_food = set()
+        for source, halo in halos:
+            for name, row in halo['entities']:
+                obj_id = row[0]
+                if obj_id in self.removed:
+                    continue
+                ghost = self.ghosts.get(obj_id)
+                if ghost is None:
+                    if obj_id in self.by_id:
+                        continue
+                    ghost = new_entity(self, name)
+                    unpack_entity(ghost, row)
+                    adopt_entity(self, ghost, listed=False)
+                    self.add_ghost(ghost, source)
+                elif self.ghost_rows.get(obj_id) != row:
+                    unpack_entity(ghost, row)
+                    if getattr(ghost, 'eating_crosses', None) is not None:
+                        ghost.eating_crosses = None
+                    self.relocate_entity(ghost)
+                    self.homes[obj_id] = source
+                self.ghost_rows[obj_id] = row
+                seen.add(obj_id)
+            for obj_id, x, y in halo['food']:
+                if obj_id in self.removed or obj_id in seen_food:
+                    continue
+                seen_food.add(obj_id)
+                if obj_id not in self.ghost_food:
+                    self.ghost_food[obj_id] = adopt_resource(self, obj_id, x, y, listed=False)
+                    self.homes[obj_id] = source
+        for obj_id in [obj_id for obj_id in self.ghosts if obj_id not in seen]:
+            self.drop_ghost(self.ghosts[obj_id])
+        for obj_id in [obj_id for obj_id in self.ghost_food if obj_id not in seen_food]:
+            self.drop_food(self.ghost_food[obj_id])
+
+    def dump(self):
+        """Свои особи и еда тайла и еще не отправленные насыщения для сборки общей экосистемы."""
+        return {
+            'entities': [(species_key(type(entity)).__name__, pack_entity(entity)) for entity in self.entities],
+            'food': [(food.id, food.x, food.y) for food in self.resources],
+            'feeds': [(obj_id, value) for kind, obj_id, _, value in self.intents if kind == 'feed'],
+            'next_id': self.next_id,
+            'day_night': (self.day_night_cycle.timer, self.day_night_cycle.time_scale),
+            'rng': self.rng.getstate(),
+        }
+
+def handle(tiles, command, payload):
+    """Выполняет команду координатора над тайлами работника и возвращает ответ."""
+    if command == 'init':
+        for setup in payload:
+            tiles[setup['index']] = TileEcosystem.from_setup(setup)
+        return {index: tile.exchange() for index, tile in tiles.items()}
+    if command == 'step':
+        dt, inboxes = payload
+        outboxes = {}
+        for index in sorted(inboxes):
+            tile = tiles[index]
+            tile.merge(inboxes[index])
+            tile.step(dt)
+            outboxes[index] = tile.exchange()
+        return outboxes
+    if command == 'gather':
+        for index in sorted(payload):
+            tiles[index].merge(payload[index])
+        return {index: tile.dump() for index, tile in tiles.items()}
+    raise ValueError(f"Неизвестная команда: {command}")
+
+def worker_main(connection):
+    """Цикл процесса-работника: команды координатора приходят и уходят по каналу."""
+    tiles = {}
+    while True:
+        command, payload = connection.recv()
+        if command == 'close':
+            break
+        try:
+            connection.send(('ok', handle(tiles, command, payload)))
+        except Exception:
+            connection.send(('error', traceback.format_exc()))
+    connection.close()
+
+class LocalWorker:
+    """Работник в процессе координатора (workers=0): те же команды без отдельных процессов."""
+    def __init__(self):
+        self.tiles = {}
+        self.reply = None
+
+    def send(self, command, payload):
+        self.reply = handle(self.tiles, command, payload)
+
+    def receive(self):
+        return self.reply
+
+    def close(self):
+        self.tiles = {}
+
+class ProcessWorker:
+    """Работник в отдельном процессе; общается с координатором через канал."""
+    def __init__(self, context):
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=worker_main, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+
+    def send(self, command, payload):
+        self.connection.send((command, payload))
+
+    def receive(self):
+        status, reply = self.connection.recv()
+        if status == 'error':
+            raise RuntimeError(f"Ошибка в процессе-работнике:\n{reply}")
+        return reply
+
+    def close(self):
+        try:
+            self.connection.send(('close', None))
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join()
+        self.connection.close()
+
+class TiledEcosystem:
+    """Экосистема, разделенная на tiles вертикальных полос, которые шагают параллельно в workers процессах.
+
+    Строится из готовой экосистемы (после populate или загрузки снимка) без бэкенда,
+    сетки еды и LOD. Цели, указывающие на объекты другого тайла, при разделении сбрасываются.
+    """
+    def __init__(self, ecosystem, tiles=PARALLEL_TILES, workers=None, halo=PARALLEL_HALO):
+        if ecosystem.backend is not None or ecosystem.food_grid is not None or ecosystem.lod is not None:
+            raise ValueError("Многоядерный тик работает без бэкенда, сетки еды и LOD")
+        if ecosystem.map.width / tiles < 2 * halo:
+            raise ValueError(f"Полоса тайла уже двух ширин призраков ({2 * halo}): уменьшите число тайлов")
+        self.tiles = tiles
+        self.halo = halo
+        self.setup = world_setup(ecosystem)
+        self.time, self.tick = ecosystem.time, ecosystem.tick
+        self.map = ecosystem.map
+        workers = min(tiles, multiprocessing.cpu_count() if workers is None else workers)
+        if workers <= 0:
+            self.workers = [LocalWorker()]
+        else:
+            context = multiprocessing.get_context()
+            self.workers = [ProcessWorker(context) for _ in range(workers)]
+        self.assignment = {index: index % len(self.workers) for index in range(tiles)}
+
+        tile_width = ecosystem.map.width / tiles
+        entities = [[] for _ in range(tiles)]
+        food = [[] for _ in range(tiles)]
+        for entity in ecosystem.entities:
+            tile = min(tiles - 1, int(entity.x % ecosystem.map.width // tile_width))
+            entities[tile].append((species_key(type(entity)).__name__, pack_entity(entity)))
+        for item in ecosystem.resources:
+            food[min(tiles - 1, int(item.x % ecosystem.map.width // tile_width))].append((item.id, item.x, item.y))
+        self.totals = {key.__name__: len(members) for key, members in ecosystem.species_members.items()}
+        self.food = len(ecosystem.resources)
+        setups = [[] for _ in self.workers]
+        for index in range(tiles):
+            setups[self.assignment[index]].append({
+                'world': self.setup,
+                'index': index,
+                'tiles': tiles,
+                'halo': halo,
+                'seed': ecosystem.rng.getrandbits(64),
+                'next_id': ecosystem.next_id,
+                'totals': self.totals,
+                'entities': entities[index],
+                'food': food[index],
+            })
+        self.inboxes = self.route(self.call('init', setups))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def call(self, command, payloads):
+        """Рассылает команды всем работникам сразу и собирает ответы (тайл -> ответ)."""
+        for worker, payload in zip(self.workers, payloads):
+            worker.send(command, payload)
+        replies = {}
+        for worker in self.workers:
+            replies.update(worker.receive())
+        return replies
+
+    def split(self, inboxes):
+        """Раскладывает входящие данные тайлов по работникам."""
+        payloads = [{} for _ in self.workers]
+        for index, inbox in inboxes.items():
+            payloads[self.assignment[index]][index] = inbox
+        return payloads
+
+    def route(self, outboxes):
+        """Фаза обмена: переезды и полосы призраков - соседям, намерения - текущим хозяевам объектов."""
+        totals = {}
+        for outbox in outboxes.values():
+            for name, count in outbox['counts'].items():
+                totals[name] = totals.get(name, 0) + count
+        self.totals = totals
+        self.food = sum(outbox['food'] for outbox in outboxes.values())
+        inboxes = {index: {'migrations': [], 'intents': [], 'halo': [], 'totals': totals}
+                   for index in range(self.tiles)}
+        moved = {}
+        for index in sorted(outboxes):
+            for home, name, row in outboxes[index]['migrations']:
+                moved[row[0]] = home
+                inboxes[home]['migrations'].append((name, row))
+        for index in sorted(outboxes):
+            outbox = outboxes[index]
+            for kind, obj_id, home, value in outbox['intents']:
+                inboxes[moved.get(obj_id, home)]['intents'].append((kind, obj_id, index, value))
+            for neighbour, halo in sorted(outbox['halo'].items()):
+                inboxes[neighbour]['halo'].append((index, halo))
+        return inboxes
+
+    def step(self, dt=FIXED_DT):
+        """Один тик всех тайлов параллельно, затем обмен между ними."""
+        self.inboxes = self.route(self.call('step', [(dt, payload) for payload in self.split(self.inboxes)]))
+        self.time += dt
+        self.tick += 1
+
+    def run(self, ticks, dt=FIXED_DT):
+        for _ in range(ticks):
+            self.step(dt)
+
+    def count(self, cls):
+        """Численность вида на момент последнего обмена."""
+        return self.totals.get(species_key(cls).__name__, 0)
+
+    def food_amount(self):
+        return self.food
+
+    def gather(self):
+        """Собирает состояние всех тайлов в одну обычную экосистему (после слияния последнего обмена)."""
+        dumps = self.call('gather', self.split(self.inboxes))
+        self.inboxes = {index: {'migrations': [], 'intents': [], 'halo': [], 'totals': self.totals}
+                        for index in range(self.tiles)}
+        ecosystem = build_ecosystem(self.setup)
+        ecosystem.time, ecosystem.tick = self.time, self.tick
+        # Смена дня и ночи и генератор случайных чисел берутся у первого тайла.
+        first = dumps[0]
+        ecosystem.day_night_cycle.timer, ecosystem.day_night_cycle.time_scale = first['day_night']
+        ecosystem.rng.setstate(first['rng'])
+        rows = sorted((row[0], name, row) for dump in dumps.values() for name, row in dump['entities'])
+        arrivals = []
+        for _, name, row in rows:
+            entity = new_entity(ecosystem, name)
+            arrivals.append((entity, unpack_entity(entity, row)))
+            adopt_entity(ecosystem, entity)
+        for obj_id, x, y in sorted(item for dump in dumps.values() for item in dump['food']):
+            adopt_resource(ecosystem, obj_id, x, y)
+        for entity, refs in arrivals:
+            link_entity(ecosystem, entity, *refs)
+        for index in sorted(dumps):
+            for obj_id, value in dumps[index]['feeds']:
+                eater = ecosystem.by_id.get(obj_id)
+                if eater is not None:
+                    eater.feed(*value)
+        ecosystem.next_id = max(dump['next_id'] for dump in dumps.values())
+        return ecosystem
+
+    def close(self):
+        for worker in self.workers:
+            worker.close()
+        self.workers = []
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from simulation import (WIDTH, HEIGHT, INITIAL_HERBIVORE_COUNT, INITIAL_PREDATOR_COUNT, INITIAL_FOOD_COUNT,
+                            load_species, population_summary)
+
+    parser = argparse.ArgumentParser(description="Прогон симуляции без отрисовки на нескольких ядрах.")
+    parser.add_argument("--ticks", type=int, default=1000, help="число тиков симуляции")
+    parser.add_argument("--width", type=int, default=WIDTH * 8, help="ширина карты")
+    parser.add_argument("--height", type=int, default=HEIGHT * 8, help="высота карты")
+    parser.add_argument("--herbivores", type=int, default=INITIAL_HERBIVORE_COUNT, help="начальное число травоядных")
+    parser.add_argument("--predators", type=int, default=INITIAL_PREDATOR_COUNT, help="начальное число хищников")
+    parser.add_argument("--food", type=int, default=INITIAL_FOOD_COUNT, help="начальное количество еды")
+    parser.add_argument("--seed", type=int, default=None, help="зерно генератора случайных чисел")
+    parser.add_argument("--tiles", type=int, default=PARALLEL_TILES, help="число полос карты")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="число процессов (по умолчанию по числу ядер, 0 - без процессов)")
+    parser.add_argument("--species", default=None, metavar="ФАЙЛ", help="JSON-файл с дополнительными видами")
+    args = parser.parse_args()
+
+    species_counts = load_species(args.species) if args.species is not None else None
+    ecosystem = Ecosystem(args.width, args.height, seed=args.seed)
+    ecosystem.populate(args.herbivores, args.predators, args.food, species_counts)
+    with TiledEcosystem(ecosystem, args.tiles, args.workers) as tiled:
+        started = time.perf_counter()
+        tiled.run(args.ticks)
+        elapsed = time.perf_counter() - started
+        print(f"{args.ticks} тиков за {elapsed:.2f} с ({args.ticks / elapsed:.0f} тиков/с), "
+              f"тайлов: {tiled.tiles}, процессов: {len(tiled.workers)}")
+        print(f"{population_summary(tiled)}, Еда: {tiled.food_amount()}")
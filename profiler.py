@@ -0,0 +1,185 @@
+"""Необязательное профилирование симуляции по фазам и методам.
+
+Профилировщик подменяет перечисленные методы обертками, измеряющими время и
+число вызовов, только пока он включен; выключенный он ничего не стоит.
+Время каждой метки включает вложенные вызовы (например, Herbivore.update
+включает avoid_water и find_target).
+"""
+import csv
+import json
+import math
+import time
+from collections import deque
+from functools import wraps
+
+from simulation import Ecosystem, Entity, Herbivore, Predator, ThreatMap
+
+PROFILER_WINDOW = 300
+PERCENTILES = (50, 95, 99)
+
+SIMULATION_TARGETS = [
+    (Ecosystem, 'step'),
+    (Ecosystem, 'update_vitals'),
+    (ThreatMap, 'rebuild'),
+    (Ecosystem, 'update_entities'),
+    (Ecosystem, 'integrate'),
+    (Ecosystem, 'apply_pending'),
+    (Herbivore, 'behave'),
+    (Predator, 'behave'),
+    (Entity, 'avoid_water'),
+    (Entity, 'avoid_other_entities'),
+    (Herbivore, 'find_target'),
+    (Predator, 'find_target'),
+    (Entity, 'find_reproduction_target'),
+    (Entity, 'find_water_target'),
+]
+
+def percentile(values, percent):
+    """Перцентиль percent (0-100) отсортированного списка по методу ближайшего ранга."""
+    if not values:
+        return 0.0
+    rank = max(0, math.ceil(percent / 100 * len(values)) - 1)
+    return values[rank]
+
+class Profiler:
+    """Замеряет время и число вызовов методов за кадр (или тик) и хранит скользящее окно."""
+    def __init__(self, targets=SIMULATION_TARGETS, window=PROFILER_WINDOW, keep_history=False):
+        self.targets = list(targets)
+        self.window = window
+        self.keep_history = keep_history
+        self.enabled = False
+        self.frame = 0
+        self.labels = [self.label(owner, name) for owner, name in self.targets]
+        self.current = {label: [0.0, 0] for label in self.labels}
+        self.times = {label: deque(maxlen=window) for label in self.labels}
+        self.calls = {label: deque(maxlen=window) for label in self.labels}
+        self.history = []
+        self.originals = []
+
+    @staticmethod
+    def label(owner, name):
+        return f"{owner.__name__}.{name}"
+
+    def enable(self):
+        """Подменяет методы из targets измеряющими обертками."""
+        if self.enabled:
+            return
+        for (owner, name), label in zip(self.targets, self.labels):
+            original = owner.__dict__.get(name)
+            self.originals.append((owner, name, original))
+            setattr(owner, name, self.wrap(label, getattr(owner, name)))
+        self.enabled = True
+
+    def disable(self):
+        """Возвращает исходные методы."""
+        if not self.enabled:
+            return
+        for owner, name, original in reversed(self.originals):
+            if original is None:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, original)
+        self.originals = []
+        self.enabled = False
+
+    def toggle(self):
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+
+    def wrap(self, label, function):
+        entry = self.current[label]
+        perf_counter = time.perf_counter
+
+        @wraps(function)
+        def timed(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                entry[0] += perf_counter() - started
+                entry[1] += 1
+        return timed
+
+    def end_frame(self):
+        """Закрывает кадр: переносит накопленные замеры в скользящее окно."""
+        for label, entry in self.current.items():
+            self.times[label].append(entry[0])
+            self.calls[label].append(entry[1])
+            if self.keep_history:
+                self.history.append((self.frame, label, entry[0], entry[1]))
+            entry[0] = 0.0
+            entry[1] = 0
+        self.frame += 1
+
+    def summary(self):
+        """Сводка по окну: {метка: {'calls', 'mean', 'p50', 'p95', 'p99', 'max'}}, время в секундах."""
+        result = {}
+        for label in self.labels:
+            times = sorted(self.times[label])
+            calls = self.calls[label]
+            stats = {
+                'calls': sum(calls) / len(calls) if calls else 0.0,
+                'mean': sum(times) / len(times) if times else 0.0,
+                'max': times[-1] if times else 0.0,
+            }
+            for percent in PERCENTILES:
+                stats[f'p{percent}'] = percentile(times, percent)
+            result[label] = stats
+        return result
+
+    def export_csv(self, path):
+        """Записывает замеры по кадрам (нужен keep_history=True): кадр, метка, секунды, вызовы."""
+        with open(path, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(['frame', 'label', 'seconds', 'calls'])
+            writer.writerows(self.history)
+
+    def export_json(self, path):
+        """Записывает сводку по окну и число кадров."""
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({'frames': self.frame, 'window': self.window, 'summary': self.summary()}, file,
+                      ensure_ascii=False, indent=2)
+
+    def export(self, path):
+        """Экспортирует в CSV или JSON в зависимости от расширения path."""
+        if path.endswith('.json'):
+            self.export_json(path)
+        else:
+            self.export_csv(path)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from simulation import WIDTH, HEIGHT, INITIAL_HERBIVORE_COUNT, INITIAL_PREDATOR_COUNT, INITIAL_FOOD_COUNT
+
+    parser = argparse.ArgumentParser(description="Профилирование симуляции без отрисовки по тикам.")
+    parser.add_argument("--ticks", type=int, default=5000, help="число тиков симуляции")
+    parser.add_argument("--width", type=int, default=WIDTH, help="ширина карты")
+    parser.add_argument("--height", type=int, default=HEIGHT, help="высота карты")
+    parser.add_argument("--backend", choices=["numpy"], default=None,
+                        help="векторизованный бэкенд для больших миров (с тем же зерном дает другой прогон)")
+    parser.add_argument("--herbivores", type=int, default=INITIAL_HERBIVORE_COUNT, help="начальное число травоядных")
+    parser.add_argument("--predators", type=int, default=INITIAL_PREDATOR_COUNT, help="начальное число хищников")
+    parser.add_argument("--food", type=int, default=INITIAL_FOOD_COUNT, help="начальное количество еды")
+    parser.add_argument("--seed", type=int, default=None, help="зерно генератора случайных чисел")
+    parser.add_argument("--output", default="profile.csv", help="файл замеров (.csv по тикам или .json со сводкой)")
+    args = parser.parse_args()
+
+    ecosystem = Ecosystem(args.width, args.height, backend=args.backend, seed=args.seed)
+    ecosystem.populate(args.herbivores, args.predators, args.food)
+    profiler = Profiler(window=args.ticks, keep_history=True)
+    profiler.enable()
+    for _ in range(args.ticks):
+        ecosystem.step()
+        profiler.end_frame()
+    profiler.disable()
+    profiler.export(args.output)
+
+    print(f"{'метка':<36}{'вызовы/тик':>12}{'p50, мс':>10}{'p95, мс':>10}{'p99, мс':>10}")
+    for label, stats in profiler.summary().items():
+        print(f"{label:<36}{stats['calls']:>12.1f}{stats['p50'] * 1000:>10.3f}"
+              f"{stats['p95'] * 1000:>10.3f}{stats['p99'] * 1000:>10.3f}")
+    print(f"Замеры записаны в {args.output}")
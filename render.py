@@ -0,0 +1,285 @@
+"""Отрисовка экосистемы средствами pygame, подключаемая к игре по желанию."""
+import pygame
+
+from simulation import BLUE, BROWN, RED, WHITE, YELLOW, Food
+
+# Больше стольких изменившихся прямоугольников выгоднее перерисовать кадр целиком.
+DIRTY_RECT_LIMIT = 400
+# Сколько отрендеренных строк текста хранится в кэше.
+TEXT_CACHE_SIZE = 256
+MAX_ZOOM = 4.0
+# Непрозрачность клетки сетки еды с травой до вместимости.
+FOOD_GRID_ALPHA = 160
+# Панель графиков телеметрии: размер графика и цвета рядов, кроме численности видов (цвет вида).
+SPARKLINE_WIDTH = 160
+SPARKLINE_HEIGHT = 22
+SPARKLINE_LABEL_WIDTH = 170
+SPARKLINE_PANEL_WIDTH = SPARKLINE_LABEL_WIDTH + SPARKLINE_WIDTH + 12
+SPARKLINE_COLORS = {
+    'food': BROWN,
+    'births': YELLOW,
+    'deaths_predation': RED,
+    'deaths_starvation': (200, 120, 60),
+    'deaths_thirst': BLUE,
+    'deaths_age': (160, 160, 160),
+}
+
+
+class Camera:
+    """Видимая область карты: левый верхний угол (x, y) в координатах карты и масштаб zoom.
+
+    Камера не выходит за края карты; если карта целиком меньше экрана, она выравнивается по центру.
+    """
+    def __init__(self, width, height, zoom=1.0):
+        self.width = width
+        self.height = height
+        self.x = 0.0
+        self.y = 0.0
+        self.zoom = zoom
+        self.world_width = width
+        self.world_height = height
+
+    def bound(self, map_obj):
+        """Ограничивает камеру картой map_obj."""
+        self.world_width = map_obj.width
+        self.world_height = map_obj.height
+        self.zoom = min(max(self.zoom, self.min_zoom()), MAX_ZOOM)
+        self.x = self._clamp(self.x, self.width / self.zoom, self.world_width)
+        self.y = self._clamp(self.y, self.height / self.zoom, self.world_height)
+
+    @staticmethod
+    def _clamp(position, view, world):
+        if view >= world:
+            return (world - view) / 2
+        return min(max(position, 0.0), world - view)
+
+    def min_zoom(self):
+        """Масштаб, при котором на экране помещается вся карта (но не крупнее 1)."""
+        return min(1.0, self.width / self.world_width, self.height / self.world_height)
+
+    def pan(self, dx, dy):
+        """Сдвигает камеру на (dx, dy) пикселей экрана."""
+        self.x += dx / self.zoom
+        self.y += dy / self.zoom
+        self.x = self._clamp(self.x, self.width / self.zoom, self.world_width)
+        self.y = self._clamp(self.y, self.height / self.zoom, self.world_height)
+
+    def zoom_at(self, factor, screen_x, screen_y):
+        """Меняет масштаб в factor раз, оставляя точку карты под (screen_x, screen_y) на месте."""
+        world_x, world_y = self.to_world(screen_x, screen_y)
+        self.zoom = min(max(self.zoom * factor, self.min_zoom()), MAX_ZOOM)
+        self.x = world_x - screen_x / self.zoom
+        self.y = world_y - screen_y / self.zoom
+        self.pan(0, 0)
+
+    def to_screen(self, x, y):
+        return int((x - self.x) * self.zoom), int((y - self.y) * self.zoom)
+
+    def to_world(self, screen_x, screen_y):
+        return self.x + screen_x / self.zoom, self.y + screen_y / self.zoom
+
+    def view(self, margin=0):
+        """Видимый прямоугольник карты (left, top, right, bottom), расширенный на margin."""
+        return (self.x - margin, self.y - margin,
+                self.x + self.width / self.zoom + margin, self.y + self.height / self.zoom + margin)
+
+    def key(self):
+        return self.x, self.y, self.zoom
+
+
+class Renderer:
+    """Рисует карту, ресурсы и сущности экосистемы на поверхности pygame.
+
+    Рисуется только видимая камерой область: еда, вода и сущности в ней находятся
+    запросами к пространственным индексам экосистемы, поэтому стоимость кадра
+    зависит от содержимого экрана, а не от размера карты. Круги рисуются заранее
+    подготовленными спрайтами (по одному на цвет и радиус), еда и вода запекаются
+    в статический слой, который перерисовывается только при их добавлении или
+    удалении и при движении камеры; сетка еды попадает в него одной поверхностью
+    и перерисовывается после каждого отрастания травы. Пока фон не меняется (день или ночь без
+    перехода), кадр обновляется по прямоугольникам изменившихся областей.
+    """
+    def __init__(self, screen, dirty_rects=True, camera=None):
+        self.screen = screen
+        self.camera = camera or Camera(*screen.get_size())
+        self.font = pygame.font.Font(None, 20)
+        self.text_cache = {}
+        self.dirty_rects = dirty_rects
+        self.sprites = {}
+        self.static_layer = None
+        self.static_key = None
+        self.background = None
+        self.background_color = None
+        self.full_redraw = True
+        self.rects = []
+        self.previous_rects = []
+        self.telemetry_panel = None
+        self.telemetry_key = None
+
+    def sprite(self, color, radius):
+        """Спрайт круга заданного цвета и радиуса (создается один раз)."""
+        key = (color, radius)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = pygame.Surface((2 * radius, 2 * radius), pygame.SRCALPHA)
+            pygame.draw.circle(sprite, color, (radius, radius), radius)
+            self.sprites[key] = sprite
+        return sprite
+
+    def circle(self, obj):
+        """Спрайт и позиция на экране для отрисовки объекта кругом радиуса size с центром в (x, y)."""
+        camera = self.camera
+        radius = max(1, int(obj.size * camera.zoom))
+        x, y = camera.to_screen(obj.x, obj.y)
+        return self.sprite(obj.color, radius), (x - radius, y - radius)
+
+    def bake_static(self, ecosystem):
+        """Запекает видимые еду и воду в прозрачный слой размером с экран."""
+        layer = pygame.Surface(self.screen.get_size(), pygame.SRCALPHA)
+        if ecosystem.food_grid is not None:
+            grid_layer = self.food_grid_layer(ecosystem.food_grid)
+            if grid_layer is not None:
+                layer.blit(*grid_layer)
+        food = ecosystem.resource_index.query_rect(*self.camera.view(Food.size))
+        water_margin = max((water.size for water in ecosystem.water_sources), default=0)
+        water = ecosystem.water_index.query_rect(*self.camera.view(water_margin))
+        layer.blits([self.circle(item) for item in food], False)
+        layer.blits([self.circle(item) for item in water], False)
+        self.static_layer = layer
+        self.background_color = None
+
+    def food_grid_layer(self, grid):
+        """Видимая часть сетки еды одной поверхностью: пиксель на клетку, растянутый под масштаб камеры."""
+        camera = self.camera
+        left, top, right, bottom = camera.view()
+        first_col = max(0, int(left // grid.cell_width))
+        first_row = max(0, int(top // grid.cell_height))
+        last_col = min(grid.cols, int(right // grid.cell_width) + 1)
+        last_row = min(grid.rows, int(bottom // grid.cell_height) + 1)
+        if first_col >= last_col or first_row >= last_row:
+            return None
+        alpha = grid.biomass[first_row:last_row, first_col:last_col] * (FOOD_GRID_ALPHA / grid.capacity)
+        surface = pygame.Surface((last_col - first_col, last_row - first_row), pygame.SRCALPHA)
+        surface.fill(Food.color)
+        pygame.surfarray.pixels_alpha(surface)[...] = alpha.T.astype('uint8')
+        x, y = camera.to_screen(first_col * grid.cell_width, first_row * grid.cell_height)
+        end_x, end_y = camera.to_screen(last_col * grid.cell_width, last_row * grid.cell_height)
+        return pygame.transform.scale(surface, (end_x - x, end_y - y)), (x, y)
+
+    def invalidate(self):
+        """Требует перерисовать следующий кадр целиком (например, после рисования поверх экрана)."""
+        self.full_redraw = True
+
+    def begin_frame(self, ecosystem):
+        """Готовит фон кадра: целиком или только под прямоугольниками прошлого кадра."""
+        self.camera.bound(ecosystem.map)
+        grid_version = ecosystem.food_grid.version if ecosystem.food_grid is not None else None
+        static_key = (ecosystem, ecosystem.static_version, grid_version, self.camera.key())
+        if static_key != self.static_key:
+            self.static_key = static_key
+            self.bake_static(ecosystem)
+
+        color = ecosystem.day_night_cycle.get_background_color()
+        if color != self.background_color:
+            self.background_color = color
+            self.background = pygame.Surface(self.screen.get_size()).convert()
+            self.background.fill(color)
+            self.background.blit(self.static_layer, (0, 0))
+            self.full_redraw = True
+
+        if not self.dirty_rects or len(self.previous_rects) > DIRTY_RECT_LIMIT:
+            self.full_redraw = True
+        if self.full_redraw:
+            self.screen.blit(self.background, (0, 0))
+        else:
+            self.screen.blits([(self.background, rect, rect) for rect in self.previous_rects], False)
+        self.rects = []
+
+    def blit(self, surface, dest):
+        """Рисует поверхность на экране и запоминает затронутую область."""
+        rect = self.screen.blit(surface, dest)
+        self.rects.append(rect)
+        return rect
+
+    def draw_world(self, ecosystem, selected_entity=None, show_entity_info=False):
+        """Отрисовывает фон, еду, воду и сущности в видимой камерой области."""
+        self.begin_frame(ecosystem)
+        visible = ecosystem.entities_in_rect(*self.camera.view(ecosystem.max_entity_size))
+        self.rects.extend(self.screen.blits([self.circle(entity) for entity in visible]))
+        if show_entity_info and selected_entity is not None and selected_entity.alive:
+            self.draw_entity_info(selected_entity)
+
+    def present(self):
+        """Выводит кадр на дисплей: изменившимися областями или целиком."""
+        if self.full_redraw:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self.previous_rects + self.rects)
+        self.full_redraw = False
+        self.previous_rects = self.rects
+
+    def draw_entity_info(self, entity):
+        """Отрисовывает информацию о сущности на экране."""
+        text_surface = self.text(
+            f"Здоровье: {int(entity.health)}/{entity.max_health}, Голод: {int(entity.hunger)}/{entity.max_hunger}, Жажда: {int(entity.thirst)}/{entity.max_thirst}, Возраст: {int(entity.age)}/{entity.max_age}, Готов к размножению: {'Да' if entity.reproductive_ready else 'Нет'}"
+        )
+        x, y = self.camera.to_screen(entity.x, entity.y)
+        text_rect = text_surface.get_rect(center=(x, y - 20))
+        self.blit(text_surface, text_rect)
+
+    def text(self, text, color=WHITE):
+        """Поверхность со строкой текста; шрифт рендерит строку, только если ее нет в кэше."""
+        key = (text, color)
+        surface = self.text_cache.pop(key, None)
+        if surface is None:
+            surface = self.font.render(text, True, color)
+            if len(self.text_cache) >= TEXT_CACHE_SIZE:
+                # Вытесняется строка, которая дольше всех не использовалась.
+                del self.text_cache[next(iter(self.text_cache))]
+        self.text_cache[key] = surface
+        return surface
+
+    def draw_text(self, text, position, center=False):
+        """Отрисовывает строку текста; position - левый верхний угол или центр при center=True."""
+        surface = self.text(text)
+        rect = surface.get_rect(center=position) if center else surface.get_rect(topleft=position)
+        return self.blit(surface, rect)
+
+    def telemetry_layer(self, telemetry):
+        """Панель графиков телеметрии: численность видов, еда, рождения и смерти по причинам."""
+        series = [(f'count_{name}', cls.color) for name, cls in telemetry.species.items()]
+        series += list(SPARKLINE_COLORS.items())
+        row_height = SPARKLINE_HEIGHT + 6
+        panel = pygame.Surface((SPARKLINE_PANEL_WIDTH, row_height * len(series) + 6), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 150))
+        for i, (name, color) in enumerate(series):
+            values = telemetry.values(name)
+            top = 6 + i * row_height
+            latest = f"{values[-1]:.4g}" if values else "-"
+            panel.blit(self.font.render(f"{name}: {latest}", True, WHITE), (6, top + 4))
+            if len(values) < 2:
+                continue
+            low, high = min(values), max(values)
+            spread = (high - low) or 1
+            step = (SPARKLINE_WIDTH - 1) / (len(values) - 1)
+            points = [(SPARKLINE_LABEL_WIDTH + 6 + j * step,
+                       top + (SPARKLINE_HEIGHT - 1) * (1 - (value - low) / spread)) for j, value in enumerate(values)]
+            pygame.draw.lines(panel, color, False, points)
+        return panel
+
+    def draw_telemetry(self, telemetry, x, y):
+        """Отрисовывает панель графиков телеметрии; панель перерисовывается только после новой строки."""
+        key = (telemetry, telemetry.version)
+        if key != self.telemetry_key:
+            self.telemetry_key = key
+            self.telemetry_panel = self.telemetry_layer(telemetry)
+        return self.blit(self.telemetry_panel, (x, y))
+
+    def draw_profiler(self, summary, x, y):
+        """Отрисовывает сводку профилировщика: перцентили времени за кадр и вызовы за кадр."""
+        lines = ["метка: p50 / p95 / p99 мс, вызовов"]
+        for label, stats in summary.items():
+            lines.append(f"{label}: {stats['p50'] * 1000:.2f} / {stats['p95'] * 1000:.2f} / "
+                         f"{stats['p99'] * 1000:.2f}, {stats['calls']:.0f}")
+        for i, line in enumerate(lines):
+            self.draw_text(line, (x, y + 16 * i))
@@ -0,0 +1,483 @@
+"""Запись прогона в компактный поток кадров и его воспроизведение без логики особей.
+
+Файл записи: заголовок (MAGIC и номер версии формата), затем блоки. Блок
+покрывает до chunk_ticks подряд идущих тиков одной экосистемы и хранится
+сжатым zlib marshal-словарем с небольшим заголовком (число кадров и длина
+данных), поэтому файл можно пролистать, не распаковывая блоки. Первый кадр
+блока - ключевой: карта, цвета видов, все особи, еда, вода и сетка еды. Дальше
+на каждый тик записываются только изменения: умершие и родившиеся особи,
+приращения координат и размера (в 1/RECORD_SCALE пикселя), флаги состояния,
+появившаяся и исчезнувшая еда, вода и сетка еды, если они поменялись.
+Переход к любому кадру стоит не больше распаковки одного блока; при проходе
+вперед Replay запоминает состояние каждые SEEK_CHECKPOINT_FRAMES кадров, и
+шаг назад начинается с ближайшей такой точки, а не с начала блока.
+"""
+import marshal
+import struct
+import zlib
+from array import array
+from operator import attrgetter
+
+from simulation import DayNightCycle, Food, Map, SpatialHash, Water, species_key
+
+MAGIC = b"ECOREPL\0"
+VERSION = 1
+HEADER = struct.Struct("<8sH")
+CHUNK_HEADER = struct.Struct("<II")
+MARSHAL_VERSION = 4
+RECORD_CHUNK_TICKS = 300
+# Координаты и размеры записываются целыми числами в 1/RECORD_SCALE пикселя.
+RECORD_SCALE = 16
+GRID_LEVELS = 255
+# Шаг (в кадрах блока), с которым Replay запоминает состояние для перехода назад.
+SEEK_CHECKPOINT_FRAMES = 20
+
+# Флаги состояния особи: бит на каждое поле.
+STATE_FLAGS = ('is_asleep', 'is_baby', 'is_drinking', 'is_escaping', 'reproductive_ready')
+STATE_NAMES = {
+    'is_asleep': "спит",
+    'is_baby': "детеныш",
+    'is_drinking': "пьет",
+    'is_escaping': "убегает",
+    'reproductive_ready': "готов к размножению",
+}
+
+_state_fields = attrgetter(*STATE_FLAGS)
+
+def state_flags(entity):
+    asleep, baby, drinking, escaping, ready = _state_fields(entity)
+    return bool(asleep) | bool(baby) << 1 | bool(drinking) << 2 | bool(escaping) << 3 | bool(ready) << 4
+
+def flag_names(flags):
+    """Названия состояний, отмеченных во флагах."""
+    return [STATE_NAMES[name] for bit, name in enumerate(STATE_FLAGS) if flags & (1 << bit)]
+
+def deltas(values, previous):
+    """Приращения values относительно previous (у новых элементов в конце - сами значения) в байтах."""
+    result = array('i', values)
+    for i, old in enumerate(previous):
+        result[i] -= old
+    return result.tobytes()
+
+def accumulate(values, encoded):
+    """Обратная к deltas операция: прибавляет приращения к values на месте."""
+    changes = array('i')
+    changes.frombytes(encoded)
+    for i in range(len(values)):
+        values[i] += changes[i]
+    values.extend(changes[len(values):])
+
+def grid_levels(grid):
+    """Сетка еды в байтах: трава каждой клетки в долях вместимости от 0 до GRID_LEVELS."""
+    return (grid.biomass * (GRID_LEVELS / grid.capacity)).round().astype('uint8').tobytes()
+
+class Recorder:
+    """Пишет в файл path кадры экосистемы, которые передаются в capture() после каждого тика."""
+    def __init__(self, path, chunk_ticks=RECORD_CHUNK_TICKS):
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION))
+        self.chunk_ticks = chunk_ticks
+        self.ecosystem = None
+        self.last_tick = None
+        self.frames = []
+        self.frames_written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def capture(self, ecosystem):
+        """Записывает текущее состояние ecosystem кадром.
+
+        Новый блок с ключевым кадром начинается, когда текущий заполнен, а также
+        при смене экосистемы (например, после загрузки снимка) или разрыве в тиках.
+        """
+        if (ecosystem is not self.ecosystem or ecosystem.tick != self.last_tick + 1
+                or len(self.frames) >= self.chunk_ticks):
+            self.flush()
+            self.ecosystem = ecosystem
+            self.frames.append(self.keyframe(ecosystem))
+        else:
+            self.frames.append(self.delta(ecosystem))
+        self.last_tick = ecosystem.tick
+
+    def entity_columns(self, entities):
+        scale = RECORD_SCALE
+        return ([int(entity.x * scale) for entity in entities], [int(entity.y * scale) for entity in entities],
+                [int(entity.size * scale) for entity in entities], bytes(map(state_flags, entities)))
+
+    def keyframe(self, ecosystem):
+        entities = [entity for entity in ecosystem.entities if entity.alive]
+        self.order = list(map(attrgetter('id'), entities))
+        self.x, self.y, self.sizes, flags = self.entity_columns(entities)
+        self.food = {food.id: (food.x, food.y) for food in ecosystem.resources}
+        self.water = self.water_table(ecosystem)
+        self.static_version = ecosystem.static_version
+        self.grid_version = ecosystem.food_grid.version if ecosystem.food_grid is not None else None
+        species = {}
+        for entity in entities:
+            species.setdefault(species_key(type(entity)).__name__, type(entity).color)
+        cycle = ecosystem.day_night_cycle
+        grid = ecosystem.food_grid
+        return {
+            'tick': ecosystem.tick,
+            'map': (ecosystem.map.width, ecosystem.map.height, ecosystem.map.tile_size),
+            'cycle': (cycle.day_length, cycle.night_length, cycle.transition_duration, cycle.timer),
+            'species': species,
+            'ids': self.order,
+            'kinds': [species_key(type(entity)).__name__ for entity in entities],
+            'x': array('i', self.x).tobytes(),
+            'y': array('i', self.y).tobytes(),
+            'size': array('i', self.sizes).tobytes(),
+            'flags': flags,
+            'food': [(food_id, x, y) for food_id, (x, y) in self.food.items()],
+            'water': self.water,
+            'grid': None if grid is None else (grid.cols, grid.rows, grid.capacity, grid_levels(grid)),
+        }
+
+    @staticmethod
+    def water_table(ecosystem):
+        return [(water.id, water.x, water.y, water.size) for water in ecosystem.water_sources]
+
+    def delta(self, ecosystem):
+        """Кадр изменений относительно предыдущего кадра."""
+        by_id = ecosystem.by_id
+        died = [obj_id for obj_id in self.order if obj_id not in by_id or not by_id[obj_id].alive]
+        if died:
+            gone = set(died)
+            keep = [i for i, obj_id in enumerate(self.order) if obj_id not in gone]
+            self.order = [self.order[i] for i in keep]
+            self.x = [self.x[i] for i in keep]
+            self.y = [self.y[i] for i in keep]
+            self.sizes = [self.sizes[i] for i in keep]
+        known = set(self.order)
+        born = [entity for entity in ecosystem.entities if entity.alive and entity.id not in known]
+        self.order.extend(entity.id for entity in born)
+        entities = [by_id[obj_id] for obj_id in self.order]
+        x, y, sizes, flags = self.entity_columns(entities)
+        frame = {
+            'died': died,
+            'born': [(entity.id, species_key(type(entity)).__name__, type(entity).color) for entity in born],
+            'x': deltas(x, self.x),
+            'y': deltas(y, self.y),
+            'size': deltas(sizes, self.sizes),
+            'flags': flags,
+            'timer': ecosystem.day_night_cycle.timer,
+        }
+        self.x, self.y, self.sizes = x, y, sizes
+        # Еда и вода меняются вместе с static_version, в остальные тики их не нужно сравнивать.
+        if ecosystem.static_version != self.static_version:
+            self.static_version = ecosystem.static_version
+            food = {food.id: (food.x, food.y) for food in ecosystem.resources}
+            frame['eaten'] = [food_id for food_id in self.food if food_id not in food]
+            frame['spawned'] = [(food_id, x, y) for food_id, (x, y) in food.items() if food_id not in self.food]
+            self.food = food
+            water = self.water_table(ecosystem)
+            if water != self.water:
+                frame['water'] = self.water = water
+        grid = ecosystem.food_grid
+        if grid is not None and grid.version != self.grid_version:
+            self.grid_version = grid.version
+            frame['grid'] = grid_levels(grid)
+        return frame
+
+    def flush(self):
+        """Дописывает в файл накопленный блок."""
+        if not self.frames:
+            return
+        data = zlib.compress(marshal.dumps(self.frames, MARSHAL_VERSION))
+        self.file.write(CHUNK_HEADER.pack(len(self.frames), len(data)))
+        self.file.write(data)
+        self.frames_written += len(self.frames)
+        self.frames = []
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+class ReplayAgent:
+    """Особь в воспроизведении: только то, что нужно для отрисовки."""
+    __slots__ = ('id', 'species', 'x', 'y', 'size', 'color', 'flags')
+
+    def __init__(self, obj_id, species, color):
+        self.id = obj_id
+        self.species = species
+        self.color = color
+        self.x = self.y = self.size = 0.0
+        self.flags = 0
+
+class ReplayResource:
+    """Еда или вода в воспроизведении."""
+    __slots__ = ('id', 'x', 'y', 'size', 'color')
+
+    def __init__(self, obj_id, x, y, size, color):
+        self.id = obj_id
+        self.x = x
+        self.y = y
+        self.size = size
+        self.color = color
+
+class ReplayGrid:
+    """Сетка еды в воспроизведении с теми же полями, что читает отрисовка FoodGrid."""
+    def __init__(self, map_obj, cols, rows, capacity):
+        import numpy as np
+
+        self.cols, self.rows, self.capacity = cols, rows, capacity
+        self.cell_width = map_obj.width / cols
+        self.cell_height = map_obj.height / rows
+        self.biomass = np.zeros((rows, cols))
+        self.levels = None
+        self.version = 0
+
+    def load(self, levels):
+        import numpy as np
+
+        self.levels = levels
+        self.biomass[...] = np.frombuffer(levels, dtype='uint8').reshape(self.rows, self.cols)
+        self.biomass *= self.capacity / GRID_LEVELS
+        self.version += 1
+
+class ReplayWorld:
+    """Состояние записанного прогона в одном кадре.
+
+    Предоставляет то же, что отрисовка берет у Ecosystem (карта, смена дня и ночи,
+    индексы еды, воды и особей, static_version), поэтому ее рисует обычный Renderer.
+    """
+    def __init__(self, keyframe):
+        self.food_color, self.food_size, self.water_color = Food.color, Food.size, Water.color
+        width, height, tile_size = keyframe['map']
+        self.map = Map(width, height, tile_size)
+        day_length, night_length, transition_duration, timer = keyframe['cycle']
+        self.day_night_cycle = DayNightCycle(day_length, night_length, transition_duration)
+        self.day_night_cycle.timer = timer
+        self.tick = keyframe['tick']
+        self.static_version = 0
+        self.max_entity_size = 0
+        self.species_colors = dict(keyframe['species'])
+        self.agents = []
+        self.species_indexes = {}
+        self.resources = {}
+        self.resource_index = SpatialHash(self.map, tile_size)
+        self.water_sources = []
+        self.water_index = SpatialHash(self.map, tile_size)
+        self.food_grid = None
+        x, y, sizes = array('i'), array('i'), array('i')
+        x.frombytes(keyframe['x'])
+        y.frombytes(keyframe['y'])
+        sizes.frombytes(keyframe['size'])
+        self.x, self.y, self.sizes = list(x), list(y), list(sizes)
+        for obj_id, species in zip(keyframe['ids'], keyframe['kinds']):
+            self.agents.append(ReplayAgent(obj_id, species, self.species_colors[species]))
+        self.place_agents(keyframe['flags'], inserted=0)
+        for food_id, food_x, food_y in keyframe['food']:
+            self.add_food(food_id, food_x, food_y)
+        self.set_water(keyframe['water'])
+        if keyframe['grid'] is not None:
+            cols, rows, capacity, levels = keyframe['grid']
+            self.food_grid = ReplayGrid(self.map, cols, rows, capacity)
+            self.food_grid.load(levels)
+
+    def keyframe(self):
+        """Текущее состояние в виде ключевого кадра (ReplayWorld(world.keyframe()) восстанавливает его)."""
+        cycle = self.day_night_cycle
+        grid = self.food_grid
+        return {
+            'tick': self.tick,
+            'map': (self.map.width, self.map.height, self.map.tile_size),
+            'cycle': (cycle.day_length, cycle.night_length, cycle.transition_duration, cycle.timer),
+            'species': dict(self.species_colors),
+            'ids': [agent.id for agent in self.agents],
+            'kinds': [agent.species for agent in self.agents],
+            'x': array('i', self.x).tobytes(),
+            'y': array('i', self.y).tobytes(),
+            'size': array('i', self.sizes).tobytes(),
+            'flags': bytes(agent.flags for agent in self.agents),
+            'food': [(food.id, food.x, food.y) for food in self.resources.values()],
+            'water': [(water.id, water.x, water.y, water.size) for water in self.water_sources],
+            'grid': None if grid is None else (grid.cols, grid.rows, grid.capacity, grid.levels),
+        }
+
+    def species_index(self, species):
+        index = self.species_indexes.get(species)
+        if index is None:
+            index = self.species_indexes[species] = SpatialHash(self.map, self.map.tile_size)
+        return index
+
+    def place_agents(self, flags, inserted):
+        """Переносит координаты и флаги в особей; особи с номера inserted добавляются в индексы."""
+        scale = RECORD_SCALE
+        for i, agent in enumerate(self.agents):
+            agent.x = self.x[i] / scale
+            agent.y = self.y[i] / scale
+            agent.size = self.sizes[i] / scale
+            agent.flags = flags[i]
+            if agent.size > self.max_entity_size:
+                self.max_entity_size = agent.size
+            if i >= inserted:
+                self.species_index(agent.species).insert(agent)
+            else:
+                self.species_indexes[agent.species].move(agent)
+
+    def add_food(self, food_id, x, y):
+        food = self.resources[food_id] = ReplayResource(food_id, x, y, self.food_size, self.food_color)
+        self.resource_index.insert(food)
+
+    def set_water(self, table):
+        for water in self.water_sources:
+            self.water_index.remove(water)
+        self.water_sources = [ReplayResource(*row, self.water_color) for row in table]
+        for water in self.water_sources:
+            self.water_index.insert(water)
+
+    def apply(self, frame):
+        """Переходит к следующему кадру, применяя записанные изменения."""
+        self.tick += 1
+        self.day_night_cycle.timer = frame['timer']
+        died = frame['died']
+        if died:
+            gone = set(died)
+            keep = [i for i, agent in enumerate(self.agents) if agent.id not in gone]
+            for agent in self.agents:
+                if agent.id in gone:
+                    self.species_indexes[agent.species].remove(agent)
+            self.agents = [self.agents[i] for i in keep]
+            self.x = [self.x[i] for i in keep]
+            self.y = [self.y[i] for i in keep]
+            self.sizes = [self.sizes[i] for i in keep]
+        inserted = len(self.agents)
+        for obj_id, species, color in frame['born']:
+            self.species_colors.setdefault(species, color)
+            self.agents.append(ReplayAgent(obj_id, species, color))
+        accumulate(self.x, frame['x'])
+        accumulate(self.y, frame['y'])
+        accumulate(self.sizes, frame['size'])
+        self.place_agents(frame['flags'], inserted)
+        if 'eaten' in frame:
+            for food_id in frame['eaten']:
+                self.resource_index.remove(self.resources.pop(food_id))
+            for food_id, x, y in frame['spawned']:
+                self.add_food(food_id, x, y)
+            self.static_version += 1
+        if 'water' in frame:
+            self.set_water(frame['water'])
+        if 'grid' in frame:
+            self.food_grid.load(frame['grid'])
+
+    def count(self, species):
+        """Число особей вида (по имени) в кадре."""
+        return len(self.species_indexes.get(species, ()))
+
+    def entities_in_rect(self, left, top, right, bottom):
+        found = []
+        for index in self.species_indexes.values():
+            found.extend(index.query_rect(left, top, right, bottom))
+        return found
+
+    def entities_near(self, x, y, radius):
+        found = []
+        for index in self.species_indexes.values():
+            found.extend(index.query(x, y, radius))
+        return found
+
+class Replay:
+    """Чтение файла записи с переходом к любому кадру.
+
+    Кадры нумеруются подряд от 0 до len(replay) - 1; номер тика экосистемы
+    в кадре - world.tick.
+    """
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            self.data = file.read()
+        magic, version = HEADER.unpack_from(self.data)
+        if magic != MAGIC:
+            raise ValueError("Файл не является записью экосистемы")
+        if version != VERSION:
+            raise ValueError(f"Неподдерживаемая версия записи: {version}")
+        # Начало каждого блока: (номер первого кадра, число кадров, смещение данных, длина данных).
+        self.chunks = []
+        offset = HEADER.size
+        frames = 0
+        while offset < len(self.data):
+            count, length = CHUNK_HEADER.unpack_from(self.data, offset)
+            offset += CHUNK_HEADER.size
+            self.chunks.append((frames, count, offset, length))
+            frames += count
+            offset += length
+        self.length = frames
+        self.chunk_number = None
+        self.frames = None
+        # Состояния текущего блока: номер кадра в блоке -> ключевой кадр.
+        self.checkpoints = {}
+        self.world = None
+        self.position = None
+
+    def __len__(self):
+        return self.length
+
+    def load_chunk(self, number):
+        _, _, offset, length = self.chunks[number]
+        self.chunk_number = number
+        self.frames = marshal.loads(zlib.decompress(self.data[offset:offset + length]))
+        self.checkpoints = {0: self.frames[0]}
+        self.world = None
+
+    def seek(self, position):
+        """Возвращает ReplayWorld в кадре position.
+
+        Вперед - применением изменений, назад (и вперед за уже запомненную точку) - с
+        ближайшего запомненного состояния блока не позже position, поэтому шаг назад
+        стоит не больше SEEK_CHECKPOINT_FRAMES кадров.
+        """
+        position = min(max(position, 0), self.length - 1)
+        number = self.chunk_number
+        if number is None or not self.chunks[number][0] <= position < self.chunks[number][0] + self.chunks[number][1]:
+            number = next(i for i, chunk in enumerate(self.chunks) if chunk[0] <= position < chunk[0] + chunk[1])
+            self.load_chunk(number)
+        first = self.chunks[number][0]
+        target = position - first
+        start = max(frame for frame in self.checkpoints if frame <= target)
+        if self.world is None or position < self.position or first + start > self.position:
+            self.world = ReplayWorld(self.checkpoints[start])
+            self.position = first + start
+        for frame in range(self.position - first + 1, target + 1):
+            self.world.apply(self.frames[frame])
+            if frame % SEEK_CHECKPOINT_FRAMES == 0 and frame not in self.checkpoints:
+                self.checkpoints[frame] = self.world.keyframe()
+        self.position = position
+        return self.world
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import time
+
+    from simulation import (WIDTH, HEIGHT, INITIAL_HERBIVORE_COUNT, INITIAL_PREDATOR_COUNT, INITIAL_FOOD_COUNT,
+                            FIXED_DT, Ecosystem)
+
+    parser = argparse.ArgumentParser(description="Запись прогона без отрисовки для последующего просмотра.")
+    parser.add_argument("output", help="файл записи")
+    parser.add_argument("--ticks", type=int, default=10000, help="число тиков симуляции")
+    parser.add_argument("--width", type=int, default=WIDTH, help="ширина карты")
+    parser.add_argument("--height", type=int, default=HEIGHT, help="высота карты")
+    parser.add_argument("--herbivores", type=int, default=INITIAL_HERBIVORE_COUNT, help="начальное число травоядных")
+    parser.add_argument("--predators", type=int, default=INITIAL_PREDATOR_COUNT, help="начальное число хищников")
+    parser.add_argument("--food", type=int, default=INITIAL_FOOD_COUNT, help="начальное количество еды")
+    parser.add_argument("--seed", type=int, default=None, help="зерно генератора случайных чисел")
+    parser.add_argument("--chunk", type=int, default=RECORD_CHUNK_TICKS, help="число тиков в сжатом блоке")
+    parser.add_argument("--food-grid", action="store_true", help="хранить еду сеткой биомассы (нужен NumPy)")
+    args = parser.parse_args()
+
+    ecosystem = Ecosystem(args.width, args.height, seed=args.seed, food_mode="grid" if args.food_grid else None)
+    ecosystem.populate(args.herbivores, args.predators, args.food)
+    started = time.perf_counter()
+    with Recorder(args.output, args.chunk) as recorder:
+        recorder.capture(ecosystem)
+        for _ in range(args.ticks):
+            ecosystem.step(FIXED_DT)
+            recorder.capture(ecosystem)
+    elapsed = time.perf_counter() - started
+    print(f"{args.ticks} тиков записано за {elapsed:.2f} с в {args.output} ({os.path.getsize(args.output)} байт)")
@@ -0,0 +1,1951 @@
+"""Ядро симуляции экосистемы, не зависящее от pygame и дисплея."""
+import json
+import random
+import math
+import time
+from collections import deque
+from operator import attrgetter
+
+WIDTH = 800
+HEIGHT = 600
+TICK_RATE = 60
+FIXED_DT = 1 / TICK_RATE
+TILE_SIZE = 20
+
+DAY_LENGTH = 200
+NIGHT_LENGTH = 130
+DAY_COLOR = (144, 238, 144)
+NIGHT_COLOR = (0, 0, 20)
+TRANSITION_DURATION = 10
+
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+RED = (255, 0, 0)
+GREEN = (0, 255, 0)
+BLUE = (0, 0, 255)
+BROWN = (139, 69, 19)
+YELLOW = (255, 255, 0)
+
+INITIAL_HERBIVORE_COUNT = 18
+INITIAL_PREDATOR_COUNT = 8
+INITIAL_FOOD_COUNT = 100
+
+FOOD_SPAWN_PROBABILITY = 0.002
+
+# Сетка еды (food_mode="grid"): размер клетки, наибольшая биомасса клетки (в порциях,
+# одна порция насыщает как одна еда), скорость отрастания за секунду, доля биомассы
+# соседних клеток, от которой прорастает трава, как часто (в секундах) считается
+# отрастание, сколько травоядное съедает за раз, как далеко ищет траву и сколько
+# травы должно быть в клетке, чтобы к ней стоило идти.
+FOOD_GRID_CELL_SIZE = TILE_SIZE
+FOOD_GRID_CAPACITY = 1.0
+FOOD_GRID_REGROWTH_RATE = 0.02
+FOOD_GRID_SPREAD = 0.25
+FOOD_GRID_REGROW_INTERVAL = 1.0
+FOOD_GRID_BITE = 1.0
+FOOD_GRID_SEARCH_RADIUS = 300
+FOOD_GRID_MIN_BIOMASS = 0.5
+THREAT_CELL_SIZE = 50
+# Во сколько раз проверка расстояния до объекта SpatialHash дороже просмотра ячейки окна:
+# query перебирает все объекты индекса, только если окно вокруг точки обошлось бы дороже.
+SPATIAL_SCAN_COST = 8
+# Размер ячейки индекса воды: водоемы крупнее особей и редки, поэтому ячейки больше клетки карты.
+WATER_CELL_SIZE = 100
+
+# Уровень детализации (LOD): наибольший шаг поведения далекой особи в секундах,
+# расстояние до области фокуса с полной детализацией и шаг, с которым растет интервал.
+LOD_ERROR_BUDGET = 0.25
+LOD_NEAR_DISTANCE = 200
+LOD_BAND = 400
+
+# Поиск целей: как часто особь может пересматривать цель (в секундах) и сколько
+# пересмотров допускается за тик на всю экосистему.
+DECISION_INTERVAL = 0.5
+DECISION_BUDGET = 256
+# Сколько сдвигов от соседних водоемов за тик учитывает поиск воды поблизости в avoid_water.
+WATER_AVOIDANCE_MARGIN = 4
+
+# Причины смерти особи, которые передаются в Ecosystem.remove_entity.
+DEATH_CAUSES = ('age', 'starvation', 'thirst', 'predation')
+
+# Направления отталкивания от краев карты, которые возвращает Entity.avoid_edges.
+EDGE_RIGHT, EDGE_LEFT, EDGE_DOWN, EDGE_UP = (1.0, 0.0), (-1.0, 0.0), (0.0, 1.0), (0.0, -1.0)
+
+# Расписания активности вида: (активен ли днем, активен ли ночью). Вне активной фазы
+# особь засыпает, а голод и жажда растут вчетверо медленнее.
+ACTIVITY_SCHEDULES = {'diurnal': (True, False), 'nocturnal': (False, True), 'cathemeral': (True, True)}
+
+# Реестр видов: имя -> класс вида. Заполняется встроенными видами ниже и register_species.
+SPECIES = {}
+# Описания видов, заданные через register_species (для снимков и процессов тайлов).
+SPECIES_CONFIG = {}
+# Пороги, которые считаются от пределов вида (как в телах классов): порог -> (предел, доля).
+# register_species пересчитывает их при смене предела, если порог не задан явно.
+DERIVED_THRESHOLDS = {
+    'hunger_threshold_eat': ('max_hunger', 1 / 4),
+    'thirst_threshold_drink': ('max_thirst', 1 / 4),
+    'reproduction_threshold': ('time_to_reproduce', 1 / 2),
+    'hunger_desperation_threshold': ('max_hunger', 0.75),
+}
+
+def distance(x1, y1, x2, y2):
+    return math.sqrt((x2 - x1)**2 + (y2 - y1)**2)
+
+def normalize(x, y):
+    magnitude = math.sqrt(x**2 + y**2)
+    if magnitude == 0:
+        return 0, 0
+    return x / magnitude, y / magnitude
+
+class Vector2:
+    """Двумерный вектор без зависимости от pygame."""
+    __slots__ = ('x', 'y')
+
+    def __init__(self, x=0.0, y=0.0):
+        self.x = x
+        self.y = y
+
+    def __iter__(self):
+        yield self.x
+        yield self.y
+
+    def __getitem__(self, index):
+        return (self.x, self.y)[index]
+
+    def __len__(self):
+        return 2
+
+    def __eq__(self, other):
+        return tuple(self) == tuple(other)
+
+    def __bool__(self):
+        return self.x != 0 or self.y != 0
+
+    def __add__(self, other):
+        return Vector2(self.x + other[0], self.y + other[1])
+
+    def __sub__(self, other):
+        return Vector2(self.x - other[0], self.y - other[1])
+
+    def __mul__(self, scalar):
+        return Vector2(self.x * scalar, self.y * scalar)
+
+    __rmul__ = __mul__
+
+    def __iadd__(self, other):
+        self.x += other[0]
+        self.y += other[1]
+        return self
+
+    def __isub__(self, other):
+        self.x -= other[0]
+        self.y -= other[1]
+        return self
+
+    def __repr__(self):
+        return f"Vector2({self.x}, {self.y})"
+
+    def length(self):
+        return math.sqrt(self.x * self.x + self.y * self.y)
+
+    def normalize(self):
+        magnitude = self.length()
+        if magnitude == 0:
+            raise ValueError("Нельзя нормализовать нулевой вектор")
+        return Vector2(self.x / magnitude, self.y / magnitude)
+
+def append_indexed(items, item):
+    """Добавляет item в конец списка, запоминая его позицию."""
+    item._index = len(items)
+    items.append(item)
+
+def swap_remove(items, item):
+    """Удаляет item из списка за O(1), ставя на его место последний элемент."""
+    index = item._index
+    last = items.pop()
+    if last is not item:
+        items[index] = last
+        last._index = index
+
+def lerp_color(color1, color2, t):
+    r = int(max(0, min(255, color1[0] + (color2[0] - color1[0]) * t)))
+    g = int(max(0, min(255, color1[1] + (color2[1] - color1[1]) * t)))
+    b = int(max(0, min(255, color1[2] + (color2[2] - color1[2]) * t)))
+    return (r, g, b)
+
+def wrapped_delta(a, b, size):
+    """Кратчайшая разность b - a по оси длиной size с учетом переноса через край."""
+    d = (b - a) % size
+    if d > size / 2:
+        d -= size
+    return d
+
+class Map:
+    def __init__(self, width, height, tile_size):
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+
+    def delta(self, x1, y1, x2, y2):
+        """Кратчайший вектор от (x1, y1) к (x2, y2) на торе карты."""
+        return wrapped_delta(x1, x2, self.width), wrapped_delta(y1, y2, self.height)
+
+    def distance(self, x1, y1, x2, y2):
+        """Расстояние между точками с учетом переноса через границы карты."""
+        dx, dy = self.delta(x1, y1, x2, y2)
+        return math.sqrt(dx * dx + dy * dy)
+
+class SpatialHash:
+    """Равномерная сетка для поиска соседей на торе карты."""
+    def __init__(self, map_obj, cell_size):
+        self.map = map_obj
+        self.cols = max(1, int(map_obj.width // cell_size))
+        self.rows = max(1, int(map_obj.height // cell_size))
+        # Ячейки растягиваются, чтобы сетка ровно покрывала тор.
+        self.cell_width = map_obj.width / self.cols
+        self.cell_height = map_obj.height / self.rows
+        self.min_cell = min(self.cell_width, self.cell_height)
+        self.cells = {}
+        self.item_cells = {}
+
+    def __len__(self):
+        return len(self.item_cells)
+
+    def cell_of(self, x, y):
+        return int(x // self.cell_width) % self.cols, int(y // self.cell_height) % self.rows
+
+    def insert(self, item):
+        key = self.cell_of(item.x, item.y)
+        self.cells.setdefault(key, []).append(item)
+        self.item_cells[item] = key
+
+    def remove(self, item):
+        key = self.item_cells.pop(item, None)
+        if key is None:
+            return
+        bucket = self.cells[key]
+        bucket.remove(item)
+        if not bucket:
+            del self.cells[key]
+
+    def move(self, item):
+        """Перекладывает объект в новую ячейку после перемещения."""
+        old_key = self.item_cells.get(item)
+        if old_key is None:
+            return
+        key = self.cell_of(item.x, item.y)
+        if key != old_key:
+            bucket = self.cells[old_key]
+            bucket.remove(item)
+            if not bucket:
+                del self.cells[old_key]
+            self.cells.setdefault(key, []).append(item)
+            self.item_cells[item] = key
+
+    def _window(self, x, y, radius):
+        """Ячейки-кандидаты в квадрате, описанном вокруг круга радиуса radius."""
+        rx = int(math.ceil(radius / self.cell_width))
+        ry = int(math.ceil(radius / self.cell_height))
+        if (2 * rx + 1) * (2 * ry + 1) >= SPATIAL_SCAN_COST * len(self.item_cells):
+            return list(self.cells.values())
+        cx, cy = self.cell_of(x, y)
+        cols = range(cx - rx, cx + rx + 1) if 2 * rx + 1 < self.cols else range(self.cols)
+        rows = range(cy - ry, cy + ry + 1) if 2 * ry + 1 < self.rows else range(self.rows)
+        buckets = []
+        for i in cols:
+            for j in rows:
+                bucket = self.cells.get((i % self.cols, j % self.rows))
+                if bucket:
+                    buckets.append(bucket)
+        return buckets
+
+    def query(self, x, y, radius, predicate=None):
+        """Возвращает объекты не дальше radius от точки (x, y)."""
+        found = []
+        for bucket in self._window(x, y, radius):
+            for item in bucket:
+                if predicate is not None and not predicate(item):
+                    continue
+                if self.map.distance(x, y, item.x, item.y) <= radius:
+                    found.append(item)
+        return found
+
+    def query_rect(self, left, top, right, bottom):
+        """Возвращает объекты внутри прямоугольника [left, right) x [top, bottom) карты (без переноса через края)."""
+        first_col = max(0, int(left // self.cell_width))
+        last_col = min(self.cols - 1, int(right // self.cell_width))
+        first_row = max(0, int(top // self.cell_height))
+        last_row = min(self.rows - 1, int(bottom // self.cell_height))
+        if last_col < first_col or last_row < first_row:
+            return []
+        if (last_col - first_col + 1) * (last_row - first_row + 1) >= len(self.cells):
+            buckets = self.cells.values()
+        else:
+            buckets = []
+            for i in range(first_col, last_col + 1):
+                for j in range(first_row, last_row + 1):
+                    bucket = self.cells.get((i, j))
+                    if bucket:
+                        buckets.append(bucket)
+        return [item for bucket in buckets for item in bucket
+                if left <= item.x < right and top <= item.y < bottom]
+
+    def nearest(self, x, y, predicate=None, max_distance=float('inf')):
+        """Находит ближайший объект, удовлетворяющий predicate, поиском по кольцам ячеек."""
+        closest = None
+        min_distance = float('inf')
+        cx, cy = self.cell_of(x, y)
+        max_ring = max(self.cols, self.rows) // 2 + 1
+        ring = 0
+        while ring <= max_ring:
+            # Любая точка кольца ring не ближе (ring - 1) ячеек от точки запроса.
+            if (ring - 1) * self.min_cell > min(min_distance, max_distance):
+                break
+            if 8 * ring >= len(self.cells):
+                buckets = self.cells.values()
+                ring = max_ring
+            else:
+                buckets = self._ring(cx, cy, ring)
+            for bucket in buckets:
+                for item in bucket:
+                    if predicate is not None and not predicate(item):
+                        continue
+                    dist = self.map.distance(x, y, item.x, item.y)
+                    if dist < min_distance and dist <= max_distance:
+                        min_distance = dist
+                        closest = item
+            ring += 1
+        return closest
+
+    def _ring(self, cx, cy, ring):
+        if ring == 0:
+            bucket = self.cells.get((cx, cy))
+            return [bucket] if bucket else []
+        keys = []
+        for i in range(cx - ring, cx + ring + 1):
+            keys.append((i, cy - ring))
+            keys.append((i, cy + ring))
+        for j in range(cy - ring + 1, cy + ring):
+            keys.append((cx - ring, j))
+            keys.append((cx + ring, j))
+        buckets = []
+        seen = set()
+        for i, j in keys:
+            key = (i % self.cols, j % self.rows)
+            if key in seen:
+                continue
+            seen.add(key)
+            bucket = self.cells.get(key)
+            if bucket:
+                buckets.append(bucket)
+        return buckets
+
+class ThreatMap:
+    """Положения угроз в грубой сетке, собираемые не чаще раза за тик для быстрых проверок опасности.
+
+    Сетка строится лениво при первом запросе в тике из source() и до конца тика не меняется.
+    """
+    def __init__(self, map_obj, cell_size, source):
+        self.map = map_obj
+        self.source = source
+        self.stale = True
+        self.cols = max(1, int(map_obj.width // cell_size))
+        self.rows = max(1, int(map_obj.height // cell_size))
+        self.cell_width = map_obj.width / self.cols
+        self.cell_height = map_obj.height / self.rows
+        self.cells = {}
+
+    def invalidate(self):
+        """Помечает сетку устаревшей; она пересоберется при следующем запросе."""
+        self.stale = True
+
+    def rebuild(self):
+        """Раскладывает по ячейкам текущие положения угроз."""
+        cells = {}
+        for threat in self.source():
+            x, y = threat.x, threat.y
+            key = (int(x // self.cell_width) % self.cols, int(y // self.cell_height) % self.rows)
+            cells.setdefault(key, []).append((x, y))
+        self.cells = cells
+        self.stale = False
+
+    def nearest_distance(self, x, y, radius):
+        """Расстояние до ближайшей угрозы, которая ближе radius, или None."""
+        if self.stale:
+            self.rebuild()
+        if not self.cells:
+            return None
+        rx = min(int(math.ceil(radius / self.cell_width)), self.cols // 2)
+        ry = min(int(math.ceil(radius / self.cell_height)), self.rows // 2)
+        cx = int(x // self.cell_width)
+        cy = int(y // self.cell_height)
+        closest = None
+        for i in range(cx - rx, cx + rx + 1):
+            for j in range(cy - ry, cy + ry + 1):
+                for tx, ty in self.cells.get((i % self.cols, j % self.rows), ()):
+                    dist = self.map.distance(x, y, tx, ty)
+                    if dist < radius and (closest is None or dist < closest):
+                        closest = dist
+        return closest
+
+class DecisionScheduler:
+    """Распределяет поиск целей особей по тикам.
+
+    Каждая особь получает свой квант: пересматривать цель она может не чаще раза
+    в interval секунд, причем моменты пересмотра у разных особей сдвинуты по id.
+    Кроме того, за тик на всю экосистему разрешается не больше budget пересмотров;
+    особь, которой не хватило бюджета, сохраняет текущую цель и пробует в следующем тике.
+    """
+    def __init__(self, interval=DECISION_INTERVAL, budget=DECISION_BUDGET):
+        self.interval = interval
+        self.budget = budget
+        self.tick = 0
+        self.interval_ticks = 1
+        self.remaining = budget
+        self.granted = 0
+        self.deferred = 0
+
+    def start(self, tick, dt):
+        """Начинает тик: восстанавливает бюджет."""
+        self.tick = tick
+        self.interval_ticks = max(1, round(self.interval / dt))
+        self.remaining = self.budget
+
+    def allow(self, entity):
+        """Может ли особь искать цель в этом тике; внутри тика ответ для особи не меняется."""
+        tick = self.tick
+        last = entity.decision_tick
+        if last == tick:
+            return True
+        # Особь ждет либо полный интервал, либо своего тика в цикле длиной interval.
+        if (last is not None and tick - last < self.interval_ticks
+                and (tick + entity.id) % self.interval_ticks):
+            return False
+        if self.remaining <= 0:
+            self.deferred += 1
+            return False
+        self.remaining -= 1
+        self.granted += 1
+        entity.decision_tick = tick
+        return True
+
+class LevelOfDetail:
+    """Планировщик уровня детализации: далекие особи обновляют поведение реже и с большим dt.
+
+    Жизненные показатели (сон, возраст, голод, жажда, здоровье) по-прежнему считаются
+    каждый тик, поэтому метаболизм и гибель точны; реже выполняются поиск целей,
+    блуждание, движение и избегание краев. Особь обновляется каждый тик, если она
+    ближе near_distance к одной из областей focus (например, видимой области камеры)
+    или занята взаимодействием: преследует добычу или партнера, пьет, убегает или ест.
+    Дальше интервал растет на тик через каждые band пикселей, но шаг поведения не
+    превышает error_budget секунд. Интервал назначается после каждого обновления особи,
+    поэтому смена фокуса или начало взаимодействия учитываются не позже чем через
+    error_budget. Особи с одинаковым интервалом обновляются в разные тики, чтобы
+    нагрузка не собиралась в один кадр.
+    """
+    def __init__(self, error_budget=LOD_ERROR_BUDGET, near_distance=LOD_NEAR_DISTANCE, band=LOD_BAND):
+        self.error_budget = error_budget
+        self.near_distance = near_distance
+        self.band = band
+        self.focus = []
+        self.updates = 0
+        self.skips = 0
+
+    @staticmethod
+    def engaged(entity):
+        """Занята ли особь взаимодействием, которое нужно считать каждый тик."""
+        return (entity.is_drinking or entity.is_escaping or entity.reproductive_ready
+                or isinstance(entity.target, Entity) or getattr(entity, 'is_eating_cross', False))
+
+    def focus_distance(self, x, y):
+        """Расстояние от точки до ближайшей области фокуса (left, top, right, bottom)."""
+        closest = float('inf')
+        for left, top, right, bottom in self.focus:
+            dx = max(left - x, 0, x - right)
+            dy = max(top - y, 0, y - bottom)
+            closest = min(closest, math.sqrt(dx * dx + dy * dy))
+        return closest
+
+    def interval(self, entity, dt):
+        """Через сколько тиков обновляется поведение особи."""
+        max_interval = max(1, int(self.error_budget / dt + 1e-9))
+        if max_interval == 1 or self.engaged(entity):
+            return 1
+        far = self.focus_distance(entity.x, entity.y) - self.near_distance
+        if far <= 0:
+            return 1
+        return min(max_interval, 2 + int(far // self.band))
+
+    def step(self, entity, tick, dt):
+        """Шаг поведения особи в этом тике (прошедшее с ее прошлого обновления время) или None."""
+        if tick < entity.next_update_tick:
+            self.skips += 1
+            return None
+        elapsed = 1 if entity.updated_tick is None else tick - entity.updated_tick
+        entity.updated_tick = tick
+        self.updates += 1
+        return elapsed * dt
+
+    def schedule(self, entity, tick, dt):
+        """Назначает следующее обновление особи после обновления в тике tick."""
+        interval = self.interval(entity, dt)
+        next_tick = tick + 1
+        # Сдвиг по id разводит особей с одинаковым интервалом по разным тикам.
+        entity.next_update_tick = next_tick + (-(next_tick + entity.id)) % interval
+
+class EatingCross:
+    __slots__ = ('x', 'y', 'hunger', 'timer', '_watchers')
+    color = YELLOW
+    max_timer = 60
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self.hunger = 100
+        self.timer = 0
+        self._watchers = None
+
+    def update(self, dt):
+        self.timer += dt
+
+class DayNightCycle:
+    def __init__(self, day_length, night_length, transition_duration):
+        self.day_length = day_length
+        self.night_length = night_length
+        self.transition_duration = transition_duration
+        self.cycle_duration = day_length + night_length + 2 * transition_duration
+        self.timer = 0
+        self.time_scale = 1
+
+    def update(self, dt):
+        self.timer = (self.timer + dt * self.time_scale) % self.cycle_duration
+
+    def ticks_for_cycles(self, cycles, dt):
+        """Число тиков длительностью dt, за которое пройдет cycles полных суток."""
+        return math.ceil(cycles * self.cycle_duration / (dt * self.time_scale))
+
+    def get_time_progress(self):
+        return self.timer / self.cycle_duration
+
+    def is_day(self):
+        return self.transition_duration <= self.timer <= (self.transition_duration + self.day_length)
+
+    def get_background_color(self):
+        time_progress = self.timer
+
+        if time_progress < self.transition_duration:
+            t = time_progress / self.transition_duration
+            t = (math.sin(t * math.pi / 2))
+            return lerp_color(NIGHT_COLOR, DAY_COLOR, t)
+        elif time_progress < self.transition_duration + self.day_length:
+            return DAY_COLOR
+        elif time_progress < self.transition_duration + self.day_length + self.transition_duration:
+            t = (time_progress - self.transition_duration - self.day_length) / self.transition_duration
+            t = (math.sin(t * math.pi / 2))
+            return lerp_color(DAY_COLOR, NIGHT_COLOR, t)
+        else:
+            return NIGHT_COLOR
+
+class Entity:
+    """Базовый класс для всех сущностей в экосистеме.
+
+    Изменяемое состояние особи хранится в __slots__, а постоянные параметры вида
+    (профиль вида: пределы, скорости, пороги, дальности) - в атрибутах класса,
+    общих для всех особей вида.
+    """
+    __slots__ = (
+        'id', 'alive', '_index', 'position', 'move_direction', 'speed', 'size', 'max_size',
+        'health', 'hunger', 'thirst', 'sleep', 'is_asleep', 'age', 'growth_time', 'is_baby',
+        '_target', '_watchers', 'reproductive_drive', 'reproductive_ready', 'reproduction_cooldown',
+        'wander_timer', 'wander_interval', 'wander_target', 'is_drinking', 'drink_timer',
+        'is_escaping', 'escape_timer', 'wake_up_delay', 'avoid_predator_timer', 'updated_tick',
+        'next_update_tick', 'decision_tick',
+    )
+    # Поведение вида: расписание активности (ключ ACTIVITY_SCHEDULES), имена видов,
+    # на которых он охотится, и подпись в интерфейсе. Из них compile_behaviour
+    # собирает таблицы schedule и prey.
+    activity = 'diurnal'
+    diet = ()
+    title = 'Entity'
+    # Профиль вида.
+    max_speed = 0
+    initial_size = 10
+    max_health = 100
+    max_hunger = 100
+    max_thirst = 100
+    max_sleep = 100
+    max_age = None
+    color = WHITE
+    time_to_reproduce = 400
+    energy_loss_rate = 0.08
+    thirst_loss_rate = 0.2
+    baby_growth_rate = 0.01
+    edge_avoidance_distance = 40
+    hunger_threshold_eat = max_hunger / 4
+    thirst_threshold_drink = max_thirst / 4
+    reproduction_threshold = time_to_reproduce / 2
+    max_drink_time = 3
+    escape_duration = 2
+    reproduction_cooldown_max = 100
+    avoidance_distance = 100
+    fleeing_speed_multiplier = 1.5
+    avoid_predator_duration = 20
+    # Дистанция, на которой особь замечает охотников на свой вид (None - не замечает).
+    fear_distance = None
+    # Наибольшая численность вида, при которой он еще размножается.
+    max_population = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.derive_thresholds()
+        cls.compile_behaviour()
+
+    @classmethod
+    def derive_thresholds(cls):
+        """Пересчитывает унаследованные пороги DERIVED_THRESHOLDS от пределов, заданных в самом классе.
+
+        Порог, заданный в классе явно, остается как есть.
+        """
+        own = vars(cls)
+        for threshold, (limit, share) in DERIVED_THRESHOLDS.items():
+            if limit in own and threshold not in own and hasattr(cls, threshold):
+                setattr(cls, threshold, own[limit] * share)
+
+    @classmethod
+    def compile_behaviour(cls):
+        """Собирает таблицы поведения вида из его профиля.
+
+        schedule[is_day] - (активен ли вид, скорость роста голода, скорость роста жажды),
+        prey - классы видов из diet (еще не зарегистрированные пропускаются). Тик берет
+        поведение из этих таблиц, не проверяя тип особи.
+        """
+        try:
+            phases = ACTIVITY_SCHEDULES[cls.activity]
+        except KeyError:
+            raise ValueError(f"Неизвестное расписание активности: {cls.activity}") from None
+        cls.schedule = {}
+        for is_day, active in zip((True, False), phases):
+            if active:
+                cls.schedule[is_day] = (True, cls.energy_loss_rate, cls.thirst_loss_rate)
+            else:
+                cls.schedule[is_day] = (False, cls.energy_loss_rate / 4, cls.thirst_loss_rate / 4)
+        cls.prey = tuple(SPECIES[name] for name in cls.diet if name in SPECIES)
+
+    def __init__(self, x, y, rng=random):
+        self.id = None
+        self.alive = False
+        self._index = None
+        self.position = Vector2(x, y)
+        self.speed = self.max_speed
+        self.size = self.initial_size
+        self.max_size = self.initial_size
+        self.health = self.max_health
+        self.hunger = 0
+        self.thirst = 0
+        self.sleep = 0
+        self.is_asleep = False
+        self._target = None
+        self._watchers = None
+        self.reproductive_drive = 0
+        self.reproductive_ready = False
+        self.wander_timer = 0
+        self.wander_interval = rng.randint(3, 8)
+        self.wander_target = None
+        self.is_baby = False
+        self.is_drinking = False
+        self.drink_timer = 0
+        self.is_escaping = False
+        self.escape_timer = 0
+        self.reproduction_cooldown = 0
+        self.age = 0
+        self.growth_time = 0
+        self.move_direction = Vector2(rng.uniform(-1, 1), rng.uniform(-1, 1))
+        self.wake_up_delay = 0
+        self.avoid_predator_timer = 0
+        self.updated_tick = None
+        self.next_update_tick = 0
+        self.decision_tick = None
+
+    @property
+    def x(self):
+        return self.position.x
+
+    @x.setter
+    def x(self, value):
+        self.position.x = value
+
+    @property
+    def y(self):
+        return self.position.y
+
+    @y.setter
+    def y(self, value):
+        self.position.y = value
+
+    def set_target(self, value):
+        # Цель помнит всех, кто к ней идет, чтобы при удалении сразу сбросить им цель.
+        old = self._target
+        if old is value:
+            return
+        if old is not None and type(old) is not tuple:
+            old._watchers.pop(self, None)
+        self._target = value
+        if value is not None and type(value) is not tuple:
+            if value._watchers is None:
+                value._watchers = {}
+            value._watchers[self] = None
+
+    # Чтение цели идет прямо из слота, без вызова Python-функции.
+    target = property(attrgetter('_target'), set_target,
+                      doc="Цель особи: объект, к которому она идет, точка (x, y) или None.")
+
+    def target_lost(self, ecosystem):
+        """Вызывается, когда цель особи удалена из экосистемы: особь сможет искать новую сразу."""
+        self.target = None
+        self.decision_tick = None
+
+    def death_cause(self):
+        """Причина смерти особи, чьи показатели дошли до смертельных (для пакетной проверки бэкенда)."""
+        if self.max_age is not None and self.age >= self.max_age:
+            return 'age'
+        if self.health <= 0 and self.hunger >= self.max_hunger:
+            return 'starvation'
+        return 'thirst'
+
+    @property
+    def rect(self):
+        """Ограничивающий прямоугольник (x, y, ширина, высота) для столкновений."""
+        return (int(self.position.x - self.size), int(self.position.y - self.size), 2 * self.size, 2 * self.size)
+
+    def update(self, dt, ecosystem):
+        """Обновляет состояние сущности: жизненные показатели за тик, затем поведение за dt."""
+        is_day = ecosystem.day_night_cycle.is_day()
+
+        # Жизненные показатели считаются за один тик у каждой живой особи до ее поведения:
+        # так же, как пакетно в бэкенде и у особей, чье поведение LOD в этом тике пропускает.
+        awake = self.update_vitals(ecosystem.dt, ecosystem, is_day)
+        if self.alive:
+            self.behave(dt, ecosystem, is_day, awake)
+
+    def behave(self, dt, ecosystem, is_day, awake):
+        """Обновляет поведение сущности; awake - бодрствует ли она в этом тике (см. update_vitals)."""
+        if not awake:
+            return
+
+        if self.is_escaping:
+            self.escape_timer += dt
+            if self.escape_timer >= self.escape_duration:
+                self.is_escaping = False
+                self.escape_timer = 0
+                return
+
+        if self.is_baby:
+            if self.size < self.max_size:
+                self.size += self.baby_growth_rate * dt * 30
+            else:
+                self.is_baby = False
+
+        if self.is_drinking:
+            self.drink_timer += dt
+            if self.drink_timer >= self.max_drink_time:
+                self.is_drinking = False
+                self.drink_timer = 0
+                self.thirst = 0
+                self.target = None
+                return
+        else:
+            self.avoid_water(dt, ecosystem)
+
+        # Движение к цели
+        if self.target:
+            if isinstance(self.target, tuple):
+                target_x, target_y = self.target
+            else:
+                target_x, target_y = self.target.x, self.target.y
+
+            map_obj = ecosystem.map
+            self.steer(wrapped_delta(self.x, target_x, map_obj.width), wrapped_delta(self.y, target_y, map_obj.height))
+            self.move(dt)
+
+            if self.target and ecosystem.map.distance(self.x, self.y, target_x, target_y) <= 10:
+                self.on_target_reached(ecosystem)
+
+        else:
+            if self.schedule[is_day][0]:
+                self.wander(dt, ecosystem)
+
+            self.move(dt)
+
+        if self.reproductive_drive >= self.time_to_reproduce:
+            self.reproductive_ready = True
+
+        self.update_cooldowns(dt)
+
+        self.check_for_food_and_water(dt, ecosystem)
+        self.avoid_other_entities(dt, ecosystem, is_day)
+
+        # Добавлено: перенос через границы карты
+        self.wrap(ecosystem.map)
+
+    def update_vitals(self, dt, ecosystem, is_day):
+        """Обновляет сон, возраст, голод, жажду, здоровье и скорость.
+
+        Возвращает False, если сущность спит (в том числе ждет пробуждения) или умерла
+        и дальше в этом тике не действует.
+        """
+        active, hunger_rate, thirst_rate = self.schedule[is_day]
+        if not active:
+            self.is_asleep = True
+            self.sleep = 0
+        elif self.is_asleep:
+            # С началом своего времени особь еще wake_up_delay секунд спит, не старея,
+            # а в тик пробуждения сразу живет и действует как бодрствующая.
+            if self.wake_up_delay > 0:
+                self.wake_up_delay -= dt
+                return False
+            self.is_asleep = False
+            self.sleep = 0
+
+        self.age += dt
+
+        if self.is_asleep:
+            self.sleep += dt * 2
+            if self.sleep >= self.max_sleep:
+                self.is_asleep = False
+            return False
+
+        self.hunger += hunger_rate * dt
+        self.thirst += thirst_rate * dt
+
+        if self.hunger >= self.max_hunger or self.thirst >= self.max_thirst:
+            self.health -= 1 * dt
+
+        if self.max_age is not None and self.age >= self.max_age:
+            ecosystem.remove_entity(self, 'age')
+            return False
+
+        if self.health <= 0:
+            ecosystem.remove_entity(self, 'starvation' if self.hunger >= self.max_hunger else 'thirst')
+            return False
+
+        if self.thirst >= self.max_thirst * 1.5:
+            ecosystem.remove_entity(self, 'thirst')
+            return False
+
+        hunger_factor = min(1, self.hunger / self.max_hunger / 2)
+        speed_reduction = hunger_factor
+        current_speed = self.max_speed * (1 - speed_reduction)
+
+        if self.is_escaping:
+            current_speed = self.max_speed * self.fleeing_speed_multiplier
+
+        self.speed = current_speed
+        return True
+
+    def update_cooldowns(self, dt):
+        """Уменьшает таймер восстановления после размножения."""
+        if self.reproduction_cooldown > 0:
+            self.reproduction_cooldown -= dt
+
+    def steer(self, dx, dy):
+        """Направляет сущность вдоль (dx, dy): нормализует его прямо в move_direction."""
+        direction = self.move_direction
+        magnitude = math.sqrt(dx**2 + dy**2)
+        if magnitude == 0:
+            direction.x = 0
+            direction.y = 0
+        else:
+            direction.x = dx / magnitude
+            direction.y = dy / magnitude
+
+    def push(self, dx, dy, dt, factor=1):
+        """Сдвигает сущность на (dx, dy) * speed * dt * factor, меняя position на месте."""
+        position = self.position
+        speed = self.speed
+        if factor == 1:
+            position.x += dx * speed * dt
+            position.y += dy * speed * dt
+        else:
+            position.x += dx * speed * dt * factor
+            position.y += dy * speed * dt * factor
+
+    def repel(self, map_obj, x, y, dt, factor):
+        """Сдвигает сущность прочь от точки (x, y) на speed * dt * factor (push без промежуточных кортежей)."""
+        dx = wrapped_delta(x, self.x, map_obj.width)
+        dy = wrapped_delta(y, self.y, map_obj.height)
+        magnitude = math.sqrt(dx**2 + dy**2)
+        if magnitude != 0:
+            self.push(dx / magnitude, dy / magnitude, dt, factor)
+
+    def move(self, dt):
+        """Сдвигает сущность вдоль move_direction с текущей скоростью."""
+        direction = self.move_direction
+        self.push(direction.x, direction.y, dt)
+
+    def wrap(self, map_obj):
+        """Переносит сущность через границы карты."""
+        self.position.x = self.position.x % map_obj.width
+        self.position.y = self.position.y % map_obj.height
+
+    def avoid_other_entities(self, dt, ecosystem, is_day):
+        """Избегает столкновений с другими сущностями."""
+        pass
+
+
+    def avoid_edges(self, map_obj):
+        """Направление от ближнего края карты (dx, dy) или None, если до краев далеко."""
+        avoidance_distance = self.size + 20
+        half = self.size / 2
+        x, y = self.x, self.y
+
+        # Отталкивание идет вдоль одной оси, поэтому нормализованный вектор - это знак смещения.
+        if x - half < avoidance_distance:
+            offset, horizontal = avoidance_distance - (x - half), True
+        elif x + half > map_obj.width - avoidance_distance:
+            offset, horizontal = map_obj.width - avoidance_distance - (x + half), True
+        elif y - half < avoidance_distance:
+            offset, horizontal = avoidance_distance - (y - half), False
+        elif y + half > map_obj.height - avoidance_distance:
+            offset, horizontal = map_obj.height - avoidance_distance - (y + half), False
+        else:
+            return None
+        if offset == 0:
+            return None
+        if horizontal:
+            return EDGE_RIGHT if offset > 0 else EDGE_LEFT
+        return EDGE_DOWN if offset > 0 else EDGE_UP
+
+    def avoid_water(self, dt, ecosystem):
+        """Избегает приближения к воде, если поблизости есть хищники (для травоядных).
+
+        Кандидаты берутся из индекса воды с запасом на сдвиги от соседних водоемов
+        и обходятся в порядке списка water_sources, как при полном переборе.
+        """
+        if not self.target or not isinstance(self.target, Water):
+            if not ecosystem.water_sources:
+                return
+            map_obj = ecosystem.map
+            reach = ecosystem.max_water_size + self.size + 10 + WATER_AVOIDANCE_MARGIN * self.speed * dt * 3
+            nearby = ecosystem.water_index.query(self.x, self.y, reach)
+            if not nearby:
+                return
+            if len(nearby) > 1:
+                nearby.sort(key=attrgetter('_index'))
+            is_blocked = None
+            for water in nearby:
+                dist_to_water = map_obj.distance(self.x, self.y, water.x, water.y)
+                if dist_to_water >= water.size + self.size + 10:
+                    continue
+
+                if is_blocked is None:
+                    is_blocked = self.fear_distance is not None and ecosystem.threats(type(self)).nearest_distance(
+                        self.x, self.y, self.fear_distance) is not None
+
+                if not is_blocked:
+                    self.repel(map_obj, water.x, water.y, dt, 3)
+
+    def wander(self, dt, ecosystem):
+        """Заставляет сущность беспорядочно бродить по карте."""
+        map_obj = ecosystem.map
+        rng = ecosystem.rng
+        self.wander_timer += dt
+        if self.wander_timer >= self.wander_interval or self.wander_target is None or distance(self.x, self.y, self.wander_target[0], self.wander_target[1]) <= 10:
+            self.wander_timer = 0
+            self.wander_interval = rng.randint(3, 8)
+            self.wander_target = (rng.randint(20, map_obj.width - 20), rng.randint(20, map_obj.height - 20))
+
+        self.steer(self.wander_target[0] - self.x, self.wander_target[1] - self.y)
+        self.move(dt)
+
+    def on_target_reached(self, ecosystem):
+        """Выполняет действия, когда сущность достигает своей цели."""
+        if isinstance(self.target, Food):
+            if self.target.alive:
+                ecosystem.consume(self, self.target, 'food')
+            self.target = None
+        elif isinstance(self.target, Water):
+            self.is_drinking = True
+        elif self.target and type(self.target) is tuple:
+            self.target = None
+
+    def feed(self, meal, x, y):
+        """Насыщается едой или добычей, съеденной в точке (x, y) (см. Ecosystem.consume)."""
+        self.hunger = 0
+
+    def find_reproduction_target(self, ecosystem):
+        """Находит подходящего партнера для размножения."""
+        return ecosystem.species_index(type(self)).nearest(
+            self.x, self.y,
+            lambda entity: type(entity) == type(self) and entity != self and entity.reproductive_ready and entity.reproduction_cooldown <= 0
+        )
+
+    def find_water_target(self, ecosystem):
+        """Находит ближайший источник воды."""
+        return ecosystem.water_index.nearest(self.x, self.y)
+
+    def find_in_contact(self, ecosystem, *species):
+        """Находит ближайшую особь видов species на расстоянии касания."""
+        closest = None
+        min_distance = float('inf')
+        reach = self.size + ecosystem.max_entity_size + 10
+        for cls in species:
+            for entity in ecosystem.species_index(cls).query(self.x, self.y, reach):
+                if entity != self:
+                    dist = ecosystem.map.distance(self.x, self.y, entity.x, entity.y)
+                    if dist < min_distance and dist <= self.size + entity.size + 10:
+                        min_distance = dist
+                        closest = entity
+        return closest
+
+    def find_nearest(self, items):
+        """Находит ближайший объект из списка."""
+        nearest = None
+        min_distance = float('inf')
+        for item in items:
+            dist = distance(self.x, self.y, item.x, item.y)
+            if dist < min_distance:
+                min_distance = dist
+                nearest = item
+        return nearest
+
+    def die(self, ecosystem):
+        """Удаляет особь из экосистемы (ее съел хищник)."""
+        ecosystem.remove_entity(self, 'predation')
+
+Entity.compile_behaviour()
+
+class Predator(Entity):
+    """Класс, представляющий хищника."""
+    __slots__ = (
+        'last_target_search', 'eating_cross', 'eating_crosses', 'chase_timer', 'patrol_timer',
+        'patrol_interval', 'eat_timer', 'is_eating_cross', 'has_eaten_cross',
+    )
+    EATING_CROSS_MEMORY = 5
+    activity = 'nocturnal'
+    diet = ('Herbivore',)
+    title = 'Хищники'
+    max_population = 30
+    max_speed = 10
+    initial_size = 10
+    max_health = 100
+    max_hunger = 40
+    max_thirst = 60
+    max_age = 1800
+    color = RED
+    attack_damage = 30
+    time_to_reproduce = 25
+    # Как в исходной игре: порог размножения считается от time_to_reproduce базового Entity.
+    reproduction_threshold = Entity.reproduction_threshold
+    vision_range = 200
+    hunt_range = 120
+    target_search_interval = 2
+    hunger_threshold_attack = 6
+    max_chase_time = 30
+    eat_interval = 10
+    eat_efficiency = 0.75
+    hunger_desperation_threshold = max_hunger * 0.75
+
+    def __init__(self, x, y, rng=random):
+        """Инициализирует хищника с заданными параметрами."""
+        super().__init__(x, y, rng=rng)
+        self.last_target_search = 0
+        self.eating_cross = None
+        # Очередь последних крестиков создается только при первой добыче.
+        self.eating_crosses = None
+        self.chase_timer = 0
+        self.patrol_timer = 0
+        self.patrol_interval = rng.randint(2, 6)
+        self.eat_timer = 0
+        self.is_eating_cross = False
+        self.has_eaten_cross = True
+        self.wake_up_delay = rng.uniform(0, 50)
+
+    def target_lost(self, ecosystem):
+        """Добыча пропала: погоня прекращается."""
+        super().target_lost(ecosystem)
+        self.chase_timer = 0
+
+    def find_target(self, ecosystem, is_day):
+        """Находит цель для охоты: ближайшую особь видов из prey."""
+        if self.is_drinking or self.reproductive_ready or not self.schedule[is_day][0]:
+            return None
+
+        if self.hunger < self.hunger_threshold_attack:
+            return None
+
+        closest = None
+        min_distance = None
+        for cls in self.prey:
+            candidate = ecosystem.species_index(cls).nearest(self.x, self.y, max_distance=self.hunt_range)
+            if candidate is not None:
+                dist = ecosystem.map.distance(self.x, self.y, candidate.x, candidate.y)
+                if closest is None or dist < min_distance:
+                    closest, min_distance = candidate, dist
+        return closest
+
+    def on_target_reached(self, ecosystem):
+        """Выполняет действия, когда хищник достигает своей цели."""
+        if isinstance(self.target, self.prey) and self.hunger > self.hunger_threshold_attack:
+            self.attack(ecosystem)
+            self.target = None
+        elif isinstance(self.target, Water):
+            self.is_drinking = True
+        elif isinstance(self.target, EatingCross) and self.is_eating_cross:
+            self.try_eat(ecosystem)
+            self.target = None
+        elif self.target and self.reproductive_ready and type(self.target) == type(self):
+            self.check_reproduce(ecosystem)
+        elif self.target and type(self.target) is tuple:
+            self.target = None
+
+    def behave(self, dt, ecosystem, is_day, awake):
+        """Обновляет поведение хищника."""
+        now = ecosystem.time
+
+        active = self.schedule[is_day][0]
+
+        if active and self.is_asleep:
+            # Еще ждет пробуждения (см. update_vitals).
+            return
+
+        decisions = ecosystem.decisions
+        if now - self.last_target_search >= self.target_search_interval and decisions.allow(self):
+            self.last_target_search = now
+            if not self.target or not isinstance(self.target, self.prey) or not self.target.alive:
+                self.target = self.find_target(ecosystem, is_day)
+                self.chase_timer = 0
+
+        if self.hunger >= self.hunger_desperation_threshold:
+            # Ближайшую добычу голодный хищник пересматривает в свой квант, а между ними гонится за прежней.
+            if decisions.allow(self):
+                self.target = self.find_target(ecosystem, is_day)
+            if isinstance(self.target, self.prey) and self.target.alive:
+                super().behave(dt, ecosystem, is_day, awake)
+                return
+
+        if self.reproductive_ready and not self.target and decisions.allow(self):
+            self.target = self.find_reproduction_target(ecosystem)
+            if self.target:
+                super().behave(dt, ecosystem, is_day, awake)
+                return
+
+        if not self.target and not self.is_drinking and active:
+            self.patrol(dt, ecosystem)
+
+        if self.target and isinstance(self.target, self.prey):
+            self.chase_timer += dt
+            if self.chase_timer >= self.max_chase_time:
+                self.target = None
+                self.chase_timer = 0
+
+        super().behave(dt, ecosystem, is_day, awake)
+
+        self.reproductive_drive += dt / 2
+        if self.reproductive_drive >= self.reproduction_threshold:
+            self.check_reproduce(ecosystem)
+
+        if self.is_baby:
+            self.growth_time += dt
+            if self.growth_time >= 300:
+                self.size = self.max_size
+                self.is_baby = False
+
+        self.avoid_water(dt, ecosystem)
+
+        if self.hunger > self.max_hunger / 2 and active:
+            self.is_asleep = False
+
+        if self.eating_cross and self.eating_cross.hunger <= 0:
+            self.eating_cross = None
+            self.is_eating_cross = False
+            self.has_eaten_cross = True
+
+        if self.hunger <= self.hunger_threshold_attack:
+            self.is_eating_cross = False
+        elif not self.is_eating_cross:
+            self.eat_timer += dt
+            if self.eat_timer >= self.eat_interval:
+                self.eat_timer = 0
+                self.try_eat(ecosystem)
+
+        if self.avoid_predator_timer > 0:
+            self.avoid_predator_timer -= dt
+
+    def patrol(self, dt, ecosystem):
+        """Патрулирует территорию в поисках добычи."""
+        self.wander(dt, ecosystem)
+
+    def attack(self, ecosystem):
+        """Атакует травоядное."""
+        if self.target and self.target.alive and ecosystem.map.distance(self.x, self.y, self.target.x, self.target.y) < self.size + self.target.size + 10:
+            ecosystem.consume(self, self.target, 'attack')
+            self.target = None
+
+    def try_eat(self, ecosystem):
+        """Пытается съесть труп или атаковать травоядное."""
+        if self.is_eating_cross and self.eating_cross:
+            eat_amount = min(10, self.eating_cross.hunger)
+            self.eating_cross.hunger -= eat_amount
+            self.hunger = max(0, self.hunger - eat_amount)
+
+            if self.eating_cross.hunger <= 0:
+                self.hunger = max(0, self.hunger - self.max_hunger * self.eat_efficiency)
+                self.eating_cross = None
+                self.eating_crosses = None
+                self.is_eating_cross = False
+                return
+            return
+        else:
+            closest_cross = self.find_nearest(self.eating_crosses or ())
+            if closest_cross:
+                self.target = closest_cross
+                self.is_eating_cross = True
+                return
+            if self.hunger <= self.hunger_threshold_attack:
+                return
+            closest_prey = self.find_in_contact(ecosystem, *self.prey)
+            if closest_prey:
+                ecosystem.consume(self, closest_prey, 'catch')
+
+    def avoid_other_entities(self, dt, ecosystem, is_day):
+        """Избегает других сущностей."""
+        if self.avoid_predator_timer > 0:
+            for entity in ecosystem.species_index(type(self)).query(self.x, self.y, self.avoidance_distance):
+                if entity != self:
+                    dist = ecosystem.map.distance(self.x, self.y, entity.x, entity.y)
+                    if dist < self.avoidance_distance:
+                        self.repel(ecosystem.map, entity.x, entity.y, dt, 3)
+
+    def feed(self, meal, x, y):
+        """Оставляет труп добычи в точке (x, y): после нападения ('attack') голод сразу падает,
+        добычу, пойманную при поедании ('catch'), хищник ест с трупа."""
+        self.create_eating_cross(x, y)
+        if meal == 'attack':
+            self.hunger = max(0, self.hunger - self.max_hunger * self.eat_efficiency)
+        else:
+            self.is_eating_cross = True
+
+    def create_eating_cross(self, x, y):
+        """Создает труп добычи после атаки."""
+        eating_cross = EatingCross(x, y)
+        self.eating_cross = eating_cross
+        if self.eating_crosses is None:
+            self.eating_crosses = deque(maxlen=self.EATING_CROSS_MEMORY)
+        self.eating_crosses.append(eating_cross)
+
+    def check_reproduce(self, ecosystem):
+        """Проверяет возможность размножения."""
+        if ecosystem.count(type(self)) >= self.max_population:
+            return
+        if self.reproductive_ready and self.reproduction_cooldown <= 0:
+            closest_predator = self.find_in_contact(ecosystem, type(self))
+
+            if closest_predator and closest_predator.reproduction_cooldown <= 0:
+                if self.growth_time == 0 and closest_predator.growth_time == 0:
+                    self.reproduce(ecosystem, closest_predator)
+
+    def reproduce(self, ecosystem, other):
+        """Размножается с другим хищником."""
+        if ecosystem.count(type(self)) >= self.max_population:
+            return
+
+        if self.reproductive_ready and other.reproductive_ready:
+            new_predator = ecosystem.create(type(self), self.x, self.y)
+            new_predator.size = (self.size + other.size) / 4
+            new_predator.max_size = min(self.size, other.size)
+            new_predator.is_baby = True
+            new_predator.growth_time = 0
+            ecosystem.add_entity(new_predator)
+
+            dx, dy = normalize(new_predator.x - self.x, new_predator.y - self.y)
+            separation_distance = 200
+
+            new_predator.target = (new_predator.x + dx * separation_distance, new_predator.y + dy * separation_distance)
+            self.target = (self.x - dx * separation_distance, self.y - dy * separation_distance)
+            other.target = (other.x - dx * separation_distance, other.y - dy * separation_distance)
+
+            self.reproductive_drive = 0
+            self.reproductive_ready = False
+            self.reproduction_cooldown = self.reproduction_cooldown_max
+            other.reproductive_drive = 0
+            other.reproductive_ready = False
+            other.reproduction_cooldown = other.reproduction_cooldown_max
+
+            self.avoid_predator_timer = self.avoid_predator_duration
+            other.avoid_predator_timer = other.avoid_predator_duration
+
+    def check_for_food_and_water(self, dt, ecosystem):
+        """Проверяет наличие пищи и воды и устанавливает цели для их поиска."""
+        is_day = ecosystem.day_night_cycle.is_day()
+        if not self.target and ecosystem.decisions.allow(self):
+            if self.hunger > self.hunger_threshold_eat:
+                self.target = self.find_target(ecosystem, is_day)
+            elif self.thirst > self.thirst_threshold_drink:
+                self.target = self.find_water_target(ecosystem)
+            elif self.reproductive_ready:
+                self.target = self.find_reproduction_target(ecosystem)
+
+class Herbivore(Entity):
+    """Класс, представляющий травоядное."""
+    __slots__ = ()
+    activity = 'diurnal'
+    title = 'Травоядные'
+    max_population = 50
+    max_speed = 7
+    initial_size = 10
+    max_health = 70
+    max_hunger = 70
+    max_thirst = 60
+    max_age = 2000
+    color = GREEN
+    fear_distance = 45
+    time_to_reproduce = 118
+    # Как в исходной игре: порог размножения считается от time_to_reproduce базового Entity.
+    reproduction_threshold = Entity.reproduction_threshold
+    target_eat_distance = 25
+    target_drink_distance = 25
+    fleeing_speed_multiplier = 5
+    hunt_range = 50
+
+    def __init__(self, x, y, rng=random):
+        """Инициализирует травоядное с заданными параметрами."""
+        super().__init__(x, y, rng=rng)
+        self.wake_up_delay = rng.uniform(0, 50)
+
+    def find_target(self, ecosystem):
+        """Находит цель для еды (пищу)."""
+        if not self.schedule[ecosystem.day_night_cycle.is_day()][0]:
+            return None
+        if ecosystem.food_grid is not None:
+            cell = ecosystem.food_grid.nearest(self.x, self.y, FOOD_GRID_SEARCH_RADIUS, FOOD_GRID_MIN_BIOMASS)
+            return GrassPatch(*cell) if cell is not None else None
+        return ecosystem.resource_index.nearest(self.x, self.y, lambda resource: isinstance(resource, Food))
+
+    def graze(self, ecosystem):
+        """Съедает траву сетки еды в клетке, где стоит травоядное; голод падает пропорционально съеденному."""
+        eaten = ecosystem.food_grid.graze(self.x, self.y, FOOD_GRID_BITE)
+        self.hunger *= 1 - eaten / FOOD_GRID_BITE
+
+    def behave(self, dt, ecosystem, is_day, awake):
+        """Обновляет поведение травоядного."""
+        edge_avoidance_vector = self.avoid_edges(ecosystem.map)
+
+        if self.schedule[is_day][0] and self.is_asleep:
+            # Еще ждет пробуждения (см. update_vitals).
+            return
+
+        if edge_avoidance_vector is not None:
+            self.push(*edge_avoidance_vector, dt, 5)
+            return
+
+        decisions = ecosystem.decisions
+        if self.reproductive_ready and not self.target and decisions.allow(self):
+            self.target = self.find_reproduction_target(ecosystem)
+
+        if self.is_drinking:
+            super().behave(dt, ecosystem, is_day, awake)
+            return
+
+        if not self.target or (self.target and not isinstance(self.target, Water)):
+            if decisions.allow(self):
+                if self.thirst > self.thirst_threshold_drink:
+                    self.target = self.find_water_target(ecosystem)
+                elif self.hunger > self.hunger_threshold_eat:
+                    self.target = self.find_target(ecosystem)
+        elif not self.target:
+            self.wander(dt, ecosystem)
+
+        super().behave(dt, ecosystem, is_day, awake)
+
+        self.reproductive_drive += dt
+        if self.reproductive_drive >= self.reproduction_threshold:
+            self.check_reproduce(ecosystem)
+
+    def on_target_reached(self, ecosystem):
+        """Выполняет действия, когда травоядное достигает своей цели."""
+        if isinstance(self.target, Food):
+            if self.target.alive and ecosystem.map.distance(self.x, self.y, self.target.x,
+                                                            self.target.y) < self.target_eat_distance:
+                ecosystem.consume(self, self.target, 'food')
+            self.target = None
+        elif isinstance(self.target, Water):
+            if ecosystem.map.distance(self.x, self.y, self.target.x, self.target.y) < self.target_drink_distance:
+                self.is_drinking = True
+        elif isinstance(self.target, GrassPatch):
+            if self.hunger > 0:
+                self.graze(ecosystem)
+            self.target = None
+        elif self.target and self.reproductive_ready and type(self.target) == type(self):
+            self.check_reproduce(ecosystem)
+        elif self.target and type(self.target) is tuple:
+            self.target = None
+
+    def check_reproduce(self, ecosystem):
+        """Проверяет возможность размножения."""
+        if self.reproductive_ready and self.reproduction_cooldown <= 0:
+            closest_herbivore = self.find_in_contact(ecosystem, type(self))
+
+            if closest_herbivore and closest_herbivore.reproduction_cooldown <= 0:
+                if self.growth_time == 0 and closest_herbivore.growth_time == 0:
+                    self.reproduce(ecosystem, closest_herbivore)
+
+    def reproduce(self, ecosystem, other):
+        """Размножается с другим травоядным."""
+        if ecosystem.count(type(self)) >= self.max_population:
+            return
+
+        if self.reproductive_ready and other.reproductive_ready:
+            new_herbivore = ecosystem.create(type(self), self.x, self.y)
+            new_herbivore.size = (self.size + other.size) / 4
+            new_herbivore.max_size = min(self.size, other.size)
+            new_herbivore.is_baby = True
+            new_herbivore.growth_time = 0
+            ecosystem.add_entity(new_herbivore)
+
+            dx, dy = normalize(new_herbivore.x - self.x, new_herbivore.y - self.y)
+            separation_distance = 200
+
+            new_herbivore.target = (new_herbivore.x + dx * separation_distance,
+                                    new_herbivore.y + dy * separation_distance)
+            self.target = (self.x - dx * separation_distance, self.y - dy * separation_distance)
+            other.target = (other.x - dx * separation_distance, other.y - dy * separation_distance)
+
+            self.reproductive_drive = 0
+            self.reproductive_ready = False
+            self.reproduction_cooldown = self.reproduction_cooldown_max
+            other.reproductive_drive = 0
+            other.reproductive_ready = False
+            other.reproduction_cooldown = other.reproduction_cooldown_max
+
+            self.avoid_predator_timer = self.avoid_predator_duration
+
+    def check_for_food_and_water(self, dt, ecosystem):
+        """Проверяет наличие пищи и воды и устанавливает цели для их поиска."""
+        is_day = ecosystem.day_night_cycle.is_day()
+
+        if not self.target and ecosystem.decisions.allow(self):
+            if self.thirst > self.thirst_threshold_drink:
+                self.target = self.find_water_target(ecosystem)
+            elif self.hunger > self.hunger_threshold_eat and self.schedule[is_day][0]:
+                self.target = self.find_target(ecosystem)
+
+SPECIES.update(Herbivore=Herbivore, Predator=Predator)
+
+_species_keys = {}
+
+def slot_names(cls):
+    """Имена полей __slots__ класса вместе с полями всех его предков."""
+    return tuple(dict.fromkeys(name for base in reversed(cls.__mro__) for name in base.__dict__.get('__slots__', ())))
+
+def is_profile_parameter(cls, key):
+    """Можно ли задать key в профиле вида cls: открытый атрибут класса, а не поле особи или метод."""
+    return (hasattr(cls, key) and not key.startswith('_') and key not in slot_names(cls)
+            and key not in ('schedule', 'prey') and not callable(getattr(cls, key)))
+
+def species_key(cls):
+    """Вид сущности: первый зарегистрированный в SPECIES класс в MRO.
+
+    Для незарегистрированных классов - первый класс в MRO, непосредственно
+    унаследованный от Entity.
+    """
+    key = _species_keys.get(cls)
+    if key is None:
+        key = cls
+        for base in cls.__mro__:
+            if SPECIES.get(base.__name__) is base:
+                key = base
+                break
+        else:
+            for base in cls.__mro__:
+                if Entity in base.__bases__:
+                    key = base
+                    break
+        _species_keys[cls] = key
+    return key
+
+def compile_species():
+    """Пересобирает таблицы поведения всех зарегистрированных видов (после изменения реестра)."""
+    for cls in SPECIES.values():
+        cls.compile_behaviour()
+
+def register_species(name, base=None, **profile):
+    """Регистрирует вид name или меняет профиль уже зарегистрированного вида.
+
+    Новый вид - подкласс вида base (поведение травоядных у Herbivore, охотников - у
+    Predator) с атрибутами profile: пределы, скорости, пороги, color, title,
+    activity (ключ ACTIVITY_SCHEDULES) и diet (имена видов, на которых он охотится).
+    Пороги из DERIVED_THRESHOLDS, не заданные явно, пересчитываются от новых пределов.
+    Реестр задается до создания экосистем. Возвращает класс вида.
+    """
+    cls = SPECIES.get(name)
+    if cls is None:
+        if base not in SPECIES:
+            raise ValueError(f"Вид {name}: неизвестный базовый вид {base}")
+        parent = SPECIES[base]
+    else:
+        if base is not None and cls.__bases__[0] is not SPECIES.get(base):
+            raise ValueError(f"Вид {name} уже зарегистрирован с другим базовым видом")
+        parent = cls
+    for key in profile:
+        if not is_profile_parameter(parent, key):
+            raise ValueError(f"Вид {name}: неизвестный параметр профиля {key}")
+    if profile.get('activity', parent.activity) not in ACTIVITY_SCHEDULES:
+        raise ValueError(f"Вид {name}: неизвестное расписание активности {profile['activity']}")
+    attributes = dict(profile)
+    if 'color' in attributes:
+        attributes['color'] = tuple(attributes['color'])
+    if 'diet' in attributes:
+        attributes['diet'] = tuple(attributes['diet'])
+    explicit = set(profile) | set(SPECIES_CONFIG.get(name, ()))
+    for threshold, (limit, share) in DERIVED_THRESHOLDS.items():
+        if limit in profile and threshold not in explicit and hasattr(parent, threshold):
+            attributes[threshold] = profile[limit] * share
+
+    if cls is None:
+        attributes.setdefault('title', name)
+        cls = type(name, (parent,), {'__slots__': (), '__module__': __name__, **attributes})
+        SPECIES[name] = cls
+        SPECIES_CONFIG[name] = {'base': base}
+    else:
+        for key, value in attributes.items():
+            setattr(cls, key, value)
+    SPECIES_CONFIG.setdefault(name, {}).update(profile)
+    compile_species()
+    return cls
+
+def configure_species(config):
+    """Регистрирует виды из словаря {имя: описание} (формат файла видов, см. load_species).
+
+    Возвращает начальную численность {имя: count} видов, у которых она задана.
+    """
+    counts = {}
+    for name, entry in config.items():
+        entry = dict(entry)
+        if 'count' in entry:
+            counts[name] = entry.pop('count')
+        register_species(name, **entry)
+    for cls in SPECIES.values():
+        unknown = [name for name in cls.diet if name not in SPECIES]
+        if unknown:
+            raise ValueError(f"Вид {cls.__name__}: неизвестные виды добычи {', '.join(unknown)}")
+    return counts
+
+def load_species(path):
+    """Загружает виды из JSON-файла {имя: описание}.
+
+    Описание - атрибуты профиля вида (как в register_species), base - базовый вид
+    нового вида и count - его начальная численность. Возвращает {имя: count}.
+    """
+    with open(path, encoding='utf-8') as file:
+        return configure_species(json.load(file))
+
+def species_config():
+    """Описания видов, заданные через register_species, в формате файла видов."""
+    return {name: dict(entry) for name, entry in SPECIES_CONFIG.items()}
+
+def population_summary(ecosystem):
+    """Численность всех видов реестра строкой, например «Травоядные: 18, Хищники: 8»."""
+    return ", ".join(f"{cls.title}: {ecosystem.count(cls)}" for cls in SPECIES.values())
+
+compile_species()
+
+class Ecosystem:
+    """Контейнер для всех сущностей и ресурсов."""
+    def __init__(self, map_width, map_height, backend=None, seed=None,
+                 day_length=DAY_LENGTH, night_length=NIGHT_LENGTH, species_params=None, lod=None,
+                 food_mode=None, telemetry=None):
+        self.entities = []
+        self.resources = []
+        self.water_sources = []
+        self.by_id = {}
+        self.next_id = 0
+        self.in_tick = False
+        self.pending_spawns = []
+        self.pending_kills = []
+        self.map = Map(map_width, map_height, TILE_SIZE)
+        self.day_night_cycle = DayNightCycle(day_length, night_length, TRANSITION_DURATION)
+        self.species_indexes = {}
+        self.species_members = {}
+        self.resource_index = SpatialHash(self.map, self.map.tile_size)
+        self.water_index = SpatialHash(self.map, WATER_CELL_SIZE)
+        self.static_version = 0
+        self.threat_maps = {}
+        self.max_entity_size = 0
+        self.max_water_size = 0
+        self.food_spawn_probability = FOOD_SPAWN_PROBABILITY
+        self.species_params = {species_key(cls): dict(params) for cls, params in (species_params or {}).items()}
+        # Параметры, совпадающие с полями особи, задаются каждой новой особи, остальные
+        # меняют профиль вида и попадают в атрибуты подкласса вида этой экосистемы.
+        self.entity_params = {}
+        self.profile_params = {}
+        for key, params in self.species_params.items():
+            fields = slot_names(key)
+            self.entity_params[key] = {name: value for name, value in params.items() if name in fields}
+            self.profile_params[key] = {name: value for name, value in params.items() if name not in fields}
+        self.species_classes = {}
+        self.rng = random.Random(seed)
+        self.time = 0.0
+        self.tick = 0
+        self.dt = FIXED_DT
+        self.decisions = DecisionScheduler()
+        self.lod = lod
+        self.telemetry = telemetry
+        self.backend = None
+        if backend == "numpy":
+            from numpy_backend import NumpyBackend
+            self.backend = NumpyBackend()
+        elif backend is not None:
+            raise ValueError(f"Неизвестный бэкенд: {backend}")
+        self.food_grid = None
+        if food_mode == "grid":
+            from food_grid import FoodGrid
+            self.food_grid = FoodGrid(self.map)
+        elif food_mode is not None:
+            raise ValueError(f"Неизвестный режим еды: {food_mode}")
+
+    def species_class(self, cls):
+        """Возвращает класс, которым создаются особи вида cls в этой экосистеме.
+
+        Если species_params меняют профиль вида, это подкласс с измененными атрибутами;
+        с бэкендом - еще и хранящий состояние в его массивах.
+        """
+        result = self.species_classes.get(cls)
+        if result is None:
+            result = cls
+            profile = self.profile_params.get(species_key(cls))
+            if profile:
+                result = type(cls.__name__, (cls,), {'__slots__': (), '__module__': cls.__module__, **profile})
+            if self.backend is not None:
+                result = self.backend.species_class(result)
+            self.species_classes[cls] = result
+            self.species_classes[result] = result
+        return result
+
+    def create(self, cls, x, y):
+        """Создает особь вида cls, применяя к ней параметры вида из species_params."""
+        entity = self.species_class(cls)(x, y, rng=self.rng)
+        for name, value in self.entity_params.get(species_key(cls), {}).items():
+            setattr(entity, name, value)
+        return entity
+
+    def register(self, obj):
+        """Выдает объекту постоянный идентификатор и помечает его живым."""
+        obj.id = self.next_id
+        self.next_id += 1
+        obj.alive = True
+        self.by_id[obj.id] = obj
+
+    def add_entity(self, entity):
+        """Добавляет сущность; во время тика она попадает в список только в его конце."""
+        self.register(entity)
+        key = species_key(type(entity))
+        self.species_index(key).insert(entity)
+        self.species_members.setdefault(key, {})[entity] = None
+        self.max_entity_size = max(self.max_entity_size, entity.size, entity.max_size)
+        if self.in_tick:
+            entity._index = None
+            self.pending_spawns.append(entity)
+            if self.telemetry is not None:
+                self.telemetry.born(entity)
+        else:
+            append_indexed(self.entities, entity)
+
+    def remove_entity(self, entity, cause=None):
+        """Убивает сущность сразу, а из списка убирает ее в конце тика.
+
+        cause - причина смерти из DEATH_CAUSES (None, если сущность убрана не по ходу симуляции).
+        """
+        if not entity.alive:
+            return
+        if self.telemetry is not None:
+            self.telemetry.died(entity, cause)
+        entity.alive = False
+        key = species_key(type(entity))
+        self.species_index(key).remove(entity)
+        del self.species_members[key][entity]
+        entity.target = None
+        self.notify_removed(entity)
+        if self.in_tick:
+            self.pending_kills.append(entity)
+        else:
+            self._discard_entity(entity)
+
+    def _discard_entity(self, entity):
+        del self.by_id[entity.id]
+        if entity._index is not None:
+            swap_remove(self.entities, entity)
+        if self.backend is not None:
+            self.backend.release(entity)
+
+    def notify_removed(self, obj):
+        """Сообщает всем особям, шедшим к удаленному объекту, что их цель пропала."""
+        if obj._watchers:
+            for entity in list(obj._watchers):
+                entity.target_lost(self)
+
+    def apply_pending(self):
+        """Применяет отложенные за тик рождения и смерти."""
+        kills, self.pending_kills = self.pending_kills, []
+        for entity in kills:
+            self._discard_entity(entity)
+        spawns, self.pending_spawns = self.pending_spawns, []
+        for entity in spawns:
+            if entity.alive:
+                append_indexed(self.entities, entity)
+
+    def relocate_entity(self, entity):
+        """Обновляет ячейку сущности в пространственном индексе после перемещения."""
+        self.species_index(type(entity)).move(entity)
+
+    def species_index(self, cls):
+        """Пространственный индекс живых особей вида cls."""
+        key = species_key(cls)
+        index = self.species_indexes.get(key)
+        if index is None:
+            index = self.species_indexes[key] = SpatialHash(self.map, self.map.tile_size)
+        return index
+
+    def members(self, cls):
+        """Живые особи вида cls (включая родившихся в текущем тике)."""
+        return self.species_members.get(species_key(cls), {}).keys()
+
+    def count(self, cls):
+        """Число живых особей вида cls за O(1)."""
+        return len(self.species_members.get(species_key(cls), ()))
+
+    def threats(self, cls):
+        """Сетка угроз для вида cls: особи всех видов, в чьей prey он есть."""
+        key = species_key(cls)
+        threat_map = self.threat_maps.get(key)
+        if threat_map is None:
+            hunters = [hunter for hunter in SPECIES.values() if key in self.species_class(hunter).prey]
+            threat_map = self.threat_maps[key] = ThreatMap(
+                self.map, THREAT_CELL_SIZE, lambda: [threat for hunter in hunters for threat in self.members(hunter)])
+        return threat_map
+
+    def entities_near(self, x, y, radius):
+        """Сущности всех видов в радиусе radius от точки (x, y)."""
+        found = []
+        for index in self.species_indexes.values():
+            found.extend(index.query(x, y, radius))
+        return found
+
+    def entities_in_rect(self, left, top, right, bottom):
+        """Сущности всех видов внутри прямоугольника карты (например, видимой области)."""
+        found = []
+        for index in self.species_indexes.values():
+            found.extend(index.query_rect(left, top, right, bottom))
+        return found
+
+    def add_resource(self, resource):
+        self.register(resource)
+        self.static_version += 1
+        append_indexed(self.resources, resource)
+        self.resource_index.insert(resource)
+
+    def remove_resource(self, resource):
+        if resource.alive:
+            resource.alive = False
+            self.notify_removed(resource)
+            self.static_version += 1
+            del self.by_id[resource.id]
+            swap_remove(self.resources, resource)
+            self.resource_index.remove(resource)
+
+    def consume(self, eater, victim, meal):
+        """eater съедает victim (еду или добычу): насыщается (eater.feed) и убирает ее из экосистемы.
+
+        meal - как съедена жертва: 'food' (еда), 'attack' и 'catch' (добыча хищника, см. Predator.feed).
+        """
+        eater.feed(meal, victim.x, victim.y)
+        if isinstance(victim, Food):
+            self.remove_resource(victim)
+        else:
+            victim.die(self)
+
+    def add_water_source(self, water):
+        self.register(water)
+        self.max_water_size = max(self.max_water_size, water.size)
+        self.static_version += 1
+        append_indexed(self.water_sources, water)
+        self.water_index.insert(water)
+
+    def remove_water_source(self, water):
+        if water.alive:
+            water.alive = False
+            self.notify_removed(water)
+            self.static_version += 1
+            del self.by_id[water.id]
+            swap_remove(self.water_sources, water)
+            self.water_index.remove(water)
+
+    def populate(self, herbivore_count=INITIAL_HERBIVORE_COUNT, predator_count=INITIAL_PREDATOR_COUNT,
+                 food_count=INITIAL_FOOD_COUNT, species_counts=None):
+        """Создает начальные сущности, еду и источники воды.
+
+        species_counts - {имя вида из SPECIES: численность} для остальных видов.
+        """
+        width, height = self.map.width, self.map.height
+        counts = [(Herbivore, herbivore_count), (Predator, predator_count)]
+        counts += [(SPECIES[name], count) for name, count in (species_counts or {}).items()]
+        for cls, count in counts:
+            for _ in range(count):
+                x = self.rng.randint(50, width - 50)
+                y = self.rng.randint(50, height - 50)
+                self.add_entity(self.create(cls, x, y))
+
+        for _ in range(food_count):
+            self.spawn_food()
+
+        self.add_water_source(Water(width // 4, height // 4, 30))
+        self.add_water_source(Water(3 * width // 4, 3 * height // 4, 40))
+
+    def spawn_food(self):
+        """Добавляет еду в случайную точку карты (в режиме сетки - порцию травы в ее клетку)."""
+        x = self.rng.randint(0, self.map.width)
+        y = self.rng.randint(0, self.map.height)
+        if self.food_grid is not None:
+            self.food_grid.add(x, y)
+            return None
+        food = Food(x, y)
+        self.add_resource(food)
+        return food
+
+    def step(self, dt=FIXED_DT):
+        """Продвигает симуляцию на один тик длительностью dt."""
+        self.time += dt
+        self.tick += 1
+        self.dt = dt
+        self.decisions.start(self.tick, dt)
+        self.day_night_cycle.update(dt)
+        self.in_tick = True
+        self.update_vitals(dt)
+        for threat_map in self.threat_maps.values():
+            threat_map.invalidate()
+        self.update_entities(dt)
+        self.integrate(dt)
+        if self.food_grid is not None:
+            self.food_grid.regrow(dt)
+        self.in_tick = False
+        self.apply_pending()
+
+        if self.rng.random() < self.food_spawn_probability:
+            self.spawn_food()
+        if self.telemetry is not None:
+            self.telemetry.sample(self)
+
+    def update_vitals(self, dt):
+        """Пакетно обновляет жизненные показатели в бэкенде, убирает умерших и отмечает особей у воды и краев."""
+        if self.backend is not None:
+            for entity in self.backend.update_vitals(dt, self.day_night_cycle.is_day()):
+                self.remove_entity(entity, entity.death_cause())
+            self.backend.flag(self)
+
+    def update_entities(self, dt):
+        """Вызывает update() у всех живых сущностей.
+
+        С планировщиком lod особь, чья очередь еще не пришла, в этом тике только
+        обновляет жизненные показатели (как и все особи в начале update), а в свой
+        тик получает все прошедшее время.
+        """
+        lod = self.lod
+        is_day = self.day_night_cycle.is_day()
+        for entity in self.entities:
+            if not entity.alive:
+                continue
+            step = dt if lod is None else lod.step(entity, self.tick, dt)
+            if step is None:
+                if self.backend is None:
+                    entity.update_vitals(dt, self, is_day)
+                continue
+            entity.update(step, self)
+            if lod is not None:
+                lod.schedule(entity, self.tick, dt)
+            if self.backend is None:
+                self.relocate_entity(entity)
+
+    def integrate(self, dt):
+        """Пакетно сдвигает сущности бэкенда и обновляет их ячейки в индексах."""
+        if self.backend is not None:
+            for entity in self.backend.integrate(dt, self.species_index):
+                self.relocate_entity(entity)
+
+    def food_amount(self):
+        """Количество еды: число объектов Food или трава сетки в порциях."""
+        if self.food_grid is not None:
+            return self.food_grid.total()
+        return len(self.resources)
+
+    def run(self, ticks, dt=FIXED_DT):
+        """Выполняет заданное число тиков без отрисовки."""
+        for _ in range(ticks):
+            self.step(dt)
+
+class Food:
+    """Класс, представляющий еду."""
+    __slots__ = ('x', 'y', 'id', 'alive', '_index', '_watchers')
+    size = 5
+    color = BROWN
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self.id = None
+        self.alive = False
+        self._index = None
+        self._watchers = None
+
+class GrassPatch:
+    """Клетка сетки еды, которую травоядное выбрало, чтобы в ней пастись.
+
+    В отличие от точек-целей (x, y) при блуждании и расхождении после размножения,
+    по достижении такой цели травоядное ест траву клетки.
+    """
+    __slots__ = ('x', 'y', '_watchers')
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self._watchers = None
+
+class Water:
+    """Класс, представляющий источник воды."""
+    __slots__ = ('x', 'y', 'size', 'id', 'alive', '_index', '_watchers')
+    color = BLUE
+
+    def __init__(self, x, y, size):
+        self.x = x
+        self.y = y
+        self.size = size
+        self.id = None
+        self.alive = False
+        self._index = None
+        self._watchers = None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Запуск симуляции без отрисовки.")
+    parser.add_argument("--ticks", type=int, default=10000, help="число тиков симуляции")
+    parser.add_argument("--width", type=int, default=WIDTH, help="ширина карты")
+    parser.add_argument("--height", type=int, default=HEIGHT, help="высота карты")
+    parser.add_argument("--backend", choices=["numpy"], default=None,
+                        help="векторизованный бэкенд для больших миров (с тем же зерном дает другой прогон)")
+    parser.add_argument("--herbivores", type=int, default=INITIAL_HERBIVORE_COUNT, help="начальное число травоядных")
+    parser.add_argument("--predators", type=int, default=INITIAL_PREDATOR_COUNT, help="начальное число хищников")
+    parser.add_argument("--food", type=int, default=INITIAL_FOOD_COUNT, help="начальное количество еды")
+    parser.add_argument("--seed", type=int, default=None, help="зерно генератора случайных чисел")
+    parser.add_argument("--food-grid", action="store_true", help="хранить еду сеткой биомассы (нужен NumPy)")
+    parser.add_argument("--species", default=None, metavar="ФАЙЛ", help="JSON-файл с дополнительными видами")
+    args = parser.parse_args()
+
+    species_counts = load_species(args.species) if args.species is not None else None
+    ecosystem = Ecosystem(args.width, args.height, backend=args.backend, seed=args.seed,
+                          food_mode="grid" if args.food_grid else None)
+    ecosystem.populate(args.herbivores, args.predators, args.food, species_counts)
+    started = time.perf_counter()
+    ecosystem.run(args.ticks)
+    elapsed = time.perf_counter() - started
+    print(f"{args.ticks} тиков за {elapsed:.2f} с ({args.ticks / elapsed:.0f} тиков/с)")
+    print(f"{population_summary(ecosystem)}, Еда: {ecosystem.food_amount():.0f}")
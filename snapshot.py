@@ -0,0 +1,414 @@
+"""Сохранение и загрузка полного состояния экосистемы в компактном двоичном формате.
+
+Файл снимка: заголовок (MAGIC и номер версии формата), затем сжатый zlib
+marshal-словарь. Объекты хранятся по столбцам: у каждого вида, у еды, воды и
+крестиков поедания своя таблица «поле -> список значений». Ссылки на объекты
+(target, eating_cross, eating_crosses) записываются идентификаторами: у
+сущностей, еды и воды это их id, у крестиков - отрицательный номер в таблице
+крестиков, а цель-клетка сетки еды (GrassPatch) - кортежем (GRASS_PATCH, x, y).
+Мертвые объекты, на которые еще кто-то ссылается, тоже попадают в
+таблицы (с alive = False), чтобы после загрузки поведение не изменилось.
+Сетка еды, если она включена, записывается байтами массива биомассы.
+Описания видов из реестра (species_config) тоже записываются и при загрузке
+регистрируются снова, поэтому снимок с видами из файла видов открывается без него.
+Порядок списков и ячеек пространственных индексов, а с бэкендом NumPy и слоты
+особей в его массивах со списком свободных слотов, сохраняется, поэтому прогон
+с тем же бэкендом продолжается после загрузки так же, как без сохранения.
+"""
+import gc
+import marshal
+import struct
+import zlib
+from collections import deque
+from contextlib import contextmanager
+from itertools import repeat
+from operator import attrgetter
+
+from simulation import (SPECIES, EatingCross, Ecosystem, Entity, Food, GrassPatch, Vector2, Water, append_indexed,
+                        configure_species, slot_names, species_config, species_key)
+
+MAGIC = b"ECOSNAP\0"
+VERSION = 2
+HEADER = struct.Struct("<8sH")
+MARSHAL_VERSION = 4
+
+# Поля, которые записываются отдельно от общих столбцов.
+SEPARATE_FIELDS = ('id', 'alive', 'position', 'move_direction')
+VECTOR_COLUMNS = ('x', 'y', 'vx', 'vy')
+
+VALUE, REF, REFS = 0, 1, 2
+REF_TYPES = (Entity, Food, Water, EatingCross, Vector2, GrassPatch)
+# Метка цели-клетки сетки еды (GrassPatch) в столбце ссылок: (GRASS_PATCH, x, y).
+GRASS_PATCH = 'grass'
+
+
+class SnapshotWriter:
+    """Собирает таблицы объектов экосистемы, заменяя ссылки идентификаторами."""
+    def __init__(self, ecosystem):
+        self.ecosystem = ecosystem
+        self.crosses = []
+        self.cross_numbers = {}
+        self.ghosts = {}
+        self.ghost_queue = []
+
+    def ref(self, value):
+        """Кодирует ссылку: id объекта, отрицательный номер крестика или само значение."""
+        if isinstance(value, EatingCross):
+            number = self.cross_numbers.get(value)
+            if number is None:
+                number = self.cross_numbers[value] = len(self.crosses)
+                self.crosses.append(value)
+            return -1 - number
+        if isinstance(value, (Entity, Food, Water)):
+            if value.id is None:
+                return None
+            if not value.alive and value.id not in self.ghosts:
+                self.ghosts[value.id] = value
+                self.ghost_queue.append(value)
+            return value.id
+        if isinstance(value, Vector2):
+            return (value.x, value.y)
+        if isinstance(value, GrassPatch):
+            return (GRASS_PATCH, value.x, value.y)
+        return value
+
+    def table(self, objects, extra_fields=()):
+        """Столбцы всех публичных полей (__slots__ и extra_fields) объектов одного класса."""
+        fields = slot_names(type(objects[0])) if objects else ()
+        names = [name for name in fields
+                 if not name.startswith('_') and name not in SEPARATE_FIELDS and name not in extra_fields]
+        names.extend(extra_fields)
+        kinds = []
+        columns = []
+        for name in names:
+            try:
+                column = list(map(attrgetter(name), objects))
+            except AttributeError:
+                column = [getattr(obj, name, None) for obj in objects]
+            types = set(map(type, column))
+            if any(issubclass(kind, deque) for kind in types):
+                kind = REFS
+                column = [None if value is None else (value.maxlen, [self.ref(item) for item in value])
+                          for value in column]
+            elif any(issubclass(kind, REF_TYPES) for kind in types):
+                kind = REF
+                column = [self.ref(value) for value in column]
+            else:
+                kind = VALUE
+            kinds.append(kind)
+            columns.append(column)
+        return {
+            'count': len(objects),
+            'ids': [getattr(obj, 'id', None) for obj in objects],
+            'alive': [getattr(obj, 'alive', True) for obj in objects],
+            'fields': names,
+            'kinds': kinds,
+            'columns': columns,
+        }
+
+    def entity_table(self, entities):
+        # Цель хранится в слоте _target за свойством target, поэтому записывается явно.
+        table = self.table(entities, ('target',) + tuple(getattr(type(entities[0]), 'array_fields', ())))
+        table['fields'].extend(VECTOR_COLUMNS)
+        table['kinds'].extend([VALUE] * len(VECTOR_COLUMNS))
+        table['columns'].append([entity.position.x for entity in entities])
+        table['columns'].append([entity.position.y for entity in entities])
+        table['columns'].append([entity.move_direction.x for entity in entities])
+        table['columns'].append([entity.move_direction.y for entity in entities])
+        return table
+
+    def collect(self):
+        """Возвращает словарь снимка, пригодный для marshal."""
+        ecosystem = self.ecosystem
+        if ecosystem.in_tick:
+            raise RuntimeError("Снимок нельзя сделать посреди тика")
+
+        species = {}
+        for entity in ecosystem.entities:
+            species.setdefault(species_key(type(entity)).__name__, []).append(entity)
+        entity_tables = {name: self.entity_table(entities) for name, entities in species.items()}
+        food_table = self.table(ecosystem.resources)
+        water_table = self.table(ecosystem.water_sources)
+
+        # Мертвые объекты, на которые ссылаются живые, и то, на что ссылаются они сами.
+        while self.ghost_queue:
+            ghost = self.ghost_queue.pop()
+            if isinstance(ghost, Food):
+                self.merge(food_table, self.table([ghost]))
+            elif isinstance(ghost, Water):
+                self.merge(water_table, self.table([ghost]))
+            else:
+                name = species_key(type(ghost)).__name__
+                table = self.entity_table([ghost])
+                if name in entity_tables:
+                    self.merge(entity_tables[name], table)
+                else:
+                    entity_tables[name] = table
+
+        cross_table = self.table(self.crosses)
+        cycle = ecosystem.day_night_cycle
+        return {
+            'map': (ecosystem.map.width, ecosystem.map.height),
+            'clock': (ecosystem.time, ecosystem.tick, ecosystem.next_id),
+            'food_spawn_probability': ecosystem.food_spawn_probability,
+            'food_grid': ecosystem.food_grid.state() if ecosystem.food_grid is not None else None,
+            'max_entity_size': ecosystem.max_entity_size,
+            'day_night': (cycle.day_length, cycle.night_length, cycle.transition_duration,
+                          cycle.timer, cycle.time_scale),
+            'rng': ecosystem.rng.getstate(),
+            'species': species_config(),
+            'species_params': {key.__name__: params for key, params in ecosystem.species_params.items()},
+            'entities': entity_tables,
+            'layouts': self.layouts(),
+            'food': food_table,
+            'water': water_table,
+            'crosses': cross_table,
+            'order': [entity.id for entity in ecosystem.entities],
+            'resources': [food.id for food in ecosystem.resources],
+            'water_sources': [water.id for water in ecosystem.water_sources],
+            'indexes': {key.__name__: index_order(index) for key, index in ecosystem.species_indexes.items()},
+            'members': {key.__name__: [entity.id for entity in members]
+                        for key, members in ecosystem.species_members.items()},
+            'resource_index': index_order(ecosystem.resource_index),
+            'water_index': index_order(ecosystem.water_index),
+        }
+
+    def layouts(self):
+        """Размещение особей в массивах бэкенда: (вид, число строк, свободные слоты, id владельцев строк).
+
+        Виды идут в порядке создания их массивов, в котором их обходит пакетный шаг.
+        """
+        backend = self.ecosystem.backend
+        if backend is None:
+            return []
+        layouts = []
+        for cls in backend.stores:
+            size, free, owners = backend.layout(cls)
+            layouts.append((species_key(cls).__name__, size, free,
+                            [None if owner is None else owner.id for owner in owners]))
+        return layouts
+
+    @staticmethod
+    def merge(table, extra):
+        """Дописывает строки таблицы extra (объекты того же вида) в table."""
+        previous, rows = table['count'], extra['count']
+        table['count'] += rows
+        table['ids'].extend(extra['ids'])
+        table['alive'].extend(extra['alive'])
+        for name, kind, column in zip(extra['fields'], extra['kinds'], extra['columns']):
+            if name not in table['fields']:
+                table['fields'].append(name)
+                table['kinds'].append(kind)
+                table['columns'].append([None] * previous)
+            elif kind != VALUE:
+                # Столбец, где раньше были только None и координаты, оказался столбцом ссылок.
+                table['kinds'][table['fields'].index(name)] = kind
+        for name, column in zip(table['fields'], table['columns']):
+            if name in extra['fields']:
+                column.extend(extra['columns'][extra['fields'].index(name)])
+            else:
+                column.extend([None] * rows)
+
+def index_order(index):
+    """Идентификаторы объектов пространственного индекса в порядке обхода его ячеек."""
+    return [item.id for bucket in index.cells.values() for item in bucket]
+
+def setter(cls, name):
+    """Функция (obj, value), задающая поле name объекта класса cls: дескриптор слота или свойства."""
+    descriptor = getattr(cls, name, None)
+    set_value = getattr(descriptor, '__set__', None)
+    if set_value is None:
+        return lambda obj, value: setattr(obj, name, value)
+    return set_value
+
+def fill_column(cls, name, objects, values):
+    """Задает поле name объектам objects значениями values одним проходом map без цикла Python."""
+    deque(map(setter(cls, name), objects, values), maxlen=0)
+
+class SnapshotReader:
+    """Восстанавливает экосистему из словаря снимка."""
+    def __init__(self, data, backend=None):
+        self.data = data
+        width, height = data['map']
+        day_length, night_length, transition_duration, timer, time_scale = data['day_night']
+        food_grid = data.get('food_grid')
+        configure_species(data.get('species', {}))
+        self.ecosystem = Ecosystem(width, height, backend=backend, day_length=day_length,
+                                   night_length=night_length, food_mode="grid" if food_grid else None,
+                                   species_params={SPECIES[name]: params
+                                                   for name, params in data['species_params'].items()})
+        cycle = self.ecosystem.day_night_cycle
+        cycle.transition_duration = transition_duration
+        cycle.cycle_duration = day_length + night_length + 2 * transition_duration
+        cycle.timer = timer
+        cycle.time_scale = time_scale
+        if food_grid:
+            self.ecosystem.food_grid.restore(food_grid)
+        self.objects = {}
+        self.crosses = []
+
+    def build(self, cls, table, skip=()):
+        """Создает объекты таблицы без вызова __init__ и заполняет обычные поля.
+
+        Возвращает объекты и столбцы ссылок, которые разрешаются после создания всех объектов.
+        """
+        value_fields = []
+        value_columns = []
+        links = []
+        for name, kind, column in zip(table['fields'], table['kinds'], table['columns']):
+            if name in skip:
+                continue
+            if kind == VALUE:
+                value_fields.append(name)
+                value_columns.append(column)
+            else:
+                links.append((name, kind, column))
+        objects = list(map(cls.__new__, repeat(cls, table['count'])))
+        # Служебные слоты (индексы, обратные ссылки целей) восстанавливаются заново.
+        for name in slot_names(cls):
+            if name.startswith('_'):
+                fill_column(cls, name, objects, repeat(None))
+        for name, column in zip(value_fields, value_columns):
+            fill_column(cls, name, objects, column)
+        for obj, obj_id, alive in zip(objects, table['ids'], table['alive']):
+            if obj_id is not None:
+                obj.id = obj_id
+                obj.alive = alive
+                self.objects[obj_id] = obj
+        return objects, links
+
+    def resolve(self, value):
+        if isinstance(value, int):
+            return self.crosses[-1 - value] if value < 0 else self.objects[value]
+        if type(value) is tuple and value[0] == GRASS_PATCH:
+            return GrassPatch(value[1], value[2])
+        return value
+
+    def link(self, objects, links):
+        for name, kind, column in links:
+            for obj, value in zip(objects, column):
+                if kind == REFS:
+                    if value is not None:
+                        value = deque((self.resolve(item) for item in value[1]), maxlen=value[0])
+                else:
+                    value = self.resolve(value)
+                setattr(obj, name, value)
+
+    def restore(self):
+        data = self.data
+        ecosystem = self.ecosystem
+
+        # Массивы бэкенда создаются в прежнем порядке, а особи занимают в них прежние слоты.
+        slots = {}
+        for name, size, free, owners in data.get('layouts', ()):
+            cls = ecosystem.species_class(SPECIES[name])
+            if getattr(cls, 'array_fields', ()):
+                ecosystem.backend.reserve(cls, size, free)
+                slots[name] = {obj_id: slot for slot, obj_id in enumerate(owners) if obj_id is not None}
+
+        self.crosses, cross_links = self.build(EatingCross, data['crosses'])
+        pending = [(self.crosses, cross_links)]
+        for name, table in data['entities'].items():
+            cls = ecosystem.species_class(SPECIES[name])
+            entities, links = self.build(cls, table, set(getattr(cls, 'array_fields', ())) | set(VECTOR_COLUMNS))
+            self.restore_vectors(cls, entities, table, slots.get(name))
+            pending.append((entities, links))
+        for cls, key in ((Food, 'food'), (Water, 'water')):
+            pending.append(self.build(cls, data[key]))
+        for objects, links in pending:
+            self.link(objects, links)
+
+        self.fill_ecosystem()
+        return ecosystem
+
+    def restore_vectors(self, cls, entities, table, slots=None):
+        """Задает особям положение и направление (с бэкендом - все поля его массивов).
+
+        slots - {id особи: слот в массивах бэкенда} из сохраненного размещения.
+        """
+        columns = dict(zip(table['fields'], table['columns']))
+        if getattr(cls, 'array_fields', ()):
+            values = {name: columns[name] for name in cls.array_fields + VECTOR_COLUMNS}
+            if slots is not None:
+                slots = [slots.get(obj_id) for obj_id in table['ids']]
+            self.ecosystem.backend.restore(entities, values, table['alive'], slots)
+            return
+        fill_column(cls, 'position', entities, map(Vector2, columns['x'], columns['y']))
+        fill_column(cls, 'move_direction', entities, map(Vector2, columns['vx'], columns['vy']))
+
+    def fill_ecosystem(self):
+        """Заполняет списки, словари и индексы экосистемы в сохраненном порядке."""
+        data = self.data
+        ecosystem = self.ecosystem
+        objects = self.objects
+        ecosystem.time, ecosystem.tick, ecosystem.next_id = data['clock']
+        ecosystem.food_spawn_probability = data['food_spawn_probability']
+        ecosystem.max_entity_size = data['max_entity_size']
+        ecosystem.max_water_size = max((objects[obj_id].size for obj_id in data['water_sources']), default=0)
+        ecosystem.rng.setstate(data['rng'])
+
+        for ids, items in ((data['order'], ecosystem.entities), (data['resources'], ecosystem.resources),
+                           (data['water_sources'], ecosystem.water_sources)):
+            for obj_id in ids:
+                obj = objects[obj_id]
+                ecosystem.by_id[obj_id] = obj
+                append_indexed(items, obj)
+
+        for name, ids in data['indexes'].items():
+            index = ecosystem.species_index(SPECIES[name])
+            for obj_id in ids:
+                index.insert(objects[obj_id])
+        for name, ids in data['members'].items():
+            ecosystem.species_members[species_key(SPECIES[name])] = dict.fromkeys(objects[obj_id] for obj_id in ids)
+        for index, key in ((ecosystem.resource_index, 'resource_index'), (ecosystem.water_index, 'water_index')):
+            for obj_id in data[key]:
+                index.insert(objects[obj_id])
+
+@contextmanager
+def paused_gc():
+    """Отключает сборщик циклов на время сохранения или загрузки.
+
+    Снимок создает сотни тысяч объектов без циклов, и иначе сборщик запускается
+    на каждые несколько сотен из них, просматривая все уже созданные.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+def dumps(ecosystem):
+    """Сериализует экосистему в байты снимка."""
+    with paused_gc():
+        payload = marshal.dumps(SnapshotWriter(ecosystem).collect(), MARSHAL_VERSION)
+    return HEADER.pack(MAGIC, VERSION) + zlib.compress(payload, 1)
+
+def loads(data, backend=None):
+    """Восстанавливает экосистему из байтов снимка."""
+    if len(data) < HEADER.size or data[:len(MAGIC)] != MAGIC:
+        raise ValueError("Это не файл снимка экосистемы")
+    _, version = HEADER.unpack_from(data)
+    if version != VERSION:
+        raise ValueError(f"Неподдерживаемая версия снимка: {version} (ожидается {VERSION})")
+    with paused_gc():
+        try:
+            payload = marshal.loads(zlib.decompress(data[HEADER.size:]))
+        except (zlib.error, EOFError) as error:
+            raise ValueError(f"Файл снимка поврежден: {error}") from error
+        try:
+            return SnapshotReader(payload, backend).restore()
+        except (KeyError, TypeError, IndexError, AttributeError) as error:
+            # Заголовок верный, но словарь снимка не той структуры.
+            raise ValueError("Файл снимка поврежден") from error
+
+def save(ecosystem, path):
+    """Сохраняет экосистему в файл снимка."""
+    with open(path, 'wb') as file:
+        file.write(dumps(ecosystem))
+
+def load(path, backend=None):
+    """Загружает экосистему из файла снимка."""
+    with open(path, 'rb') as file:
+        return loads(file.read(), backend)
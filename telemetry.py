@@ -0,0 +1,241 @@
+"""Телеметрия экосистемы: агрегаты по тикам в кольцевом буфере и их потоковая запись.
+
+Экосистема с telemetry сообщает о рождениях и смертях (с причиной) по ходу
+тика и вызывает sample() в конце каждого тика. Раз в interval тиков телеметрия
+собирает строку: численность, средние голод и жажда каждого вида, еда, число
+рождений и смертей по причинам и убийства на одного хищника за интервал.
+Строка уходит в приемник (CSV или Parquet), если он задан, и в кольцевой буфер
+на capacity строк. Когда буфер заполнен, соседние строки попарно сливаются, а
+шаг буфера удваивается, поэтому буфер всегда покрывает весь прогон при
+постоянной памяти. Полная история хранится только в файле приемника.
+"""
+import csv
+from collections import deque
+
+from simulation import DEATH_CAUSES, SPECIES
+
+TELEMETRY_CAPACITY = 512
+TELEMETRY_INTERVAL = 10
+# Строк в одной группе строк файла Parquet.
+PARQUET_BLOCK_ROWS = 4096
+
+def telemetry_columns(species_names):
+    """Столбцы телеметрии и какие из них - события (суммируются при слиянии строк).
+
+    kills_per_predator - не событие: при слиянии он пересчитывается по суммарным
+    убийствам и средней численности охотников.
+    """
+    columns = ['tick', 'time']
+    columns += [f'count_{name}' for name in species_names]
+    columns += [f'hunger_{name}' for name in species_names]
+    columns += [f'thirst_{name}' for name in species_names]
+    columns.append('food')
+    events = ('births',) + tuple(f'deaths_{cause}' for cause in DEATH_CAUSES + ('other',))
+    return columns + list(events) + ['kills_per_predator'], events
+
+class Telemetry:
+    """Агрегаты экосистемы по тикам в кольцевом буфере постоянного размера с прореживанием."""
+    def __init__(self, capacity=TELEMETRY_CAPACITY, interval=TELEMETRY_INTERVAL, sink=None):
+        self.capacity = capacity
+        self.interval = interval
+        self.sink = sink
+        self.species = dict(SPECIES)
+        self.columns, self.events = telemetry_columns(self.species)
+        # Виды-охотники: по их численности считаются убийства на одного хищника.
+        self.hunters = [name for name, cls in self.species.items() if cls.prey]
+        self.series = {name: deque(maxlen=capacity) for name in self.columns}
+        self.counters = dict.fromkeys(self.events, 0)
+        self.ticks = 0
+        # Сколько строк по interval тиков приходится на одну строку буфера.
+        self.stride = 1
+        self.pending = None
+        self.pending_rows = 0
+        # Меняется при каждом добавлении строки в буфер (для кэша отрисовки).
+        self.version = 0
+
+    def born(self, entity):
+        self.counters['births'] += 1
+
+    def died(self, entity, cause):
+        self.counters[f'deaths_{cause or "other"}'] += 1
+
+    def sample(self, ecosystem):
+        """Конец тика: раз в interval тиков собирает строку телеметрии."""
+        self.ticks += 1
+        if self.ticks < self.interval:
+            return
+        self.ticks = 0
+        row = dict.fromkeys(self.columns)
+        row['tick'], row['time'] = ecosystem.tick, ecosystem.time
+        for name, cls in self.species.items():
+            members = ecosystem.members(cls)
+            count = len(members)
+            row[f'count_{name}'] = count
+            row[f'hunger_{name}'] = sum(entity.hunger for entity in members) / count if count else 0.0
+            row[f'thirst_{name}'] = sum(entity.thirst for entity in members) / count if count else 0.0
+        row['food'] = ecosystem.food_amount()
+        row.update(self.counters)
+        row['kills_per_predator'] = self.kills_per_predator(row)
+        self.counters = dict.fromkeys(self.events, 0)
+        if self.sink is not None:
+            self.sink.write(row)
+        self.push(row)
+
+    def kills_per_predator(self, row):
+        """Убийства за строку на одного охотника (по численности охотников в строке)."""
+        predators = sum(row[f'count_{name}'] for name in self.hunters)
+        return row['deaths_predation'] / predators if predators else 0.0
+
+    def merge(self, first, second, first_weight, second_weight):
+        """Строка за оба интервала: события складываются, остальные показатели усредняются."""
+        total = first_weight + second_weight
+        row = dict.fromkeys(self.columns)
+        row['tick'], row['time'] = second['tick'], second['time']
+        # kills_per_predator - последний столбец, он пересчитывается по итогам слияния.
+        for name in self.columns[2:-1]:
+            if name in self.events:
+                row[name] = first[name] + second[name]
+            else:
+                row[name] = (first[name] * first_weight + second[name] * second_weight) / total
+        row['kills_per_predator'] = self.kills_per_predator(row)
+        return row
+
+    def push(self, row):
+        """Добавляет строку в буфер, сливая по stride строк в одну."""
+        if self.pending is None:
+            self.pending = row
+        else:
+            self.pending = self.merge(self.pending, row, self.pending_rows, 1)
+        self.pending_rows += 1
+        if self.pending_rows < self.stride:
+            return
+        if len(self.series['tick']) == self.capacity:
+            # После слияния шаг удвоен: накопленная строка ждет вторую половину своего шага,
+            # чтобы каждая строка буфера покрывала одинаковое число интервалов.
+            self.compact()
+            return
+        for name, value in self.pending.items():
+            self.series[name].append(value)
+        self.pending = None
+        self.pending_rows = 0
+        self.version += 1
+
+    def compact(self):
+        """Сливает соседние строки буфера попарно и удваивает шаг буфера."""
+        rows = self.rows()
+        merged = [self.merge(rows[i], rows[i + 1], 1, 1) for i in range(0, len(rows) - 1, 2)]
+        if len(rows) % 2:
+            merged.append(rows[-1])
+        for name, values in self.series.items():
+            values.clear()
+            values.extend(row[name] for row in merged)
+        self.stride *= 2
+
+    def rows(self):
+        """Строки буфера от старых к новым."""
+        return [dict(zip(self.columns, values)) for values in zip(*(self.series[name] for name in self.columns))]
+
+    def values(self, name):
+        """Значения столбца name в буфере от старых к новым."""
+        return list(self.series[name])
+
+    def close(self):
+        """Закрывает приемник, дописав в него накопленное."""
+        if self.sink is not None:
+            self.sink.close()
+            self.sink = None
+
+class CsvSink:
+    """Потоковая запись строк телеметрии в CSV (заголовок берется из первой строки)."""
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = None
+
+    def write(self, row):
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.file, fieldnames=list(row))
+            self.writer.writeheader()
+        self.writer.writerow(row)
+
+    def close(self):
+        self.file.close()
+
+class ParquetSink:
+    """Потоковая запись строк телеметрии в Parquet группами по block_rows строк (требует pyarrow)."""
+    def __init__(self, path, block_rows=PARQUET_BLOCK_ROWS):
+        import pyarrow
+        import pyarrow.parquet
+
+        self.pyarrow = pyarrow
+        self.path = path
+        self.block_rows = block_rows
+        self.writer = None
+        self.columns = None
+
+    def write(self, row):
+        if self.columns is None:
+            self.columns = {name: [] for name in row}
+        for name, value in row.items():
+            self.columns[name].append(value)
+        if len(self.columns['tick']) >= self.block_rows:
+            self.flush()
+
+    def flush(self):
+        if not self.columns or not self.columns['tick']:
+            return
+        table = self.pyarrow.table(self.columns)
+        if self.writer is None:
+            self.writer = self.pyarrow.parquet.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+        for values in self.columns.values():
+            values.clear()
+
+    def close(self):
+        self.flush()
+        if self.writer is not None:
+            self.writer.close()
+
+def open_sink(path):
+    """Приемник по расширению path: .parquet - Parquet, иначе CSV."""
+    if path.endswith('.parquet'):
+        return ParquetSink(path)
+    return CsvSink(path)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from simulation import (WIDTH, HEIGHT, INITIAL_HERBIVORE_COUNT, INITIAL_PREDATOR_COUNT, INITIAL_FOOD_COUNT,
+                            Ecosystem, load_species)
+
+    parser = argparse.ArgumentParser(description="Прогон без отрисовки с записью телеметрии.")
+    parser.add_argument("--ticks", type=int, default=100000, help="число тиков симуляции")
+    parser.add_argument("--width", type=int, default=WIDTH, help="ширина карты")
+    parser.add_argument("--height", type=int, default=HEIGHT, help="высота карты")
+    parser.add_argument("--backend", choices=["numpy"], default=None,
+                        help="векторизованный бэкенд для больших миров (с тем же зерном дает другой прогон)")
+    parser.add_argument("--herbivores", type=int, default=INITIAL_HERBIVORE_COUNT, help="начальное число травоядных")
+    parser.add_argument("--predators", type=int, default=INITIAL_PREDATOR_COUNT, help="начальное число хищников")
+    parser.add_argument("--food", type=int, default=INITIAL_FOOD_COUNT, help="начальное количество еды")
+    parser.add_argument("--seed", type=int, default=None, help="зерно генератора случайных чисел")
+    parser.add_argument("--interval", type=int, default=TELEMETRY_INTERVAL, help="тиков на строку телеметрии")
+    parser.add_argument("--output", default="telemetry.csv", help="файл телеметрии (.csv или .parquet)")
+    parser.add_argument("--species", default=None, metavar="ФАЙЛ", help="JSON-файл с дополнительными видами")
+    args = parser.parse_args()
+
+    species_counts = load_species(args.species) if args.species is not None else None
+    telemetry = Telemetry(interval=args.interval, sink=open_sink(args.output))
+    ecosystem = Ecosystem(args.width, args.height, backend=args.backend, seed=args.seed, telemetry=telemetry)
+    ecosystem.populate(args.herbivores, args.predators, args.food, species_counts)
+    started = time.perf_counter()
+    ecosystem.run(args.ticks)
+    elapsed = time.perf_counter() - started
+    telemetry.close()
+
+    rows = telemetry.rows() + ([telemetry.pending] if telemetry.pending is not None else [])
+    deaths = {cause: sum(row[f'deaths_{cause}'] for row in rows) for cause in DEATH_CAUSES + ('other',)}
+    print(f"{args.ticks} тиков за {elapsed:.2f} с, строка буфера - {telemetry.stride * args.interval} тиков")
+    print(f"Рождений: {sum(row['births'] for row in rows)}, смертей: "
+          + ", ".join(f"{cause} {count}" for cause, count in deaths.items()))
+    print(f"Телеметрия записана в {args.output}")
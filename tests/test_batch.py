@@ -0,0 +1,16 @@
+"""Имена параметров пакетного прогона."""
+import pytest
+
+from batch import check_param
+
+
+@pytest.mark.parametrize("name", ["herbivores", "Predator.hunt_range", "Herbivore.max_age"])
+def test_known_parameters(name):
+    assert check_param(name) == name
+
+
+@pytest.mark.parametrize("name", ["Predator.hunt_rnage", "Herbivore.hunger", "Herbivore.update",
+                                  "Herbivore._slot", "Herbivore.", "Wolf.max_age", "rabbits"])
+def test_unknown_parameters(name):
+    with pytest.raises(ValueError):
+        check_param(name)
@@ -0,0 +1,40 @@
+"""Сон и пробуждение особи: в какие тики она стареет и двигается."""
+import pytest
+
+from simulation import FIXED_DT, HEIGHT, WIDTH, Ecosystem, Predator
+
+
+def step(ecosystem, predator):
+    """Делает тик и возвращает (постарела ли особь, сдвинулась ли она)."""
+    age, position = predator.age, (predator.x, predator.y)
+    ecosystem.step()
+    return predator.age > age, (predator.x, predator.y) != position
+
+
+@pytest.mark.parametrize("backend", [None, "numpy"])
+def test_predator_wakes_after_delay(backend):
+    if backend is not None:
+        pytest.importorskip(backend)
+    ecosystem = Ecosystem(WIDTH, HEIGHT, backend=backend, seed=4)
+    ecosystem.populate(0, 1, 0)
+    predator, = ecosystem.members(Predator)
+    cycle = ecosystem.day_night_cycle
+
+    # Днем хищник спит: стареет, но не двигается по своей воле.
+    cycle.timer = cycle.transition_duration + cycle.day_length / 2
+    ecosystem.step()
+    assert predator.is_asleep
+    assert step(ecosystem, predator)[0]
+
+    # Ночью он еще wake_up_delay секунд спит, не старея и не двигаясь.
+    cycle.timer = cycle.transition_duration + cycle.day_length + 1
+    predator.wake_up_delay = 2.5 * FIXED_DT
+    assert step(ecosystem, predator) == (False, False)
+    assert step(ecosystem, predator) == (False, False)
+    assert step(ecosystem, predator) == (False, False)
+    assert predator.is_asleep
+
+    # В тик пробуждения он сразу стареет и двигается, как и во все следующие.
+    assert step(ecosystem, predator) == (True, True)
+    assert not predator.is_asleep
+    assert step(ecosystem, predator) == (True, True)
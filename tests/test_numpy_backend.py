@@ -0,0 +1,41 @@
+"""Векторизованный бэкенд: пакетные отметки особей у воды и краев, виды без предельного возраста."""
+import pytest
+
+pytest.importorskip("numpy")
+
+import numpy_backend
+from simulation import HEIGHT, WIDTH, Ecosystem, Herbivore, Predator
+
+
+def fingerprint(ecosystem):
+    return [(entity.id, entity.x, entity.y, entity.hunger) for entity in ecosystem.entities]
+
+
+def test_flags_only_skip_idle_checks(monkeypatch):
+    def run():
+        ecosystem = Ecosystem(WIDTH * 2, HEIGHT * 2, backend="numpy", seed=5)
+        ecosystem.populate(200, 50, 300)
+        ecosystem.run(600)
+        return fingerprint(ecosystem)
+
+    flagged = run()
+
+    def flag_all(self, ecosystem):
+        for store in self.stores.values():
+            store.near_water[:] = True
+            store.near_edge[:] = True
+
+    monkeypatch.setattr(numpy_backend.NumpyBackend, "flag", flag_all)
+    assert run() == flagged
+
+
+def test_species_without_max_age():
+    ecosystem = Ecosystem(WIDTH, HEIGHT, backend="numpy", seed=1, species_params={Herbivore: {'max_age': None}})
+    ecosystem.populate(10, 2, 20)
+    for entity in ecosystem.members(Herbivore):
+        entity.age = 1e9
+    for entity in ecosystem.members(Predator):
+        entity.age = entity.max_age
+    ecosystem.step()
+    assert ecosystem.count(Herbivore) == 10
+    assert ecosystem.count(Predator) == 0
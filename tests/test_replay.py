@@ -0,0 +1,92 @@
+"""Запись прогона и ее воспроизведение: кадры совпадают с экосистемой в каждом тике."""
+import marshal
+import zlib
+
+import pytest
+
+import replay
+from replay import RECORD_SCALE, Recorder, Replay, ReplayWorld, accumulate, deltas, grid_levels, state_flags
+from simulation import HEIGHT, WIDTH, Ecosystem
+
+
+def quantize(value):
+    return int(value * RECORD_SCALE) / RECORD_SCALE
+
+
+def frame_of(ecosystem):
+    """То, что должно попасть в кадр: особи с координатами, размером и флагами, еда и сетка еды."""
+    entities = {entity.id: (quantize(entity.x), quantize(entity.y), quantize(entity.size), state_flags(entity))
+                for entity in ecosystem.entities if entity.alive}
+    grid = None if ecosystem.food_grid is None else grid_levels(ecosystem.food_grid)
+    return entities, sorted(food.id for food in ecosystem.resources), grid
+
+
+def frame_in(world):
+    entities = {agent.id: (agent.x, agent.y, agent.size, agent.flags) for agent in world.agents}
+    grid = None if world.food_grid is None else world.food_grid.levels
+    return entities, sorted(world.resources), grid
+
+
+def record(path, ticks, food_mode=None, chunk_ticks=50):
+    ecosystem = Ecosystem(WIDTH, HEIGHT, seed=6, food_mode=food_mode)
+    ecosystem.populate()
+    expected = []
+    with Recorder(str(path), chunk_ticks) as recorder:
+        for _ in range(ticks):
+            recorder.capture(ecosystem)
+            expected.append(frame_of(ecosystem))
+            ecosystem.step()
+    return expected
+
+
+@pytest.mark.parametrize("food_mode", [None, "grid"])
+def test_replay_matches_every_recorded_tick(tmp_path, food_mode):
+    if food_mode == "grid":
+        pytest.importorskip("numpy")
+    path = tmp_path / "run.rec"
+    expected = record(path, 400, food_mode)
+    recording = Replay(str(path))
+    assert len(recording) == len(expected)
+    for position, frame in enumerate(expected):
+        world = recording.seek(position)
+        assert world.tick == position
+        assert frame_in(world) == frame
+
+
+def test_seek_backwards_uses_checkpoints(tmp_path, monkeypatch):
+    path = tmp_path / "run.rec"
+    expected = record(path, 300, chunk_ticks=300)
+    recording = Replay(str(path))
+    recording.seek(len(recording) - 1)
+    assert sorted(recording.checkpoints) == list(range(0, 300, replay.SEEK_CHECKPOINT_FRAMES))
+
+    applied = []
+    apply = ReplayWorld.apply
+    monkeypatch.setattr(ReplayWorld, "apply", lambda world, frame: applied.append(frame) or apply(world, frame))
+    for position in (250, 123, 47, 0, 199):
+        applied.clear()
+        assert frame_in(recording.seek(position)) == expected[position]
+        assert len(applied) < replay.SEEK_CHECKPOINT_FRAMES
+
+
+def test_chunks_start_with_keyframes(tmp_path):
+    path = tmp_path / "run.rec"
+    expected = record(path, 120, chunk_ticks=50)
+    recording = Replay(str(path))
+    assert [(first, count) for first, count, _, _ in recording.chunks] == [(0, 50), (50, 50), (100, 20)]
+    for _, count, offset, length in recording.chunks:
+        frames = marshal.loads(zlib.decompress(recording.data[offset:offset + length]))
+        assert len(frames) == count
+        assert 'ids' in frames[0]
+        assert all('died' in frame and 'ids' not in frame for frame in frames[1:])
+    # Ключевой кадр, собранный из состояния воспроизведения, восстанавливает тот же кадр.
+    world = recording.seek(77)
+    assert frame_in(ReplayWorld(world.keyframe())) == expected[77]
+
+
+def test_deltas_roundtrip():
+    previous = [10, -5, 300]
+    values = [12, -9, 300, 7, 8]
+    restored = list(previous)
+    accumulate(restored, deltas(values, previous))
+    assert restored == values
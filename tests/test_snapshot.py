@@ -0,0 +1,114 @@
+"""Сохранение и загрузка снимков: точное восстановление состояния и поврежденные файлы."""
+import marshal
+import zlib
+
+import pytest
+
+import snapshot
+from simulation import HEIGHT, WIDTH, Ecosystem, GrassPatch, Herbivore, Predator
+
+
+def make_ecosystem(ticks=1500, **kwargs):
+    ecosystem = Ecosystem(WIDTH, HEIGHT, seed=3, **kwargs)
+    ecosystem.populate()
+    ecosystem.run(ticks)
+    return ecosystem
+
+
+def damaged(payload):
+    """Снимок с верным заголовком и произвольным marshal-содержимым."""
+    return snapshot.HEADER.pack(snapshot.MAGIC, snapshot.VERSION) + zlib.compress(marshal.dumps(payload))
+
+
+def slot_layout(ecosystem):
+    """Слоты особей и свободные слоты массивов бэкенда NumPy по видам."""
+    return [(cls.__name__, store.size, store.free, [None if owner is None else owner.id for owner in store.owners])
+            for cls, store in ecosystem.backend.stores.items()]
+
+
+def test_roundtrip_keeps_state():
+    ecosystem = make_ecosystem()
+    data = snapshot.dumps(ecosystem)
+    restored = snapshot.loads(data)
+    assert snapshot.dumps(restored) == data
+    assert [entity.id for entity in restored.entities] == [entity.id for entity in ecosystem.entities]
+    for entity, copy in zip(ecosystem.entities, restored.entities):
+        assert type(copy).__name__ == type(entity).__name__
+        assert (copy.x, copy.y, copy.hunger, copy.thirst, copy.age) == (entity.x, entity.y, entity.hunger,
+                                                                         entity.thirst, entity.age)
+
+
+@pytest.mark.parametrize("food_mode", [None, "grid"])
+def test_reference_run_continues_exactly(food_mode):
+    if food_mode == "grid":
+        pytest.importorskip("numpy")
+    ecosystem = make_ecosystem(food_mode=food_mode)
+    restored = snapshot.loads(snapshot.dumps(ecosystem))
+    ecosystem.run(1500)
+    restored.run(1500)
+    assert snapshot.dumps(restored) == snapshot.dumps(ecosystem)
+
+
+def test_numpy_run_continues_exactly():
+    pytest.importorskip("numpy")
+    ecosystem = make_ecosystem(backend="numpy")
+    # Освободившиеся слоты массивов должны переиспользоваться в том же порядке.
+    for entity in list(ecosystem.members(Herbivore))[:3]:
+        ecosystem.remove_entity(entity)
+    assert any(store.free for store in ecosystem.backend.stores.values())
+    restored = snapshot.loads(snapshot.dumps(ecosystem), backend="numpy")
+    assert slot_layout(restored) == slot_layout(ecosystem)
+    ecosystem.run(1500)
+    restored.run(1500)
+    assert snapshot.dumps(restored) == snapshot.dumps(ecosystem)
+
+
+def test_links_watchers_and_ghosts():
+    ecosystem = make_ecosystem(ticks=10)
+    herbivore, prey = list(ecosystem.members(Herbivore))[:2]
+    predator = next(iter(ecosystem.members(Predator)))
+    food = ecosystem.resources[0]
+    herbivore.target = food
+    ecosystem.remove_entity(prey)
+    # Ссылка на уже убранную особь: она попадает в снимок мертвой.
+    predator.target = prey
+
+    restored = snapshot.loads(snapshot.dumps(ecosystem))
+    copy = restored.by_id[herbivore.id]
+    assert copy.target is restored.by_id[food.id]
+    assert copy in copy.target._watchers
+    ghost = restored.by_id[predator.id].target
+    assert ghost.id == prey.id and not ghost.alive
+    assert ghost.id not in restored.by_id
+    assert (ghost.x, ghost.y) == (prey.x, prey.y)
+
+
+def test_grass_patch_target():
+    pytest.importorskip("numpy")
+    ecosystem = make_ecosystem(ticks=10, food_mode="grid")
+    herbivore = next(iter(ecosystem.members(Herbivore)))
+    herbivore.target = GrassPatch(120.0, 80.0)
+    copy = snapshot.loads(snapshot.dumps(ecosystem)).by_id[herbivore.id]
+    assert isinstance(copy.target, GrassPatch)
+    assert (copy.target.x, copy.target.y) == (120.0, 80.0)
+
+
+@pytest.mark.parametrize("data", [
+    b"not a snapshot",
+    snapshot.HEADER.pack(snapshot.MAGIC, snapshot.VERSION) + b"\x00garbage",
+    damaged({'version': 2}),
+    damaged([1, 2, 3]),
+    damaged(None),
+])
+def test_damaged_file_raises_value_error(data):
+    with pytest.raises(ValueError):
+        snapshot.loads(data)
+
+
+def test_load_missing_keys_in_tables(tmp_path):
+    data = snapshot.SnapshotWriter(make_ecosystem(ticks=10)).collect()
+    del data['entities']['Herbivore']['columns']
+    path = tmp_path / "broken.snapshot"
+    path.write_bytes(damaged(data))
+    with pytest.raises(ValueError):
+        snapshot.load(path)
@@ -0,0 +1,23 @@
+"""Пороги видов, которые считаются от их пределов (DERIVED_THRESHOLDS)."""
+from simulation import HEIGHT, WIDTH, Ecosystem, Entity, Herbivore, Predator
+
+
+def test_builtin_thresholds():
+    assert Herbivore.hunger_threshold_eat == Herbivore.max_hunger / 4
+    assert Herbivore.thirst_threshold_drink == Herbivore.max_thirst / 4
+    assert Predator.hunger_threshold_eat == Predator.max_hunger / 4
+    assert Predator.hunger_desperation_threshold == Predator.max_hunger * 0.75
+    assert Herbivore.reproduction_threshold == Predator.reproduction_threshold == Entity.reproduction_threshold
+
+
+def test_species_params_recompute_thresholds():
+    ecosystem = Ecosystem(WIDTH, HEIGHT, species_params={
+        Herbivore: {'max_hunger': 100},
+        Predator: {'max_hunger': 80, 'hunger_desperation_threshold': 50},
+    })
+    herbivore = ecosystem.species_class(Herbivore)
+    predator = ecosystem.species_class(Predator)
+    assert herbivore.hunger_threshold_eat == 25
+    assert herbivore.thirst_threshold_drink == Herbivore.thirst_threshold_drink
+    assert predator.hunger_threshold_eat == 20
+    assert predator.hunger_desperation_threshold == 50
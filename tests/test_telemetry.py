@@ -0,0 +1,61 @@
+"""Кольцевой буфер телеметрии: слияние строк, удвоение шага и пересчет убийств на хищника."""
+import csv
+
+import pytest
+
+from simulation import HEIGHT, WIDTH, Ecosystem, Predator
+from telemetry import CsvSink, Telemetry
+
+
+def read_rows(path):
+    with open(path, newline='', encoding='utf-8') as file:
+        return [{name: float(value) for name, value in row.items()} for row in csv.DictReader(file)]
+
+
+def test_buffer_merges_overflowing_rows(tmp_path):
+    path = tmp_path / "telemetry.csv"
+    telemetry = Telemetry(capacity=6, interval=10, sink=CsvSink(str(path)))
+    ecosystem = Ecosystem(WIDTH, HEIGHT, seed=0, telemetry=telemetry)
+    ecosystem.populate(40, 12, 100)
+    for predator in ecosystem.members(Predator):
+        predator.hunger = 25
+    ecosystem.run(2400)
+    telemetry.close()
+
+    # Приемник получает каждую строку, буфер - строки, слитые по stride штук.
+    raw = read_rows(path)
+    buffered = telemetry.rows()
+    assert len(raw) == 2400 // 10
+    assert telemetry.stride > 1
+    assert len(buffered) <= telemetry.capacity
+    assert len(buffered) * telemetry.stride + telemetry.pending_rows == len(raw)
+    assert sum(row['deaths_predation'] for row in raw) > 0
+
+    for number, row in enumerate(buffered):
+        group = raw[number * telemetry.stride:(number + 1) * telemetry.stride]
+        assert row['tick'] == group[-1]['tick']
+        for name in telemetry.events:
+            assert row[name] == sum(source[name] for source in group)
+        for name in telemetry.columns[2:-1]:
+            if name not in telemetry.events:
+                assert row[name] == pytest.approx(sum(source[name] for source in group) / len(group))
+        predators = sum(source['count_Predator'] for source in group) / len(group)
+        expected = row['deaths_predation'] / predators if predators else 0.0
+        assert row['kills_per_predator'] == pytest.approx(expected)
+
+
+def test_merge_recomputes_kills_per_predator():
+    telemetry = Telemetry()
+    first = dict.fromkeys(telemetry.columns, 0)
+    second = dict.fromkeys(telemetry.columns, 0)
+    first.update(tick=10, count_Predator=1, deaths_predation=2)
+    second.update(tick=20, count_Predator=3, deaths_predation=2)
+    first['kills_per_predator'] = telemetry.kills_per_predator(first)
+    second['kills_per_predator'] = telemetry.kills_per_predator(second)
+
+    merged = telemetry.merge(first, second, 1, 1)
+    assert merged['tick'] == 20
+    assert merged['deaths_predation'] == 4
+    assert merged['count_Predator'] == 2
+    # 4 убийства на 2 хищника в среднем, а не среднее из 2 и 2/3.
+    assert merged['kills_per_predator'] == 2.0